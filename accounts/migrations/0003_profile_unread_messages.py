@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_remove_profile_avatar_url_profile_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='unread_messages',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
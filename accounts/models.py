@@ -10,6 +10,8 @@ class Profile(models.Model):
     firebase_uid = models.CharField(max_length=128, blank=True, null=True, unique=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
     bio = models.TextField(blank=True)
+    # Unread chat messages across all conversations (chat/services.py), for the nav badge.
+    unread_messages = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
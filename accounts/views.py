@@ -10,6 +10,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 
+from ecommerce import outbound
 from .models import Profile
 from .decorators import login_required_custom
 
@@ -45,7 +46,7 @@ def _init_firebase_admin():
         )
 
     cred = credentials.Certificate(cred_path)
-    firebase_admin.initialize_app(cred)
+    firebase_admin.initialize_app(cred, {"httpTimeout": outbound.config("firebase")["read_timeout"]})
 
 
 # ============================
@@ -146,10 +147,16 @@ def firebase_auth(request):
         _init_firebase_admin()
         from firebase_admin import auth as fa
 
-        decoded = fa.verify_id_token(id_token)
+        # Fetching Google's signing keys is the only network call here.
+        decoded = outbound.call(
+            "firebase", fa.verify_id_token, id_token, ignore=(ValueError, fa.InvalidIdTokenError),
+        )
         uid = decoded.get("uid")
         email = decoded.get("email", email)
         display_name = decoded.get("name", display_name)
+    except outbound.Unavailable as e:
+        logger.warning(f"Firebase verify skipped: {e}")
+        return JsonResponse({"success": False, "error": "Sign-in is temporarily unavailable. Please try again."}, status=503)
     except Exception as e:
         logger.warning(f"Firebase verify failed: {e}")
         return JsonResponse({"success": False, "error": f"Firebase verify failed: {str(e)}"}, status=401)
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from chat.models import Conversation
+
+BENCH_USERS = ('bench-idle-buyer', 'bench-idle-seller')
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _process_tree(pid):
+    """``pid`` and its descendants, read from /proc (Linux only)."""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    parents[int(entry)] = int(f.read().rsplit(')', 1)[1].split()[1])
+            except OSError:
+                pass
+    tree, frontier = [pid], [pid]
+    while frontier:
+        children = [p for p, parent in parents.items() if parent in frontier]
+        tree += children
+        frontier = children
+    return tree
+
+
+def _footprint(pid):
+    """``(threads, rss_mb)`` summed over the server's processes."""
+    threads = rss_kb = 0
+    for p in _process_tree(pid):
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('Threads:'):
+                        threads += int(line.split()[1])
+                    elif line.startswith('VmRSS:'):
+                        rss_kb += int(line.split()[1])
+        except OSError:
+            pass
+    return threads, rss_kb / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Holds N idle chat long polls open against one WSGI process "
+        "(gunicorn gthread) and one ASGI process (uvicorn, ecommerce/asgi.py) "
+        "and reports how many each could hold at once, how long an ordinary "
+        "request waited meanwhile, and the process's threads and memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=300, help='Concurrent idle long polls.')
+        parser.add_argument(
+            '--hold', type=float, default=20.0,
+            help='Seconds each long poll waits; keep it longer than opening all the connections takes.',
+        )
+        parser.add_argument('--threads', type=int, default=32, help='gunicorn threads for the WSGI worker.')
+        parser.add_argument('--servers', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'])
+
+    def handle(self, *args, **opts):
+        buyer, seller = (
+            User.objects.get_or_create(username=name, defaults={'email': f'{name}@example.com'})[0]
+            for name in BENCH_USERS
+        )
+        conv, _ = Conversation.objects.get_or_create(buyer=buyer, seller=seller)
+        since = conv.messages.order_by('-id').values_list('id', flat=True).first() or 0
+        client = Client()
+        client.force_login(buyer)
+        cookies = {settings.SESSION_COOKIE_NAME: client.cookies[settings.SESSION_COOKIE_NAME].value}
+
+        try:
+            for kind in opts['servers']:
+                self._bench(kind, conv.pk, since, cookies, opts)
+        finally:
+            client.logout()
+            User.objects.filter(username__in=BENCH_USERS).delete()
+
+    def _bench(self, kind, conv_id, since, cookies, opts):
+        port = _free_port()
+        if kind == 'wsgi':
+            label = f"WSGI: gunicorn gthread, 1 worker x {opts['threads']} threads"
+            command = [
+                sys.executable, '-m', 'gunicorn', 'ecommerce.wsgi:application',
+                '--bind', f'127.0.0.1:{port}', '--workers', '1', '--worker-class', 'gthread',
+                '--threads', str(opts['threads']), '--worker-connections', str(opts['connections'] * 2),
+                '--graceful-timeout', '1', '--log-level', 'warning',
+            ]
+        else:
+            label = "ASGI: uvicorn, 1 worker"
+            command = [
+                sys.executable, '-m', 'uvicorn', 'ecommerce.asgi:application',
+                '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning',
+            ]
+        env = dict(
+            os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE,
+            CHAT_LONG_POLL_SECONDS=str(opts['hold']),
+        )
+        server = subprocess.Popen(command, env=env)
+        try:
+            url = f'http://127.0.0.1:{port}'
+            self._wait_until_up(url, cookies, server)
+            baseline = _footprint(server.pid)
+            result = asyncio.run(self._hold(url, server.pid, conv_id, since, cookies, opts))
+        finally:
+            server.terminate()
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+        held, unanswered, probe, (threads, rss) = result
+        self.stdout.write(f"\n{label}")
+        self.stdout.write(
+            f"  {held}/{opts['connections']} long polls held at once"
+            f" ({unanswered} still unanswered after {opts['hold'] * 2:.0f}s)"
+        )
+        self.stdout.write(f"  /notifications/count/ while they waited: {probe}")
+        self.stdout.write(
+            f"  threads {baseline[0]} -> {threads}, RSS {baseline[1]:.0f} MB -> {rss:.0f} MB"
+        )
+
+    def _wait_until_up(self, url, cookies, server):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with {server.returncode}")
+            try:
+                if httpx.get(f'{url}/notifications/count/', cookies=cookies, timeout=2).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("server did not come up within 30s")
+
+    async def _hold(self, url, pid, conv_id, since, cookies, opts):
+        n, hold = opts['connections'], opts['hold']
+        timeout = hold * 2
+        limits = httpx.Limits(max_connections=n + 1, max_keepalive_connections=0)
+        async with httpx.AsyncClient(base_url=url, cookies=cookies, timeout=timeout, limits=limits) as client:
+            async def poll():
+                try:
+                    r = await client.get(f'/chat/{conv_id}/fetch/', params={'since': since, 'wait': hold})
+                    return 'held' if r.status_code == 200 else f'HTTP {r.status_code}', time.monotonic()
+                except httpx.TimeoutException:
+                    return 'timed out', None
+                except httpx.HTTPError as e:
+                    return type(e).__name__, None
+
+            polls = [asyncio.create_task(poll()) for _ in range(n)]
+            # Sample once every poll the server admitted is sitting idle.
+            await asyncio.sleep(hold * 0.75)
+            footprint = _footprint(pid)
+
+            started = time.perf_counter()
+            try:
+                await client.get('/notifications/count/')
+                probe = f"{time.perf_counter() - started:.2f}s"
+            except httpx.TimeoutException:
+                probe = f"timed out after {timeout:.0f}s"
+
+            outcomes = await asyncio.gather(*polls)
+
+        errors = {o for o, _ in outcomes if o not in ('held', 'timed out')}
+        if errors:
+            self.stdout.write(self.style.WARNING(f"  unexpected outcomes: {', '.join(sorted(errors))}"))
+        # A poll that came back after the full hold was waiting server-side
+        # for the ``hold`` seconds before; the most such intervals that
+        # overlap is how many the process held at once.
+        edges = sorted(
+            edge for o, end in outcomes if o == 'held'
+            for edge in ((end - hold, 1), (end, -1))
+        )
+        held = peak = 0
+        for _, step in edges:
+            held += step
+            peak = max(peak, held)
+        unanswered = sum(1 for o, _ in outcomes if o == 'timed out')
+        return peak, unanswered, probe, footprint
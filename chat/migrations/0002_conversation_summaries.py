@@ -0,0 +1,83 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Left
+
+
+def backfill_summaries(apps, schema_editor):
+    Conversation = apps.get_model('chat', 'Conversation')
+    Message = apps.get_model('chat', 'Message')
+    Profile = apps.get_model('accounts', 'Profile')
+
+    last = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-id')
+
+    def unread_from(sender):
+        return Coalesce(Subquery(
+            Message.objects.filter(conversation=OuterRef('pk'), sender=OuterRef(sender), is_read=False)
+            .values('conversation').annotate(n=Count('id')).values('n')
+        ), 0)
+
+    Conversation.objects.update(
+        last_message_body=Coalesce(Subquery(last.annotate(snippet=Left('body', 200)).values('snippet')[:1]), Value('')),
+        last_sender=Subquery(last.values('sender')[:1]),
+        last_message_at=Subquery(last.values('created_at')[:1]),
+        buyer_unread=unread_from('seller'),
+        seller_unread=unread_from('buyer'),
+    )
+
+    def total(role):
+        return Coalesce(Subquery(
+            Conversation.objects.filter(**{role: OuterRef('user')})
+            .values(role).annotate(n=Sum(f'{role}_unread')).values('n')
+        ), 0)
+
+    Profile.objects.update(unread_messages=total('buyer') + total('seller'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_profile_unread_messages'),
+        ('chat', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='buyer_unread',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_body',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='seller_unread',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['buyer', '-updated_at', '-id'], name='chat_conv_buyer_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['seller', '-updated_at', '-id'], name='chat_conv_seller_recent_idx'),
+        ),
+    ]
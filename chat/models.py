@@ -8,9 +8,20 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Summary for the conversation list, maintained by chat/services.py.
+    last_message_body = models.CharField(max_length=200, blank=True)
+    last_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    buyer_unread = models.PositiveIntegerField(default=0)
+    seller_unread = models.PositiveIntegerField(default=0)
+
     class Meta:
         unique_together = ('buyer', 'seller')
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['buyer', '-updated_at', '-id'], name='chat_conv_buyer_recent_idx'),
+            models.Index(fields=['seller', '-updated_at', '-id'], name='chat_conv_seller_recent_idx'),
+        ]
 
     def __str__(self):
         return f"Chat: {self.buyer.username} ↔ {self.seller.username}"
@@ -19,7 +30,7 @@ class Conversation(models.Model):
         return self.seller if user == self.buyer else self.buyer
 
     def unread_count(self, user):
-        return self.messages.filter(is_read=False).exclude(sender=user).count()
+        return self.buyer_unread if user.pk == self.buyer_id else self.seller_unread
 
 
 class Message(models.Model):
@@ -28,10 +39,13 @@ class Message(models.Model):
     body = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
-    
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Chat history pages and "since" fetches walk one conversation by id.
+            models.Index(fields=['conversation', 'id'], name='chat_msg_conversation_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender.username}: {self.body[:40]}"
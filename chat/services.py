@@ -0,0 +1,66 @@
+"""
+Sending and reading chat messages.
+
+The conversation list used to run an unread COUNT and a ``messages.last()``
+for every conversation. Conversation now carries a snapshot of its last
+message and an unread counter per participant, and Profile.unread_messages
+totals a user's unread chat messages for the nav badge. They are only
+changed here: each is a single ``SET n = n + k`` UPDATE in the same
+transaction as the message insert or the ``is_read`` update it accounts
+for, so concurrent senders and readers never lose a count.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from ecommerce import pubsub
+
+SNIPPET_LENGTH = 200
+
+
+def _unread_field(conv, user_id):
+    """The counter of ``user_id``'s unread messages in ``conv``."""
+    return 'buyer_unread' if user_id == conv.buyer_id else 'seller_unread'
+
+
+def send(conv, sender, body):
+    """Stores a message from ``sender`` and updates the conversation summary."""
+    from accounts.models import Profile
+    from .models import Conversation, Message
+
+    recipient_id = conv.seller_id if sender.pk == conv.buyer_id else conv.buyer_id
+    counter = _unread_field(conv, recipient_id)
+    with transaction.atomic():
+        message = Message.objects.create(conversation=conv, sender=sender, body=body, is_read=False)
+        Conversation.objects.filter(pk=conv.pk).update(
+            last_message_body=body[:SNIPPET_LENGTH],
+            last_sender=sender,
+            last_message_at=message.created_at,
+            updated_at=message.created_at,
+            **{counter: F(counter) + 1},
+        )
+        Profile.objects.filter(user_id=recipient_id).update(unread_messages=F('unread_messages') + 1)
+        pubsub.publish(f'chat:{conv.pk}')
+    return message
+
+
+def mark_read(conv, reader, message_ids=None):
+    """
+    Marks the other participant's unread messages in ``conv`` read (only
+    ``message_ids`` when given). Returns how many changed.
+    """
+    from accounts.models import Profile
+    from .models import Conversation, Message
+
+    counter = _unread_field(conv, reader.pk)
+    unread = Message.objects.filter(conversation=conv, is_read=False).exclude(sender_id=reader.pk)
+    if message_ids is not None:
+        unread = unread.filter(pk__in=message_ids)
+    with transaction.atomic():
+        read = unread.update(is_read=True)
+        if read:
+            Conversation.objects.filter(pk=conv.pk).update(**{counter: Greatest(F(counter) - read, 0)})
+            Profile.objects.filter(user_id=reader.pk).update(
+                unread_messages=Greatest(F('unread_messages') - read, 0),
+            )
+    return read
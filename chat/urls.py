@@ -7,4 +7,5 @@ urlpatterns = [
     path('start/<int:seller_id>/', views.start_chat, name='start_chat'),
     path('<int:conv_id>/fetch/', views.fetch_messages, name='fetch_messages'),
     path('<int:conv_id>/send/', views.send_message, name='send_message'),
+    path('<int:conv_id>/history/', views.message_history, name='message_history'),
 ]
\ No newline at end of file
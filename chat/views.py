@@ -1,51 +1,73 @@
 import json
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models as db_models
 from django.http import JsonResponse
-from django.shortcuts import get_object_or_404, redirect, render
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
 from django.views.decorators.http import require_POST
 
 from accounts.decorators import login_required_custom
+from ecommerce import pubsub
 from notifications.utils import create_notification
-from .models import Conversation, Message
+from shop.pagination import InvalidCursor, keyset_paginate_union
+from .models import Conversation
+from .services import mark_read, send
+
+CONVERSATION_PAGE_SIZE = 30
+HISTORY_PAGE_SIZE = 50
+FETCH_LIMIT = 100
+LIST_ORDERING = ('-updated_at', '-id')
 
 
 @login_required_custom
 def conversation_list(request):
-    conversations = Conversation.objects.filter(
-        db_models.Q(buyer=request.user) | db_models.Q(seller=request.user)
-    ).order_by('-updated_at')
-
-    conv_data = []
-    for conv in conversations:
-        other = conv.seller if request.user == conv.buyer else conv.buyer
-        unread = conv.messages.filter(is_read=False).exclude(sender=request.user).count()
-        conv_data.append({
-            'conv': conv,
-            'other': other,
-            'unread': unread,
-            'last_msg': conv.messages.last(),
-        })
+    """One page of the user's conversations, newest first, from the stored summaries."""
+    user = request.user
+    # Each side is read through its own (buyer|seller, -updated_at, -id)
+    # index; an OR of the two could use neither.
+    conversations = Conversation.objects.select_related('buyer', 'seller')
+    sides = [conversations.filter(buyer=user), conversations.filter(seller=user)]
+    try:
+        page = keyset_paginate_union(sides, LIST_ORDERING, request.GET.get('cursor'), CONVERSATION_PAGE_SIZE)
+    except InvalidCursor:
+        page = keyset_paginate_union(sides, LIST_ORDERING, None, CONVERSATION_PAGE_SIZE)
 
-    return render(request, 'chat/conversation_list.html', {'conv_data': conv_data})
+    conv_data = [
+        {
+            'conv': conv,
+            'other': conv.seller if user.pk == conv.buyer_id else conv.buyer,
+            'unread': conv.unread_count(user),
+        }
+        for conv in page
+    ]
+
+    return render(request, 'chat/conversation_list.html', {
+        'conv_data': conv_data,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'base_params': '',
+    })
 
 
 @login_required_custom
 def chat_room(request, conv_id):
     conv = get_object_or_404(Conversation, pk=conv_id)
     user = request.user
-    if user not in (conv.buyer, conv.seller):
+    if user.pk not in (conv.buyer_id, conv.seller_id):
         return redirect('conversation_list')
 
-    conv.messages.filter(is_read=False).exclude(sender=user).update(is_read=True)
-    other = conv.seller if user == conv.buyer else conv.buyer
-    messages_qs = conv.messages.all()
+    mark_read(conv, user)
+    other = conv.seller if user.pk == conv.buyer_id else conv.buyer
+    # Only the latest page; older messages load through message_history.
+    latest = list(conv.messages.order_by('-id')[:HISTORY_PAGE_SIZE + 1])
 
     return render(request, 'chat/chat_room.html', {
         'conv': conv,
         'other': other,
-        'messages': messages_qs,
+        # Not 'messages': base.html shows that (the messages framework) as toasts.
+        'chat_messages': latest[:HISTORY_PAGE_SIZE][::-1],
+        'has_older': len(latest) > HISTORY_PAGE_SIZE,
     })
 
 
@@ -66,37 +88,107 @@ def start_chat(request, seller_id):
     return redirect('chat_room', conv_id=conv.id)
 
 
+def _message_data(m, user, is_read=False):
+    return {
+        'id': m.id,
+        'body': m.body,
+        'is_mine': m.sender_id == user.pk,
+        'sender': m.sender.username,
+        'time': m.created_at.strftime('%H:%M'),
+        'is_read': m.is_read or is_read,
+    }
+
+
+async def _new_messages(conv, since, user):
+    """Up to FETCH_LIMIT messages after ``since``, and whether more follow."""
+    msgs = [
+        m async for m in conv.messages.filter(id__gt=since).select_related('sender').order_by('id')[:FETCH_LIMIT + 1]
+    ]
+    has_more = len(msgs) > FETCH_LIMIT
+    msgs = msgs[:FETCH_LIMIT]
+
+    # Mark incoming messages as read; nothing to write when there are none.
+    unread = [m.pk for m in msgs if not m.is_read and m.sender_id != user.pk]
+    if unread:
+        await sync_to_async(mark_read)(conv, user, unread)
+
+    return [_message_data(m, user, m.pk in unread) for m in msgs], has_more
+
+
 @login_required_custom
-def fetch_messages(request, conv_id):
-    conv = get_object_or_404(Conversation, pk=conv_id)
-    if request.user not in (conv.buyer, conv.seller):
+async def fetch_messages(request, conv_id):
+    """
+    Messages after ``since``, at most FETCH_LIMIT (``has_more`` says to ask
+    again). With ``wait=N`` (seconds, capped at CHAT_LONG_POLL_SECONDS) and
+    nothing new, the request holds until a message is sent to the
+    conversation or the time is up. Async, so under ecommerce/asgi.py a
+    waiting poll holds no thread.
+    """
+    conv = await aget_object_or_404(Conversation, pk=conv_id)
+    user = await request.auser()
+    if user.pk not in (conv.buyer_id, conv.seller_id):
         return JsonResponse({'error': 'Forbidden'}, status=403)
 
-    since = request.GET.get('since', 0)
-    msgs = conv.messages.filter(id__gt=since).select_related('sender').order_by('created_at')
+    try:
+        since = int(request.GET.get('since', 0))
+        wait = min(max(float(request.GET.get('wait', 0)), 0), settings.CHAT_LONG_POLL_SECONDS)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid parameters'}, status=400)
+
+    with pubsub.subscribe(f'chat:{conv.pk}') as subscription:
+        data, has_more = await _new_messages(conv, since, user)
+        if not data and wait:
+            await sync_to_async(pubsub.release_connection)()
+            if await subscription.async_wait(wait):
+                data, has_more = await _new_messages(conv, since, user)
+
+    return JsonResponse({'messages': data, 'has_more': has_more})
 
-    # Mark incoming messages as read
-    msgs.exclude(sender=request.user).update(is_read=True)
 
-    data = []
-    for m in msgs:
-        data.append({
-            'id': m.id,
-            'body': m.body,
-            'is_mine': m.sender == request.user,
-            'sender': m.sender.username,
-            'time': m.created_at.strftime('%H:%M'),
-            'is_read': m.is_read,
-        })
+@login_required_custom
+async def message_history(request, conv_id):
+    """
+    Older messages for the chat room's "load earlier" button: up to
+    HISTORY_PAGE_SIZE messages before message id ``before``, oldest first.
+    """
+    conv = await aget_object_or_404(Conversation, pk=conv_id)
+    user = await request.auser()
+    if user.pk not in (conv.buyer_id, conv.seller_id):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
+    try:
+        before = int(request.GET['before'])
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Invalid parameters'}, status=400)
+
+    older = [
+        m async for m in conv.messages.filter(id__lt=before).select_related('sender')
+        .order_by('-id')[:HISTORY_PAGE_SIZE + 1]
+    ]
+    return JsonResponse({
+        'messages': [_message_data(m, user) for m in reversed(older[:HISTORY_PAGE_SIZE])],
+        'has_more': len(older) > HISTORY_PAGE_SIZE,
+    })
 
-    return JsonResponse({'messages': data})
+
+def _send(conv, sender, body):
+    # Transactional (counters, pg_notify), so it runs as sync code.
+    message = send(conv, sender, body)
+    create_notification(
+        recipient=conv.seller if sender.pk == conv.buyer_id else conv.buyer,
+        notif_type='message',
+        message=f"{sender.username}: {body[:80]}",
+        link=f"/chat/{conv.id}/",
+    )
+    return message
 
 
 @login_required_custom
 @require_POST
-def send_message(request, conv_id):
-    conv = get_object_or_404(Conversation, pk=conv_id)
-    if request.user not in (conv.buyer, conv.seller):
+async def send_message(request, conv_id):
+    conv = await aget_object_or_404(Conversation.objects.select_related('buyer', 'seller'), pk=conv_id)
+    user = await request.auser()
+    if user.pk not in (conv.buyer_id, conv.seller_id):
         return JsonResponse({'error': 'Forbidden'}, status=403)
 
     try:
@@ -108,29 +200,13 @@ def send_message(request, conv_id):
     if not body:
         return JsonResponse({'error': 'Empty message'}, status=400)
 
-    m = Message.objects.create(
-        conversation=conv,
-        sender=request.user,
-        body=body,
-        is_read=False,
-    )
-
-    # bump updated_at for ordering
-    conv.save()
-
-    other = conv.seller if request.user == conv.buyer else conv.buyer
-    create_notification(
-        recipient=other,
-        notif_type='message',
-        message=f"{request.user.username}: {body[:80]}",
-        link=f"/chat/{conv.id}/",
-    )
+    m = await sync_to_async(_send)(conv, user, body)
 
     return JsonResponse({
         'id': m.id,
         'body': m.body,
         'is_mine': True,
-        'sender': request.user.username,
+        'sender': user.username,
         'time': m.created_at.strftime('%H:%M'),
         'is_read': False,
     })
\ No newline at end of file
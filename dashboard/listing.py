@@ -0,0 +1,81 @@
+"""
+Paginated, searchable admin listings.
+
+Pages use the same keyset pagination as the catalog (shop/pagination.py),
+so page 500 of the users table costs the same as page 1. Totals avoid
+``COUNT(*)`` over big tables:
+
+* unfiltered listings of tables larger than APPROXIMATE_COUNT_ABOVE rows
+  show PostgreSQL's planner estimate (``pg_class.reltuples``, kept fresh
+  by autovacuum/ANALYZE);
+* filtered listings count at most EXACT_COUNT_LIMIT matches and show
+  "1000+" beyond that.
+
+Searches are ``icontains`` lookups, backed on PostgreSQL by trigram indexes
+on ``UPPER(column)`` (dashboard/migrations/0002_admin_search_indexes.py).
+"""
+from urllib.parse import urlencode
+
+from django.db import connection
+
+from shop.pagination import InvalidCursor, keyset_paginate
+
+PAGE_SIZE = 50
+APPROXIMATE_COUNT_ABOVE = 10_000
+EXACT_COUNT_LIMIT = 1000
+
+
+def estimated_rows(model):
+    """Planner row estimate for the model's table, or None if unavailable."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # -1 means the table has never been vacuumed or analyzed.
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def count_rows(queryset, filtered):
+    """Returns ``(total, label)``; label is what the page shows."""
+    if not filtered:
+        estimate = estimated_rows(queryset.model)
+        if estimate is not None and estimate > APPROXIMATE_COUNT_ABOVE:
+            return estimate, f"~{estimate:,}"
+        total = queryset.count()
+        return total, f"{total:,}"
+
+    # COUNT over a LIMITed subquery stops at the limit.
+    total = queryset[:EXACT_COUNT_LIMIT + 1].count()
+    if total > EXACT_COUNT_LIMIT:
+        return total, f"{EXACT_COUNT_LIMIT:,}+"
+    return total, f"{total:,}"
+
+
+def paginate(request, queryset, ordering, filters):
+    """
+    One page of ``queryset`` plus what the listing templates need.
+    ``filters`` maps query parameter names to the values that were applied
+    (falsy values are ignored); they're carried into the next-page link.
+    """
+    active = {k: v for k, v in filters.items() if v}
+    try:
+        page = keyset_paginate(queryset, ordering, request.GET.get('cursor'), PAGE_SIZE)
+    except InvalidCursor:
+        page = keyset_paginate(queryset, ordering, None, PAGE_SIZE)
+
+    total, total_label = count_rows(queryset, filtered=bool(active))
+    return {
+        'page': page,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'filters': filters,
+        'base_params': urlencode(active),
+        'total': total,
+        'total_label': total_label,
+    }
@@ -0,0 +1,68 @@
+"""
+Admin overview metrics.
+
+The overview used to run its counts, a revenue Sum over every order and a
+top-sellers scan over every OrderItem on each page load. ``refresh``
+computes them once and stores a MetricsSnapshot; the page reads the latest
+snapshot in one query. Top sellers come from the daily sales rollups
+(shop/rollups.py), whose revenue is quantity × unit price for items that
+weren't cancelled or refunded.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from django.utils import timezone
+
+TOP_SELLERS = 5
+
+
+def compute():
+    """The current numbers, as MetricsSnapshot field values."""
+    from reports.models import Report
+    from shop.models import Order, Product, SellerDailySales
+
+    top = (
+        SellerDailySales.objects
+        .values('seller__username')
+        .annotate(revenue=Sum('revenue'), orders=Sum('order_count'))
+        .filter(revenue__gt=0)
+        .order_by('-revenue')[:TOP_SELLERS]
+    )
+    return {
+        'total_users': User.objects.count(),
+        'total_products': Product.objects.filter(is_active=True).count(),
+        'total_orders': Order.objects.count(),
+        'total_revenue': Order.objects.aggregate(t=Sum('total_amount'))['t'] or Decimal('0'),
+        'pending_reports': Report.objects.filter(status='pending').count(),
+        'top_sellers': [
+            {'username': row['seller__username'], 'revenue': str(row['revenue']), 'orders': row['orders']}
+            for row in top
+        ],
+    }
+
+
+def refresh(now=None):
+    """Stores a new snapshot and drops ones older than METRICS_HISTORY_DAYS."""
+    from .models import MetricsSnapshot
+
+    now = now or timezone.now()
+    snapshot = MetricsSnapshot.objects.create(computed_at=now, **compute())
+    MetricsSnapshot.objects.filter(
+        computed_at__lt=now - timedelta(days=settings.METRICS_HISTORY_DAYS)
+    ).delete()
+    return snapshot
+
+
+def latest():
+    """The newest snapshot, computing the first one if there is none yet."""
+    from .models import MetricsSnapshot
+
+    return MetricsSnapshot.objects.first() or refresh()
+
+
+def is_stale(snapshot, now=None):
+    now = now or timezone.now()
+    return (now - snapshot.computed_at).total_seconds() > settings.METRICS_MAX_AGE_SECONDS
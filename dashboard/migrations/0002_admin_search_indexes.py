@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Admin search uses icontains, which PostgreSQL runs as
+# UPPER(col::text) LIKE UPPER('%term%'); trigram GIN indexes on that exact
+# expression let it use an index instead of scanning the table. PostgreSQL
+# only (pg_trgm is installed by shop/migrations/0003).
+POSTGRES_FORWARD = [
+    "CREATE INDEX IF NOT EXISTS dashboard_user_username_trgm "
+    "ON auth_user USING gin ((UPPER(username::text)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS dashboard_user_email_trgm "
+    "ON auth_user USING gin ((UPPER(email::text)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS dashboard_user_joined_idx "
+    "ON auth_user (date_joined DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS dashboard_order_number_trgm "
+    "ON shop_order USING gin ((UPPER(order_number::text)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS dashboard_product_name_upper_trgm "
+    "ON shop_product USING gin ((UPPER(name::text)) gin_trgm_ops)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS dashboard_product_name_upper_trgm",
+    "DROP INDEX IF EXISTS dashboard_order_number_trgm",
+    "DROP INDEX IF EXISTS dashboard_user_joined_idx",
+    "DROP INDEX IF EXISTS dashboard_user_email_trgm",
+    "DROP INDEX IF EXISTS dashboard_user_username_trgm",
+]
+
+
+def _run_postgres(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('shop', '0003_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run_postgres(POSTGRES_FORWARD), _run_postgres(POSTGRES_BACKWARD)),
+    ]
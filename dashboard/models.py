@@ -0,0 +1,23 @@
+from django.db import models
+
+
+class MetricsSnapshot(models.Model):
+    """
+    Platform-wide numbers for the admin overview, computed by
+    dashboard/metrics.py (``manage.py refresh_metrics`` or the Refresh
+    button) instead of on every page load.
+    """
+    total_users = models.PositiveIntegerField(default=0)
+    total_products = models.PositiveIntegerField(default=0)
+    total_orders = models.PositiveIntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_reports = models.PositiveIntegerField(default=0)
+    # [{'username': ..., 'revenue': '123.45', 'orders': 3}, ...], best first
+    top_sellers = models.JSONField(default=list)
+    computed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-computed_at']
+
+    def __str__(self):
+        return f"Metrics at {self.computed_at:%Y-%m-%d %H:%M}"
@@ -3,11 +3,14 @@ from . import views
 
 urlpatterns = [
     path('', views.overview, name='admin_dashboard'),
+    path('metrics/refresh/', views.refresh_metrics, name='admin_refresh_metrics'),
+    path('outbound/', views.outbound_status, name='admin_outbound'),
     path('users/', views.manage_users, name='admin_users'),
     path('users/<int:user_id>/toggle/', views.toggle_user_active, name='admin_toggle_user'),
     path('shop/', views.manage_shop, name='admin_shop'),
     path('shop/products/<int:pk>/delete/', views.admin_delete_product, name='admin_delete_product'),
     path('orders/', views.manage_orders, name='admin_orders'),
+    path('orders/export/', views.export_orders, name='admin_orders_export'),
     path('orders/<int:order_id>/update/', views.admin_update_order, name='admin_update_order'),
     path('community/', views.manage_community, name='admin_community'),
     path('community/<int:pk>/delete/', views.admin_delete_question, name='admin_delete_question'),
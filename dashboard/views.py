@@ -1,46 +1,76 @@
+import os
+
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.views.decorators.http import require_POST
-from django.db.models import Sum, Count
+from django.db.models import Count, Q
 from django.contrib.auth.models import User
 
 from accounts.decorators import staff_required
-from accounts.models import Profile
-from shop.models import Product, Order, OrderItem
+from ecommerce import outbound
+from accounts.models import Profile, ROLE_CHOICES
+from shop.exports import FORMATS as EXPORT_FORMATS, ORDER_COLUMNS, all_orders, parse_date_range, stream_export
+from shop.models import Product, Order, ORDER_STATUS_CHOICES
+from shop.services import update_order_status
 from community.models import Question
 from reports.models import Report
 from notifications.utils import create_notification
+from . import metrics
+from .listing import paginate
 
 
 @staff_required
 def overview(request):
-    total_users = User.objects.count()
-    total_products = Product.objects.filter(is_active=True).count()
-    total_orders = Order.objects.count()
-    total_revenue = Order.objects.aggregate(t=Sum('total_amount'))['t'] or 0
-    pending_reports = Report.objects.filter(status='pending').count()
+    snapshot = metrics.latest()
     recent_orders = Order.objects.select_related('buyer').order_by('-created_at')[:8]
-    top_sellers = (
-        OrderItem.objects
-        .values('seller__username')
-        .annotate(revenue=Sum('unit_price'), orders=Count('order', distinct=True))
-        .order_by('-revenue')[:5]
-    )
     return render(request, 'dashboard/overview.html', {
-        'total_users': total_users,
-        'total_products': total_products,
-        'total_orders': total_orders,
-        'total_revenue': total_revenue,
-        'pending_reports': pending_reports,
+        'total_users': snapshot.total_users,
+        'total_products': snapshot.total_products,
+        'total_orders': snapshot.total_orders,
+        'total_revenue': snapshot.total_revenue,
+        'pending_reports': snapshot.pending_reports,
         'recent_orders': recent_orders,
-        'top_sellers': top_sellers,
+        'top_sellers': snapshot.top_sellers,
+        'computed_at': snapshot.computed_at,
+        'is_stale': metrics.is_stale(snapshot),
     })
 
 
+@staff_required
+@require_POST
+def refresh_metrics(request):
+    metrics.refresh()
+    messages.success(request, "Dashboard metrics refreshed.")
+    return redirect('admin_dashboard')
+
+
+@staff_required
+def outbound_status(request):
+    """Circuit breaker state and call counters of the worker process that served this request."""
+    return JsonResponse({'pid': os.getpid(), 'dependencies': outbound.stats()})
+
+
 @staff_required
 def manage_users(request):
-    users = User.objects.select_related('profile').order_by('-date_joined')
-    return render(request, 'dashboard/users.html', {'users': users})
+    q = request.GET.get('q', '').strip()
+    role = request.GET.get('role', '')
+    state = request.GET.get('state', '')
+
+    users = User.objects.select_related('profile')
+    if q:
+        users = users.filter(Q(username__icontains=q) | Q(email__icontains=q))
+    if role in dict(ROLE_CHOICES):
+        users = users.filter(profile__role=role)
+    if state in ('active', 'banned'):
+        users = users.filter(is_active=(state == 'active'))
+
+    listing = paginate(request, users, ('-date_joined', '-id'), {'q': q, 'role': role, 'state': state})
+    return render(request, 'dashboard/users.html', {
+        'users': listing['page'],
+        'role_choices': ROLE_CHOICES,
+        **listing,
+    })
 
 
 @staff_required
@@ -59,8 +89,17 @@ def toggle_user_active(request, user_id):
 
 @staff_required
 def manage_shop(request):
-    products = Product.objects.select_related('seller').order_by('-created_at')
-    return render(request, 'dashboard/shop.html', {'products': products})
+    q = request.GET.get('q', '').strip()
+    state = request.GET.get('state', '')
+
+    products = Product.objects.select_related('seller')
+    if q:
+        products = products.filter(Q(name__icontains=q) | Q(seller__username__icontains=q))
+    if state in ('active', 'hidden'):
+        products = products.filter(is_active=(state == 'active'))
+
+    listing = paginate(request, products, ('-created_at', '-id'), {'q': q, 'state': state})
+    return render(request, 'dashboard/shop.html', {'products': listing['page'], **listing})
 
 
 @staff_required
@@ -75,8 +114,36 @@ def admin_delete_product(request, pk):
 
 @staff_required
 def manage_orders(request):
-    orders = Order.objects.select_related('buyer').prefetch_related('items').order_by('-created_at')
-    return render(request, 'dashboard/orders.html', {'orders': orders})
+    q = request.GET.get('q', '').strip()
+    status = request.GET.get('status', '')
+
+    orders = Order.objects.select_related('buyer').annotate(item_count=Count('items'))
+    if q:
+        orders = orders.filter(Q(order_number__icontains=q) | Q(buyer__username__icontains=q))
+    if status in dict(ORDER_STATUS_CHOICES):
+        orders = orders.filter(status=status)
+
+    listing = paginate(request, orders, ('-created_at', '-id'), {'q': q, 'status': status})
+    return render(request, 'dashboard/orders.html', {
+        'orders': listing['page'],
+        'status_choices': ORDER_STATUS_CHOICES,
+        **listing,
+    })
+
+
+@staff_required
+def export_orders(request):
+    fmt = request.GET.get('format', 'csv')
+    status = request.GET.get('status') or None
+    if fmt not in EXPORT_FORMATS or (status and status not in dict(ORDER_STATUS_CHOICES)):
+        messages.error(request, "Invalid export options.")
+        return redirect('admin_orders')
+    try:
+        start, end = parse_date_range(request.GET)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('admin_orders')
+    return stream_export(all_orders(start, end, status), ORDER_COLUMNS, fmt, 'orders')
 
 
 @staff_required
@@ -84,19 +151,29 @@ def manage_orders(request):
 def admin_update_order(request, order_id):
     order = get_object_or_404(Order, pk=order_id)
     new_status = request.POST.get('status')
-    valid_statuses = ['pending','confirmed','packed','shipped','delivered','cancelled','refunded']
-    if new_status in valid_statuses:
-        order.status = new_status
-        order.save()
+    ok, error = update_order_status(order, new_status, request.user)
+    if ok:
         messages.success(request, f"Order {order.order_number} updated to {new_status}.")
+    else:
+        messages.error(request, error)
     return redirect('admin_orders')
 
 
 @staff_required
 def manage_community(request):
-    from community.models import Question
-    questions = Question.objects.select_related('author').order_by('-created_at')
-    return render(request, 'dashboard/community.html', {'questions': questions})
+    q = request.GET.get('q', '').strip()
+    state = request.GET.get('state', '')
+
+    questions = Question.objects.select_related('author').annotate(
+        active_answers=Count('answers', filter=Q(answers__is_active=True)),
+    )
+    if q:
+        questions = questions.filter(Q(title__icontains=q) | Q(author__username__icontains=q))
+    if state in ('active', 'removed'):
+        questions = questions.filter(is_active=(state == 'active'))
+
+    listing = paginate(request, questions, ('-created_at', '-id'), {'q': q, 'state': state})
+    return render(request, 'dashboard/community.html', {'questions': listing['page'], **listing})
 
 
 @staff_required
@@ -0,0 +1,26 @@
+"""
+ASGI entry point, for the long-lived endpoints.
+
+Chat long polls (chat.views.fetch_messages) and the notification stream
+(notifications.views.notification_stream) spend nearly all their time
+waiting. Under WSGI each of them holds a worker thread for the whole wait;
+served from here they are coroutines parked on ecommerce/pubsub.py, so one
+process holds thousands of them. Run with e.g.::
+
+    uvicorn ecommerce.asgi:application --workers 4
+
+or ``gunicorn ecommerce.asgi:application -k uvicorn.workers.UvicornWorker``.
+The rest of the site's views are sync and run in Django's thread pool as
+usual.
+
+Django still runs the (sync) middleware of each request in a helper thread
+that lives until the response is done, so a waiting request is not free:
+about 0.3 MB and one idle thread. But no pool caps how many can wait, and
+they don't queue ordinary requests behind them the way a gunicorn worker's
+threads do. ``manage.py bench_idle_connections`` compares the two entry
+points.
+"""
+import os
+from django.core.asgi import get_asgi_application
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce.settings')
+application = get_asgi_application()
@@ -0,0 +1,191 @@
+"""
+Calls to third-party services (Stripe, Firebase, SMTP).
+
+Every dependency named in settings.OUTBOUND_CALLS gets, per process:
+
+* timeouts (``connect_timeout``/``read_timeout`` seconds), applied by the
+  HTTP session or client configured for it;
+* a bulkhead: at most ``max_concurrent`` calls in flight. A caller waits up
+  to ``queue_seconds`` for a slot, then gets ``Saturated``, so a slow
+  provider can hold a few worker threads but not all of them;
+* a circuit breaker: after ``failure_threshold`` consecutive failures, calls
+  fail fast with ``CircuitOpen`` for ``reset_seconds``. After that, one
+  trial call is let through; success closes the breaker, failure re-opens it;
+* counters and latency totals, from ``stats()``.
+
+Use ``call('stripe', func, *args)`` or ``with guard('stripe'): ...``.
+Exceptions listed in ``ignore`` (e.g. a declined card) are the caller's
+problem, not the provider's, and don't count against the breaker.
+``session(name)`` is a pooled ``requests.Session`` for the dependency.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'connect_timeout': 3.05,
+    'read_timeout': 10,
+    'max_concurrent': 8,
+    'queue_seconds': 0.5,
+    'failure_threshold': 5,
+    'reset_seconds': 30,
+}
+
+
+class Unavailable(Exception):
+    """The dependency was not called."""
+
+
+class CircuitOpen(Unavailable):
+    pass
+
+
+class Saturated(Unavailable):
+    pass
+
+
+def config(name):
+    return {**DEFAULTS, **getattr(settings, 'OUTBOUND_CALLS', {}).get(name, {})}
+
+
+def timeout(name):
+    """``(connect, read)`` seconds, as ``requests`` takes them."""
+    conf = config(name)
+    return conf['connect_timeout'], conf['read_timeout']
+
+
+class Dependency:
+    def __init__(self, name):
+        self.name = name
+        self.conf = config(name)
+        self.slots = threading.BoundedSemaphore(self.conf['max_concurrent'])
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_running = False
+        self.counts = {'calls': 0, 'ok': 0, 'failed': 0, 'ignored': 0, 'rejected_open': 0, 'rejected_full': 0}
+        self.seconds = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _admit(self):
+        with self.lock:
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.conf['reset_seconds'] or self.trial_running:
+                    self.counts['rejected_open'] += 1
+                    raise CircuitOpen(f"{self.name} is unavailable (circuit open)")
+                self.state = 'half-open'
+            if self.state == 'half-open':
+                if self.trial_running:
+                    self.counts['rejected_open'] += 1
+                    raise CircuitOpen(f"{self.name} is unavailable (circuit half-open)")
+                self.trial_running = True
+
+        if not self.slots.acquire(timeout=self.conf['queue_seconds']):
+            with self.lock:
+                self.trial_running = False
+                self.counts['rejected_full'] += 1
+            raise Saturated(f"{self.name} is busy ({self.conf['max_concurrent']} calls in flight)")
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _finish(self, started, failed):
+        self.slots.release()
+        with self.lock:
+            self.in_flight -= 1
+            self.trial_running = False
+            self.counts['calls'] += 1
+            self.seconds += time.monotonic() - started
+            if not failed:
+                if self.state != 'closed':
+                    logger.warning(f"Circuit for {self.name} closed")
+                self.state, self.failures = 'closed', 0
+                return
+            self.failures += 1
+            if self.state == 'half-open' or self.failures >= self.conf['failure_threshold']:
+                if self.state != 'open':
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failure(s)")
+                self.state, self.opened_at = 'open', time.monotonic()
+
+    def stats(self):
+        with self.lock:
+            calls = self.counts['calls']
+            return {
+                **self.counts,
+                'state': self.state,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'avg_ms': round(self.seconds / calls * 1000, 1) if calls else None,
+            }
+
+
+_dependencies = {}
+_sessions = {}
+_registry_lock = threading.Lock()
+
+
+def dependency(name):
+    with _registry_lock:
+        if name not in _dependencies:
+            _dependencies[name] = Dependency(name)
+        return _dependencies[name]
+
+
+@contextmanager
+def guard(name, ignore=()):
+    dep = dependency(name)
+    dep._admit()
+    started = time.monotonic()
+    outcome = 'ok'
+    try:
+        yield
+    except ignore:
+        outcome = 'ignored'
+        raise
+    except Exception:
+        outcome = 'failed'
+        raise
+    finally:
+        with dep.lock:
+            dep.counts[outcome] += 1
+        dep._finish(started, failed=outcome == 'failed')
+
+
+def call(name, func, *args, ignore=(), **kwargs):
+    with guard(name, ignore=ignore):
+        return func(*args, **kwargs)
+
+
+def session(name):
+    """A ``requests.Session`` for ``name`` with a connection pool sized to its bulkhead."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _registry_lock:
+        if name not in _sessions:
+            size = config(name)['max_concurrent']
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=0)
+            s.mount('https://', adapter)
+            s.mount('http://', adapter)
+            _sessions[name] = s
+        return _sessions[name]
+
+
+def stats():
+    with _registry_lock:
+        deps = list(_dependencies.values())
+    return {dep.name: dep.stats() for dep in deps}
+
+
+def reset():
+    """Forgets all breaker state and counters (tests, benchmarks)."""
+    with _registry_lock:
+        _dependencies.clear()
@@ -0,0 +1,170 @@
+"""
+Cross-process "something changed" signals for long-polling views.
+
+``publish('chat:42')`` after a change commits; a request that called
+``subscribe('chat:42')`` and is blocked in ``wait(timeout)`` wakes up. Only
+the channel name travels: waiters re-read whatever they need from the
+database, so a lost or duplicated signal costs at most one extra query.
+
+Within one process, waiters are threading Events kept by a hub. On
+PostgreSQL, ``publish`` also sends ``NOTIFY bizconnect_events, '<channel>'``
+and each process runs one listener thread on its own connection that
+relays notifications to its local waiters. However many requests are
+waiting, a process holds one LISTEN connection. Other databases (SQLite in
+tests and development) only get the in-process path.
+
+Subscribe *before* checking the database, then wait: a publish that lands
+in between still wakes the waiter.
+
+Async views (served by ecommerce/asgi.py) wait with ``await
+subscription.async_wait(timeout)``, which parks the coroutine on an
+asyncio Event instead of holding a thread.
+"""
+import asyncio
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'bizconnect_events'
+LISTENER_RETRY_SECONDS = 5
+
+
+class Subscription:
+    def __init__(self, hub, channels):
+        self.hub = hub
+        self.channels = channels
+        self.event = threading.Event()
+        # Subscribed from a coroutine: publishes also wake it on its own loop.
+        try:
+            self.loop = asyncio.get_running_loop()
+            self.async_event = asyncio.Event()
+        except RuntimeError:
+            self.loop = self.async_event = None
+
+    def set(self):
+        self.event.set()
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.async_event.set)
+
+    def wait(self, timeout):
+        """
+        True if one of the channels was published to, False on timeout.
+        Re-arms the subscription, so it can be waited on again (a publish
+        that lands after this returns wakes the next wait).
+        """
+        fired = self.event.wait(timeout)
+        self.event.clear()
+        return fired
+
+    async def async_wait(self, timeout):
+        """``wait`` for subscriptions made from a coroutine."""
+        try:
+            await asyncio.wait_for(self.async_event.wait(), timeout)
+            fired = True
+        except TimeoutError:
+            fired = self.event.is_set()
+        self.async_event.clear()
+        self.event.clear()
+        return fired
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiters = defaultdict(set)
+        self.listener = None
+
+    def subscribe(self, channels):
+        sub = Subscription(self, tuple(channels))
+        with self.lock:
+            for channel in sub.channels:
+                self.waiters[channel].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            for channel in sub.channels:
+                self.waiters[channel].discard(sub)
+                if not self.waiters[channel]:
+                    del self.waiters[channel]
+
+    def dispatch(self, channel):
+        with self.lock:
+            subs = list(self.waiters.get(channel, ()))
+        for sub in subs:
+            sub.set()
+
+    def ensure_listener(self):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(target=self._listen, name='pubsub-listener', daemon=True)
+                self.listener.start()
+
+    def _listen(self):
+        # A private connection, not the request thread's: it stays in LISTEN
+        # for the life of the process.
+        while True:
+            conn = connections.create_connection('default')
+            try:
+                conn.ensure_connection()
+                raw = conn.connection
+                if not hasattr(raw, 'poll'):  # psycopg 3: fall back to in-process only
+                    logger.warning("pubsub: LISTEN needs psycopg2; cross-process wakeups disabled")
+                    return
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                while True:
+                    if select.select([raw], [], [], 60) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        self.dispatch(raw.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning(f"pubsub listener lost its connection ({e}); retrying in {LISTENER_RETRY_SECONDS}s")
+            finally:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            time.sleep(LISTENER_RETRY_SECONDS)
+
+
+hub = Hub()
+
+
+def subscribe(*channels):
+    if connection.vendor == 'postgresql':
+        hub.ensure_listener()
+    return hub.subscribe(channels)
+
+
+def publish(channel):
+    """Signals ``channel`` once the current transaction (if any) commits."""
+    def send():
+        hub.dispatch(channel)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, channel])
+
+    transaction.on_commit(send)
+
+
+def release_connection():
+    """
+    Closes the thread's database connection before a long wait so idle
+    waiters don't pin connections; Django reopens it on the next query.
+    """
+    if not connection.in_atomic_block:
+        connection.close()
@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'accounts',
     'shop',
@@ -36,6 +37,7 @@ INSTALLED_APPS = [
     'community',
     'dashboard',
     'reports',
+    'jobs',
 ]
 
 
@@ -72,6 +74,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'dashboard.context_processors.admin_context',
+                'notifications.context_processors.notification_stream',
             ],
         },
     },
@@ -96,6 +99,19 @@ DATABASES = {
 }
 
 
+# =========================
+# CACHE
+# =========================
+# Flash-sale admission queues live here; point this at a shared cache
+# (memcached / redis) when running more than one worker.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+
 # =========================
 # INTERNATIONAL
 # =========================
@@ -145,12 +161,23 @@ FIREBASE_CREDENTIALS_PATH = os.environ.get(
 # EMAIL
 # =========================
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+# Socket timeout for SMTP connections (Django's default is none at all).
+EMAIL_TIMEOUT = float(os.environ.get('EMAIL_TIMEOUT', '15'))
+
+# Transactional mail goes through the outbox (notifications/email_outbox.py)
+# and is sent in batches over one SMTP connection. Status updates for the
+# same order within EMAIL_COALESCE_SECONDS become one email. The rate caps
+# keep us under the provider's sending limits (Gmail: ~2000/day).
+EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', '50'))
+EMAIL_COALESCE_SECONDS = int(os.environ.get('EMAIL_COALESCE_SECONDS', '120'))
+EMAIL_MAX_PER_SECOND = float(os.environ.get('EMAIL_MAX_PER_SECOND', '5'))
+EMAIL_MAX_PER_HOUR = int(os.environ.get('EMAIL_MAX_PER_HOUR', '80'))
 
 
 # =========================
@@ -172,9 +199,92 @@ SUPABASE_BUCKET = os.environ.get('SUPABASE_BUCKET', 'media')
 # =========================
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
 STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY', '')
+# Signing secret of the webhook endpoint (/shop/stripe/webhook/) in the Stripe dashboard.
+STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
+# Point the Stripe client elsewhere, e.g. at manage.py stripe_stub (http://127.0.0.1:12111).
+STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE', '')
 SITE_URL = os.environ.get('SITE_URL', 'http://127.0.0.1:8000')
 
 
+# =========================
+# STOCK RESERVATIONS
+# =========================
+# Unpaid orders give their reserved stock back after this many minutes.
+STOCK_HOLD_MINUTES = int(os.environ.get('STOCK_HOLD_MINUTES', '30'))
+
+
+# =========================
+# ADMIN METRICS
+# =========================
+# The admin overview reads a stored snapshot (dashboard/metrics.py). Run
+# `manage.py refresh_metrics` from cron at about this interval; the page
+# flags snapshots older than this as stale.
+METRICS_MAX_AGE_SECONDS = int(os.environ.get('METRICS_MAX_AGE_SECONDS', '300'))
+METRICS_HISTORY_DAYS = int(os.environ.get('METRICS_HISTORY_DAYS', '90'))
+
+
+# =========================
+# BACKGROUND JOBS
+# =========================
+# Slow side work (emails, PDFs) is queued in the database and run by
+# `manage.py run_jobs`. JOBS_EAGER runs each job in-process right after the
+# enqueueing transaction commits instead, for development without a worker.
+JOBS_EAGER = os.environ.get('JOBS_EAGER', 'False') == 'True'
+JOBS_CONCURRENCY = int(os.environ.get('JOBS_CONCURRENCY', '2'))
+JOBS_POLL_SECONDS = float(os.environ.get('JOBS_POLL_SECONDS', '2'))
+# A running job whose worker hasn't finished it after this long is retried.
+JOBS_LOCK_TIMEOUT_SECONDS = int(os.environ.get('JOBS_LOCK_TIMEOUT_SECONDS', '600'))
+JOBS_RETRY_BASE_SECONDS = int(os.environ.get('JOBS_RETRY_BASE_SECONDS', '30'))
+
+
+# =========================
+# CHAT
+# =========================
+# fetch_messages may hold a request this long waiting for a new message
+# (long polling, see ecommerce/pubsub.py). Each waiting request occupies a
+# worker thread, so run gunicorn with threaded workers (--threads).
+CHAT_LONG_POLL_SECONDS = float(os.environ.get('CHAT_LONG_POLL_SECONDS', '25'))
+
+
+# =========================
+# NOTIFICATION STREAM
+# =========================
+# How long one Server-Sent Events connection stays open before the browser
+# reconnects (resuming from Last-Event-ID). Like chat long polls, an open
+# stream occupies a worker thread under WSGI but not under ASGI.
+NOTIFICATIONS_STREAM_SECONDS = float(os.environ.get('NOTIFICATIONS_STREAM_SECONDS', '300'))
+# Whether pages open the stream at all. By default only pages served over
+# ASGI do; under WSGI they poll the unread count instead. Set to True/False
+# when the stream is routed to a different server than the pages.
+NOTIFICATIONS_STREAM = {'True': True, 'False': False}.get(os.environ.get('NOTIFICATIONS_STREAM', ''))
+
+
+# =========================
+# OUTBOUND CALLS
+# =========================
+# Limits for calls to third parties (ecommerce/outbound.py), per worker
+# process: timeouts in seconds, at most max_concurrent calls in flight
+# (callers wait queue_seconds for a slot, then fail fast), and a circuit
+# breaker that rejects calls for reset_seconds after failure_threshold
+# consecutive failures. Unset keys use the defaults in outbound.py.
+OUTBOUND_CALLS = {
+    'stripe': {
+        'connect_timeout': float(os.environ.get('STRIPE_CONNECT_TIMEOUT', '3.05')),
+        'read_timeout': float(os.environ.get('STRIPE_READ_TIMEOUT', '10')),
+        'max_concurrent': int(os.environ.get('STRIPE_MAX_CONCURRENT', '4')),
+    },
+    'firebase': {
+        'read_timeout': float(os.environ.get('FIREBASE_TIMEOUT', '5')),
+        'max_concurrent': int(os.environ.get('FIREBASE_MAX_CONCURRENT', '8')),
+    },
+    'smtp': {
+        'read_timeout': EMAIL_TIMEOUT,
+        'max_concurrent': int(os.environ.get('EMAIL_MAX_CONCURRENT', '2')),
+        'queue_seconds': 5,
+    },
+}
+
+
 # =========================
 # PAYMENT INFO
 # =========================
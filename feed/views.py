@@ -1,6 +1,7 @@
 import json
+from django.db.models import Count
 from django.http import JsonResponse
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 
@@ -49,8 +50,9 @@ def create_post(request):
 
 @login_required_custom
 @require_POST
-def react_post(request, pk):
-    post = get_object_or_404(Post, pk=pk, is_active=True)
+async def react_post(request, pk):
+    post = await aget_object_or_404(Post, pk=pk, is_active=True)
+    user = await request.auser()
 
     try:
         data = json.loads(request.body)
@@ -62,21 +64,22 @@ def react_post(request, pk):
     if rtype not in valid:
         return JsonResponse({'error': 'Invalid reaction'}, status=400)
 
-    existing = PostReaction.objects.filter(post=post, user=request.user).first()
+    existing = await PostReaction.objects.filter(post=post, user=user).afirst()
 
     if existing:
         if existing.reaction_type == rtype:
-            existing.delete()
+            await existing.adelete()
             action = 'removed'
         else:
             existing.reaction_type = rtype
-            existing.save(update_fields=['reaction_type'])
+            await existing.asave(update_fields=['reaction_type'])
             action = 'updated'
     else:
-        PostReaction.objects.create(post=post, user=request.user, reaction_type=rtype)
+        await PostReaction.objects.acreate(post=post, user=user, reaction_type=rtype)
         action = 'added'
 
-    counts = {r['reaction_type']: r['count'] for r in post.reaction_summary}
+    summary = PostReaction.objects.filter(post=post).values('reaction_type').annotate(count=Count('id'))
+    counts = {r['reaction_type']: r['count'] async for r in summary}
     return JsonResponse({'action': action, 'counts': counts})
 
 
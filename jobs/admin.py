@@ -0,0 +1,18 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'created_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['attempts', 'locked_at', 'locked_by', 'last_error', 'created_at', 'finished_at']
+    actions = ['retry_now']
+
+    @admin.action(description='Retry selected jobs now')
+    def retry_now(self, request, queryset):
+        queryset.exclude(status='running').update(
+            status='queued', run_at=timezone.now(), attempts=0, locked_at=None, finished_at=None,
+        )
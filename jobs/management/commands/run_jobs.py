@@ -0,0 +1,67 @@
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, connections
+
+from jobs.queue import claim, execute, wait
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background jobs. Start one or more of these next to the "
+        "web workers; each runs --concurrency threads with their own database "
+        "connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.JOBS_CONCURRENCY)
+        parser.add_argument('--poll', type=float, default=settings.JOBS_POLL_SECONDS,
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no job is due instead of waiting for more.')
+
+    def handle(self, *args, **opts):
+        self.stopping = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self.stopping.set())
+
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        done = [0]
+        lock = threading.Lock()
+
+        def work(n):
+            worker = f'{name}:{n}'
+            try:
+                while not self.stopping.is_set():
+                    try:
+                        claimed = claim(worker)
+                        if claimed is None:
+                            if opts['once']:
+                                return
+                            wait(opts['poll'])
+                            continue
+                        execute(claimed)
+                    except DatabaseError as e:
+                        # Lost connection, failover, lock timeout: back off and reconnect.
+                        self.stderr.write(f"{worker}: {e}")
+                        connection.close()
+                        self.stopping.wait(opts['poll'])
+                        continue
+                    with lock:
+                        done[0] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work, args=(n,), daemon=True) for n in range(max(opts['concurrency'], 1))]
+        self.stdout.write(f"Running jobs with {len(threads)} thread(s). Ctrl+C to stop.")
+        for t in threads:
+            t.start()
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.5)
+
+        self.stdout.write(self.style.SUCCESS(f"Stopped after {done[0]} job(s)."))
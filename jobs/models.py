@@ -0,0 +1,36 @@
+from django.db import models
+
+JOB_STATUS_CHOICES = [
+    ('queued',  'Queued'),
+    ('running', 'Running'),
+    ('done',    'Done'),
+    ('dead',    'Dead'),
+]
+
+
+class Job(models.Model):
+    """
+    A unit of background work, run by ``manage.py run_jobs``. See
+    jobs/queue.py. Failed jobs go back to ``queued`` with a later ``run_at``
+    until ``max_attempts`` is reached, then stay ``dead`` for inspection.
+    """
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=JOB_STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField()
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim with: WHERE status = 'queued' AND run_at <= now ORDER BY run_at
+            models.Index(fields=['status', 'run_at'], name='jobs_job_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,181 @@
+"""
+Database-backed job queue.
+
+Handlers are plain functions registered with ``@job('app.name')`` in an
+app's tasks.py and called with the job's payload as keyword arguments.
+
+``enqueue`` inserts the Job row in the caller's transaction, so a job exists
+exactly when the change that caused it committed; workers can't see it
+before then. When the transaction commits, ``on_commit`` wakes idle workers
+(PostgreSQL NOTIFY) or, with JOBS_EAGER, runs the job in-process.
+
+Workers (``manage.py run_jobs``) claim one job at a time with
+``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of them can share the
+table without blocking each other. The claim is committed before the
+handler runs; a worker that dies mid-job leaves it ``running`` until
+JOBS_LOCK_TIMEOUT_SECONDS passes and another worker takes it over.
+Failures are retried with exponential backoff and jitter; after
+``max_attempts`` the job is marked ``dead`` and left for inspection
+(retry it from the Django admin).
+"""
+import logging
+import random
+import select
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'bizconnect_jobs'
+MAX_BACKOFF_SECONDS = 6 * 3600
+
+_registry = {}
+_listening = threading.local()
+
+
+class UnknownJob(Exception):
+    pass
+
+
+def job(name, max_attempts=5):
+    """Registers the decorated function as the handler for ``name``."""
+    def register(func):
+        _registry[name] = (func, max_attempts)
+        return func
+    return register
+
+
+def enqueue(name, delay=0, **payload):
+    """
+    Queues ``name`` to run with ``payload`` (JSON-serialisable keyword
+    arguments) once the current transaction commits.
+    """
+    from .models import Job
+
+    if name not in _registry:
+        raise UnknownJob(name)
+    _, max_attempts = _registry[name]
+
+    queued = Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if settings.JOBS_EAGER and not delay:
+        transaction.on_commit(lambda: run_job(queued.pk, worker='eager'))
+    elif connection.vendor == 'postgresql':
+        transaction.on_commit(_notify)
+    return queued
+
+
+def _notify():
+    with connection.cursor() as cursor:
+        cursor.execute(f"NOTIFY {NOTIFY_CHANNEL}")
+
+
+# ── worker side ──────────────────────────────────────────────────────────
+
+def backoff(attempts):
+    """Seconds to wait before retry number ``attempts`` (1-based), with jitter."""
+    delay = min(settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim(worker, now=None):
+    """
+    Locks the next due job (or one abandoned by a dead worker), marks it
+    running and returns it, or None when nothing is due.
+    """
+    from .models import Job
+
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT_SECONDS)
+    with transaction.atomic():
+        queued = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='queued', run_at__lte=now) | Q(status='running', locked_at__lt=stale))
+            .order_by('run_at')
+            .first()
+        )
+        if queued is None:
+            return None
+        Job.objects.filter(pk=queued.pk).update(
+            status='running', locked_at=now, locked_by=worker, attempts=F('attempts') + 1,
+        )
+    queued.refresh_from_db()
+    return queued
+
+
+def execute(claimed):
+    """Runs a claimed job's handler and records the outcome."""
+    from .models import Job
+
+    try:
+        func, _ = _registry[claimed.name]
+    except KeyError:
+        func = None
+
+    try:
+        if func is None:
+            raise UnknownJob(claimed.name)
+        func(**claimed.payload)
+    except Exception as e:
+        error = ''.join(traceback.format_exception(e))[-4000:]
+        if claimed.attempts >= claimed.max_attempts or func is None:
+            Job.objects.filter(pk=claimed.pk).update(
+                status='dead', last_error=error, finished_at=timezone.now(), locked_at=None,
+            )
+            logger.error(f"Job {claimed} is dead after {claimed.attempts} attempt(s): {e}")
+        else:
+            retry_at = timezone.now() + timedelta(seconds=backoff(claimed.attempts))
+            Job.objects.filter(pk=claimed.pk).update(
+                status='queued', last_error=error, run_at=retry_at, locked_at=None,
+            )
+            logger.warning(f"Job {claimed} failed (attempt {claimed.attempts}), retrying at {retry_at}: {e}")
+        return False
+
+    Job.objects.filter(pk=claimed.pk).update(status='done', finished_at=timezone.now(), locked_at=None)
+    return True
+
+
+def run_job(job_id, worker):
+    """Claims and runs one specific job now (used by JOBS_EAGER)."""
+    from .models import Job
+
+    with transaction.atomic():
+        claimed = Job.objects.select_for_update(skip_locked=True).filter(pk=job_id, status='queued').first()
+        if claimed is None:
+            return
+        Job.objects.filter(pk=job_id).update(
+            status='running', locked_at=timezone.now(), locked_by=worker, attempts=F('attempts') + 1,
+        )
+    claimed.refresh_from_db()
+    execute(claimed)
+
+
+def wait(timeout):
+    """
+    Sleeps up to ``timeout`` seconds. On PostgreSQL the thread's connection
+    LISTENs for enqueue notifications and returns as soon as one arrives.
+    """
+    if connection.vendor == 'postgresql':
+        connection.ensure_connection()
+        raw = connection.connection
+        if hasattr(raw, 'poll'):  # psycopg2
+            if getattr(_listening, 'conn', None) is not raw:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                _listening.conn = raw
+            if select.select([raw], [], [], timeout) != ([], [], []):
+                raw.poll()
+                raw.notifies.clear()
+            return
+    time.sleep(timeout)
@@ -0,0 +1,10 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+
+def notification_stream(request):
+    """``use_notification_stream``: open the SSE stream, or poll (see settings)."""
+    use_stream = getattr(settings, 'NOTIFICATIONS_STREAM', None)
+    if use_stream is None:
+        use_stream = isinstance(request, ASGIRequest)
+    return {'use_notification_stream': use_stream}
@@ -0,0 +1,213 @@
+"""
+Transactional email outbox.
+
+Code that wants to email someone calls ``queue_email``, which only inserts
+an OutboundEmail row. ``flush`` (run by the ``notifications.flush_outbox``
+job or ``manage.py flush_email_outbox``) sends whatever is due in batches,
+each batch over one SMTP connection instead of one TLS handshake per
+message.
+
+Coalescing: emails queued with the same ``coalesce_key`` while an earlier
+one is still pending replace its content instead of adding a second
+email. The first one fixes the send time (now + window), so a burst of
+status changes to one order produces a single email with the latest state,
+sent at most ``window`` seconds after the first change.
+
+Throttling: at most EMAIL_MAX_PER_HOUR emails are sent per rolling hour
+across all workers (counted from the table; 0 disables the cap), and a
+flushing worker paces itself to EMAIL_MAX_PER_SECOND. Whatever is over the
+limit stays pending for the next flush. Failed sends are retried with
+backoff; after MAX_ATTEMPTS the row is left ``failed``.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ecommerce import outbound
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def queue_email(to, subject, body, html_body='', attachment=None, coalesce_key='', window=0):
+    """
+    Adds an email to the outbox. ``attachment`` is ``(filename, bytes,
+    mimetype)``. With a ``coalesce_key``, a pending email with the same key
+    is updated in place. Returns the OutboundEmail row.
+    """
+    from .models import OutboundEmail
+
+    fields = {
+        'to': to,
+        'subject': subject,
+        'body': body,
+        'html_body': html_body or '',
+    }
+    if attachment:
+        fields['attachment_name'], fields['attachment'], fields['attachment_type'] = attachment
+
+    now = timezone.now()
+    with transaction.atomic():
+        if coalesce_key:
+            pending = (
+                OutboundEmail.objects.select_for_update()
+                .filter(coalesce_key=coalesce_key, status='pending', attempts=0)
+                .first()
+            )
+            if pending is not None:
+                OutboundEmail.objects.filter(pk=pending.pk).update(**fields)
+                return pending
+
+        email = OutboundEmail.objects.create(
+            coalesce_key=coalesce_key, send_after=now + timedelta(seconds=window), **fields,
+        )
+        wake(email.send_after)
+    return email
+
+
+def wake(at):
+    """Makes sure a flush job runs by ``at``, unless one is already queued in time."""
+    from jobs.models import Job
+    from jobs.queue import enqueue
+
+    if not Job.objects.filter(name='notifications.flush_outbox', status='queued', run_at__lte=at).exists():
+        enqueue('notifications.flush_outbox', delay=max((at - timezone.now()).total_seconds(), 0))
+
+
+def _claim(limit, now):
+    from .models import OutboundEmail
+
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status='pending', send_after__lte=now)
+                | Q(status='sending', claimed_at__lt=now - CLAIM_TIMEOUT)
+            )
+            .order_by('send_after')
+            .values_list('pk', flat=True)[:limit]
+        )
+        OutboundEmail.objects.filter(pk__in=ids).update(
+            status='sending', claimed_at=now, attempts=F('attempts') + 1,
+        )
+    return list(OutboundEmail.objects.filter(pk__in=ids).order_by('send_after'))
+
+
+def _allowance(now):
+    """How many more emails the hourly cap allows right now (None = no cap)."""
+    from .models import OutboundEmail
+
+    cap = settings.EMAIL_MAX_PER_HOUR
+    if not cap:
+        return None
+    sent = OutboundEmail.objects.filter(status='sent', sent_at__gte=now - timedelta(hours=1)).count()
+    return max(cap - sent, 0)
+
+
+def _message(email, connection):
+    msg = EmailMultiAlternatives(
+        email.subject, email.body, settings.DEFAULT_FROM_EMAIL, [email.to], connection=connection,
+    )
+    if email.html_body:
+        msg.attach_alternative(email.html_body, 'text/html')
+    if email.attachment is not None:
+        msg.attach(email.attachment_name, bytes(email.attachment), email.attachment_type)
+    return msg
+
+
+def _release(emails):
+    """Hands claimed emails back untouched; the send wasn't attempted."""
+    from .models import OutboundEmail
+
+    OutboundEmail.objects.filter(pk__in=[e.pk for e in emails]).update(
+        status='pending', claimed_at=None, attempts=F('attempts') - 1,
+    )
+
+
+def send_batch(emails, connection=None):
+    """
+    Sends ``emails`` over one SMTP connection, recording each outcome.
+    Returns the number sent. SMTP calls go through the ``smtp`` circuit
+    breaker (ecommerce/outbound.py); while it is open the batch is handed
+    back for a later flush.
+    """
+    from .models import OutboundEmail
+
+    pace = 1 / settings.EMAIL_MAX_PER_SECOND if settings.EMAIL_MAX_PER_SECOND > 0 else 0
+    connection = connection or get_connection()
+    try:
+        outbound.call('smtp', connection.open)
+    except Exception:
+        # SMTP unreachable: hand the batch back and let the job retry.
+        _release(emails)
+        raise
+
+    sent = 0
+    retry_at = None
+    try:
+        last = 0
+        for n, email in enumerate(emails):
+            wait = last + pace - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            last = time.monotonic()
+            try:
+                outbound.call('smtp', _message(email, connection).send)
+            except outbound.Unavailable:
+                _release(emails[n:])
+                retry_at = timezone.now() + timedelta(seconds=outbound.config('smtp')['reset_seconds'])
+                break
+            except Exception as e:
+                given_up = email.attempts >= MAX_ATTEMPTS
+                again_at = timezone.now() + timedelta(seconds=60 * 2 ** (email.attempts - 1))
+                OutboundEmail.objects.filter(pk=email.pk).update(
+                    status='failed' if given_up else 'pending',
+                    send_after=again_at, last_error=str(e)[:2000], claimed_at=None,
+                )
+                if not given_up:
+                    retry_at = min(retry_at or again_at, again_at)
+                logger.warning(f"Email {email.pk} to {email.to} failed (attempt {email.attempts}): {e}")
+                # A broken connection fails every later message too; reopen it.
+                connection.close()
+                try:
+                    outbound.call('smtp', connection.open)
+                except Exception:
+                    _release(emails[n + 1:])
+                    break
+                continue
+            OutboundEmail.objects.filter(pk=email.pk).update(
+                status='sent', sent_at=timezone.now(), claimed_at=None, attachment=None,
+            )
+            sent += 1
+    finally:
+        connection.close()
+        if retry_at:
+            wake(retry_at)
+    return sent
+
+
+def flush(batch_size=None, now=None):
+    """Sends every due email the rate cap allows. Returns the number sent."""
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    total = 0
+    while True:
+        now_ = now or timezone.now()
+        allowance = _allowance(now_)
+        limit = batch_size if allowance is None else min(batch_size, allowance)
+        if limit <= 0:
+            # Over the hourly cap: look again in a few minutes.
+            wake(now_ + timedelta(minutes=5))
+            return total
+        emails = _claim(limit, now_)
+        if not emails:
+            return total
+        total += send_batch(emails)
+
@@ -0,0 +1,66 @@
+import time
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from notifications.email_outbox import flush, queue_email
+from notifications.models import OutboundEmail
+from notifications.smtp_stub import SMTPStub
+
+
+class Command(BaseCommand):
+    help = (
+        "Email throughput benchmark against a local SMTP stub: one connection "
+        "per message (the old behaviour) versus the batched outbox. Outbox "
+        "rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200)
+        parser.add_argument('--latency-ms', type=float, default=20,
+                            help='Delay the stub adds to every SMTP reply, imitating a remote provider.')
+        parser.add_argument('--batch-size', type=int, default=50)
+
+    def handle(self, *args, **opts):
+        n = opts['messages']
+        stub = SMTPStub(port=0, latency=opts['latency_ms'] / 1000).start_in_thread()
+        smtp = {
+            'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+            'EMAIL_HOST': stub.host, 'EMAIL_PORT': stub.port,
+            'EMAIL_USE_TLS': False, 'EMAIL_HOST_USER': '', 'EMAIL_HOST_PASSWORD': '',
+            'DEFAULT_FROM_EMAIL': 'bench@example.com',
+            'EMAIL_MAX_PER_SECOND': 0, 'EMAIL_MAX_PER_HOUR': 0,
+            'JOBS_EAGER': False,
+        }
+
+        with override_settings(**smtp):
+            started = time.perf_counter()
+            for i in range(n):
+                EmailMultiAlternatives(
+                    f'Bench {i}', 'body', 'bench@example.com', [f'buyer{i}@example.com'],
+                    connection=get_connection(),
+                ).send()
+            single = time.perf_counter() - started
+            single_conns = stub.connections
+
+            with transaction.atomic():
+                for i in range(n):
+                    queue_email(f'buyer{i}@example.com', f'Bench {i}', 'body')
+                for _ in range(5):
+                    queue_email('same@example.com', 'Status', 'body', coalesce_key='bench-order', window=0)
+                coalesced = OutboundEmail.objects.filter(coalesce_key='bench-order').count()
+
+                started = time.perf_counter()
+                sent = flush(batch_size=opts['batch_size'])
+                batched = time.perf_counter() - started
+                transaction.set_rollback(True)
+        stub.stop()
+
+        self.stdout.write(f"{'mode':<22} {'sent':>6} {'conns':>6} {'seconds':>8} {'msgs/s':>8}")
+        self.stdout.write(f"{'connection per email':<22} {n:>6} {single_conns:>6} {single:>8.2f} {n / single:>8.1f}")
+        self.stdout.write(f"{'outbox batches':<22} {sent:>6} {stub.connections - single_conns:>6} "
+                          f"{batched:>8.2f} {sent / batched:>8.1f}")
+        self.stdout.write(f"5 updates with one coalesce key -> {coalesced} queued email(s).")
+        self.stdout.write(self.style.SUCCESS(f"Batched throughput: {(sent / batched) / (n / single):.1f}x."))
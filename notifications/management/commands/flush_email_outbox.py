@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from notifications.email_outbox import flush
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends due emails from the outbox now. The job worker normally does "
+        "this; useful from cron as a safety net or when no worker is running."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **opts):
+        sent = flush(batch_size=opts['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s)."))
@@ -0,0 +1,31 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from notifications.smtp_stub import SMTPStub
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a local SMTP server that accepts and counts every message. Use "
+        "with EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=False."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--latency-ms', type=float, default=0,
+                            help='Delay added to every SMTP reply.')
+        parser.add_argument('--verbose-messages', action='store_true', help='Print each message.')
+
+    def handle(self, *args, **opts):
+        def show(stub, message):
+            self.stdout.write(f"#{stub.received} {message['from']} -> {', '.join(message['to'])}")
+
+        stub = SMTPStub(opts['host'], opts['port'], latency=opts['latency_ms'] / 1000,
+                        on_message=show if opts['verbose_messages'] else None)
+        self.stdout.write(f"SMTP stub listening on {opts['host']}:{opts['port']}. Ctrl+C to stop.")
+        try:
+            asyncio.run(stub.serve())
+        except KeyboardInterrupt:
+            self.stdout.write(f"Received {stub.received} message(s) over {stub.connections} connection(s).")
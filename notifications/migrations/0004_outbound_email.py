@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_notification_actor_alter_notification_message_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to', models.EmailField(max_length=254)),
+                ('subject', models.CharField(max_length=300)),
+                ('body', models.TextField()),
+                ('html_body', models.TextField(blank=True)),
+                ('attachment_name', models.CharField(blank=True, max_length=200)),
+                ('attachment_type', models.CharField(blank=True, max_length=100)),
+                ('attachment', models.BinaryField(blank=True, null=True)),
+                ('coalesce_key', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('send_after', models.DateTimeField()),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'send_after'], name='notif_outbox_due_idx'), models.Index(fields=['coalesce_key', 'status'], name='notif_outbox_coalesce_idx'), models.Index(fields=['status', 'sent_at'], name='notif_outbox_sent_idx')],
+            },
+        ),
+    ]
@@ -30,4 +30,43 @@ class Notification(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"-> {self.recipient.username}: {self.message[:60]}"
\ No newline at end of file
+        return f"-> {self.recipient.username}: {self.message[:60]}"
+
+EMAIL_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('sending', 'Sending'),
+    ('sent',    'Sent'),
+    ('failed',  'Failed'),
+]
+
+
+class OutboundEmail(models.Model):
+    """
+    A transactional email waiting in the outbox (notifications/email_outbox.py).
+    Rows sharing a ``coalesce_key`` while pending are merged into one email.
+    """
+    to = models.EmailField()
+    subject = models.CharField(max_length=300)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    attachment_name = models.CharField(max_length=200, blank=True)
+    attachment_type = models.CharField(max_length=100, blank=True)
+    attachment = models.BinaryField(null=True, blank=True)
+    coalesce_key = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=10, choices=EMAIL_STATUS_CHOICES, default='pending')
+    send_after = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'send_after'], name='notif_outbox_due_idx'),
+            models.Index(fields=['coalesce_key', 'status'], name='notif_outbox_coalesce_idx'),
+            models.Index(fields=['status', 'sent_at'], name='notif_outbox_sent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
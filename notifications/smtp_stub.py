@@ -0,0 +1,105 @@
+"""
+A minimal local SMTP server for development, tests and benchmarks.
+
+It speaks just enough SMTP (HELO/EHLO, MAIL, RCPT, DATA, RSET, NOOP,
+QUIT) for Django's SMTP backend, accepts every message and keeps only a
+count, plus the last few messages for inspection. No TLS or AUTH: point
+the app at it with EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=False.
+``latency`` adds a delay to each reply to imitate a remote provider.
+"""
+import asyncio
+import threading
+from collections import deque
+
+
+class SMTPStub:
+    def __init__(self, host='127.0.0.1', port=1025, latency=0.0, keep=20, on_message=None):
+        self.host, self.port, self.latency = host, port, latency
+        self.on_message = on_message
+        self.messages = deque(maxlen=keep)
+        self.received = 0
+        self.connections = 0
+        self._server = None
+
+    async def _reply(self, writer, line):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write(line.encode() + b'\r\n')
+        await writer.drain()
+
+    async def _session(self, reader, writer):
+        self.connections += 1
+        await self._reply(writer, '220 localhost BizConnect SMTP stub')
+        envelope = {'from': None, 'to': []}
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                verb = raw.decode(errors='replace').strip().split(' ', 1)[0].upper()
+                if verb == 'EHLO':
+                    writer.write(b'250-localhost\r\n250-8BITMIME\r\n')
+                    await self._reply(writer, '250 SMTPUTF8')
+                elif verb == 'HELO':
+                    await self._reply(writer, '250 localhost')
+                elif verb == 'MAIL':
+                    envelope = {'from': raw.decode(errors='replace').strip(), 'to': []}
+                    await self._reply(writer, '250 OK')
+                elif verb == 'RCPT':
+                    envelope['to'].append(raw.decode(errors='replace').strip())
+                    await self._reply(writer, '250 OK')
+                elif verb == 'DATA':
+                    await self._reply(writer, '354 End data with <CR><LF>.<CR><LF>')
+                    lines = []
+                    while True:
+                        line = await reader.readline()
+                        if not line or line in (b'.\r\n', b'.\n'):
+                            break
+                        lines.append(line)
+                    self.received += 1
+                    message = {**envelope, 'data': b''.join(lines)}
+                    self.messages.append(message)
+                    if self.on_message:
+                        self.on_message(self, message)
+                    await self._reply(writer, '250 OK: queued')
+                elif verb in ('RSET', 'NOOP'):
+                    await self._reply(writer, '250 OK')
+                elif verb == 'QUIT':
+                    await self._reply(writer, '221 Bye')
+                    break
+                else:
+                    await self._reply(writer, '502 Command not implemented')
+        finally:
+            writer.close()
+
+    async def serve(self):
+        self._server = await asyncio.start_server(self._session, self.host, self.port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self):
+        """Runs the server on a daemon thread; returns once it's listening."""
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            self._loop = loop
+
+            async def main():
+                self._server = await asyncio.start_server(self._session, self.host, self.port)
+                self.port = self._server.sockets[0].getsockname()[1]
+                ready.set()
+                await self._server.serve_forever()
+
+            try:
+                loop.run_until_complete(main())
+            except asyncio.CancelledError:
+                pass
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait(5)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
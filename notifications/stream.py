@@ -0,0 +1,137 @@
+"""
+Server-Sent Events stream of a user's notifications.
+
+The navbar badge used to poll ``/notifications/count/`` every 20 seconds
+from every open page, each poll a COUNT over Notification. Now each page
+opens one EventSource on ``/notifications/stream/`` and the server pushes:
+
+* ``count`` — the unread count, sent on connect and whenever it changes;
+* ``notification`` — each new notification as JSON.
+
+Every event carries ``id: <newest notification id>``. The browser sends
+that back as ``Last-Event-ID`` when it reconnects, and the stream replays
+what was created in between (up to REPLAY_LIMIT) before going live.
+
+``create_notification(s)`` and the mark-read views publish to the
+recipient's ``notif:<user id>`` channel (ecommerce/pubsub.py: in-process
+fan-out plus PostgreSQL NOTIFY across workers); the stream only queries
+when it is woken, so an idle page costs no queries at all. Streams end
+after NOTIFICATIONS_STREAM_SECONDS and the browser reconnects, which keeps
+a dead client from holding a worker forever.
+
+``events`` is the WSGI (thread-per-stream) version; ``aevents`` is used
+when the site is served by ecommerce/asgi.py.
+"""
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from ecommerce import pubsub
+
+REPLAY_LIMIT = 50
+HEARTBEAT_SECONDS = 20
+RETRY_MS = 5000
+
+
+def channel(user_id):
+    return f'notif:{user_id}'
+
+
+def publish(user_ids):
+    for user_id in set(user_ids):
+        pubsub.publish(channel(user_id))
+
+
+def event(name, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {name}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def _newest_id(user_id):
+    from .models import Notification
+
+    return Notification.objects.filter(recipient_id=user_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _changes(user_id, last_id, count):
+    """
+    Events for what changed since ``last_id``/``count``; returns
+    ``(chunks, last_id, count)``. Hands the DB connection back afterwards,
+    since the caller is about to wait.
+    """
+    from .models import Notification
+
+    chunks = []
+    newest = Notification.objects.filter(recipient_id=user_id, id__gt=last_id).order_by('-id')[:REPLAY_LIMIT]
+    for n in reversed(newest):
+        last_id = n.pk
+        chunks.append(event('notification', {
+            'id': n.pk,
+            'type': n.notif_type,
+            'message': n.message,
+            'link': n.link,
+        }, last_id))
+    unread = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+    if unread != count:
+        count = unread
+        chunks.append(event('count', {'count': count}, last_id))
+
+    pubsub.release_connection()
+    return chunks, last_id, count
+
+
+def events(user_id, last_event_id=None, duration=None):
+    """
+    Yields the SSE text for ``user_id``. Without ``last_event_id`` the
+    stream starts from now; with it, missed notifications are replayed.
+    """
+    duration = settings.NOTIFICATIONS_STREAM_SECONDS if duration is None else duration
+    deadline = time.monotonic() + duration
+
+    with pubsub.subscribe(channel(user_id)) as subscription:
+        last_id = last_event_id if last_event_id is not None else _newest_id(user_id)
+        count = None
+        yield f'retry: {RETRY_MS}\n\n'
+
+        while True:
+            chunks, last_id, count = _changes(user_id, last_id, count)
+            yield from chunks
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                if subscription.wait(min(HEARTBEAT_SECONDS, remaining)):
+                    break
+                if time.monotonic() < deadline:
+                    # A comment line keeps proxies from timing the stream out.
+                    yield ': keep-alive\n\n'
+
+
+async def aevents(user_id, last_event_id=None, duration=None):
+    """``events`` as an async generator, for ASGI: waiting holds no thread."""
+    duration = settings.NOTIFICATIONS_STREAM_SECONDS if duration is None else duration
+    deadline = time.monotonic() + duration
+
+    with pubsub.subscribe(channel(user_id)) as subscription:
+        last_id = last_event_id if last_event_id is not None else await sync_to_async(_newest_id)(user_id)
+        count = None
+        yield f'retry: {RETRY_MS}\n\n'
+
+        while True:
+            chunks, last_id, count = await sync_to_async(_changes)(user_id, last_id, count)
+            for chunk in chunks:
+                yield chunk
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                if await subscription.async_wait(min(HEARTBEAT_SECONDS, remaining)):
+                    break
+                if time.monotonic() < deadline:
+                    yield ': keep-alive\n\n'
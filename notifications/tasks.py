@@ -0,0 +1,9 @@
+"""Background jobs for notifications (see jobs/queue.py)."""
+from jobs.queue import job
+
+from .email_outbox import flush
+
+
+@job('notifications.flush_outbox', max_attempts=10)
+def flush_outbox():
+    flush()
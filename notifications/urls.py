@@ -5,4 +5,5 @@ urlpatterns = [
     path('', views.notification_list, name='notification_list'),
     path('mark-read/', views.mark_all_read, name='mark_all_read'),
     path('count/', views.unread_count, name='unread_count'),
+    path('stream/', views.notification_stream, name='notification_stream'),
 ]
\ No newline at end of file
@@ -1,4 +1,5 @@
 from .models import Notification
+from .stream import publish
 
 
 def create_notification(recipient, notif_type, message, link='', actor=None):
@@ -8,4 +9,23 @@ def create_notification(recipient, notif_type, message, link='', actor=None):
         notif_type=notif_type,
         message=message,
         link=link,
-    )
\ No newline at end of file
+    )
+    publish([recipient.pk])
+
+def create_notifications(notifications):
+    """
+    Bulk version of create_notification. Takes an iterable of dicts with the
+    same keys (``recipient`` may be given as ``recipient_id``) and inserts
+    them in one query.
+    """
+    created = Notification.objects.bulk_create([
+        Notification(
+            recipient_id=n.get('recipient_id') or n['recipient'].pk,
+            actor=n.get('actor'),
+            notif_type=n['notif_type'],
+            message=n['message'],
+            link=n.get('link', ''),
+        )
+        for n in notifications
+    ])
+    publish(n.recipient_id for n in created)
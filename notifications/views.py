@@ -1,8 +1,10 @@
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_POST
 from accounts.decorators import login_required_custom
 from .models import Notification
+from .stream import aevents, events, publish
 
 
 @login_required_custom
@@ -10,7 +12,8 @@ def notification_list(request):
     notifs = Notification.objects.filter(recipient=request.user)[:50]
     # Count separately to avoid slicing bug
     unread_count = Notification.objects.filter(recipient=request.user, is_read=False).count()
-    Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+    if Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True):
+        publish([request.user.pk])
     return render(request, 'notifications/notifications.html', {
         'notifs': notifs,
         'unread_count': unread_count,
@@ -20,12 +23,34 @@ def notification_list(request):
 @login_required_custom
 @require_POST
 def mark_all_read(request):
-    Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+    if Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True):
+        publish([request.user.pk])
     return JsonResponse({'success': True})
 
 
 @login_required_custom
-def unread_count(request):
+async def unread_count(request):
     # Count computed independently — no slicing bug
-    count = Notification.objects.filter(recipient=request.user, is_read=False).count()
-    return JsonResponse({'count': count})
\ No newline at end of file
+    user = await request.auser()
+    count = await Notification.objects.filter(recipient=user, is_read=False).acount()
+    return JsonResponse({'count': count})
+
+
+@login_required_custom
+async def notification_stream(request):
+    """Server-Sent Events: unread count and new notifications (see stream.py)."""
+    user = await request.auser()
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    # Each server type needs its own kind of iterator: Django buffers the
+    # whole stream when handed the other one.
+    stream = aevents if isinstance(request, ASGIRequest) else events
+    response = StreamingHttpResponse(stream(user.pk, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Product, Order, OrderItem
+from .flash_sales import end_sale, start_sale
+from .models import Product, Order, OrderItem, FlashSale, StripeEvent
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -13,4 +14,28 @@ class OrderAdmin(admin.ModelAdmin):
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
-    list_display = ['order', 'product_name', 'quantity', 'unit_price']
\ No newline at end of file
+    list_display = ['order', 'product_name', 'quantity', 'unit_price']
+
+@admin.register(FlashSale)
+class FlashSaleAdmin(admin.ModelAdmin):
+    list_display = ['product', 'starts_at', 'ends_at', 'admissions_per_second', 'shard_count', 'is_running']
+    list_filter = ['is_running']
+    readonly_fields = ['is_running']
+    actions = ['start_now', 'end_now']
+
+    @admin.action(description='Start selected sales (partition stock now)')
+    def start_now(self, request, queryset):
+        for sale in queryset:
+            start_sale(sale)
+
+    @admin.action(description='End selected sales (return stock to product)')
+    def end_now(self, request, queryset):
+        for sale in queryset:
+            end_sale(sale)
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'event_type', 'received_at', 'processed_at']
+    list_filter = ['event_type']
+    search_fields = ['event_id']
+    readonly_fields = ['event_id', 'event_type', 'payload', 'received_at', 'processed_at']
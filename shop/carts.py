@@ -0,0 +1,157 @@
+"""
+Server-side carts.
+
+The browser keeps a copy of the cart in localStorage for snappy rendering,
+but the server cart is the one that survives devices and logins. Syncs
+merge the browser's lines into the server cart (``merge_lines``), so a stale
+copy on one device can't wipe out what was added on another; only explicit
+edits on the cart page replace it (``replace_lines``). Every sync
+revalidates all lines against the catalog in a single query, so stale
+prices and sold-out items surface on the cart page instead of as a failed
+checkout.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .flash_sales import sale_stock
+
+MAX_LINE_QUANTITY = 99
+MAX_LINES = 100
+
+
+def get_cart(request, create=False):
+    """The current user's cart; None for anonymous users."""
+    from .models import Cart
+
+    if not request.user.is_authenticated:
+        return None
+    if create:
+        return Cart.objects.get_or_create(user=request.user)[0]
+    return Cart.objects.filter(user=request.user).first()
+
+
+def cart_quantities(cart):
+    if cart is None:
+        return {}
+    return dict(cart.items.values_list('product_id', 'quantity'))
+
+
+def _catalog_rows(product_ids):
+    """
+    One query: current price/stock for the given products, with stock held
+    in a running flash sale's shards added to what Product.stock shows.
+    """
+    from .models import Product
+
+    return (
+        Product.objects
+        .filter(pk__in=list(product_ids))
+        .annotate(flash_stock=sale_stock())
+        .only('pk', 'name', 'price', 'stock', 'is_active', 'seller_id')
+        .in_bulk()
+    )
+
+
+def revalidate(quantities, known_prices=None):
+    """
+    Checks ``{product_id: qty}`` against the catalog. ``known_prices`` maps
+    product ids to the price the buyer last saw. Returns a list of line dicts
+    in input order plus a summary.
+    """
+    known_prices = known_prices or {}
+    products = _catalog_rows(quantities)
+
+    lines = []
+    total = Decimal('0')
+    for pid, qty in quantities.items():
+        product = products.get(pid)
+        if product is None or not product.is_active:
+            lines.append({'product_id': pid, 'quantity': qty, 'available': False,
+                          'reason': 'This product is no longer available.'})
+            continue
+
+        stock = product.available_stock
+        seen = known_prices.get(pid)
+        line = {
+            'product_id': pid,
+            'name': product.name,
+            'seller_id': product.seller_id,
+            'quantity': qty,
+            'price': str(product.price),
+            'previous_price': str(seen) if seen is not None else None,
+            'price_changed': seen is not None and seen != product.price,
+            'stock': stock,
+            'available': stock >= qty,
+            'reason': '',
+        }
+        if not stock:
+            line['reason'] = 'Out of stock.'
+        elif stock < qty:
+            line['reason'] = f'Only {stock} left.'
+        if line['available']:
+            total += product.price * qty
+        lines.append(line)
+
+    return {
+        'items': lines,
+        'total': str(total),
+        'all_available': all(l['available'] for l in lines),
+        'any_price_changed': any(l.get('price_changed') for l in lines),
+    }
+
+
+def replace_lines(cart, quantities, known_prices=None):
+    """
+    Replaces the cart's contents with ``{product_id: qty}`` and stores the
+    current price for each line. Price changes are reported against
+    ``known_prices`` (what the client showed), falling back to the prices
+    stored at the last sync. Returns the revalidated lines.
+    """
+    from .models import CartItem
+
+    quantities = {pid: min(qty, MAX_LINE_QUANTITY) for pid, qty in quantities.items()}
+    known = dict(cart.items.values_list('product_id', 'unit_price'))
+    known.update(known_prices or {})
+    result = revalidate(quantities, known)
+
+    with transaction.atomic():
+        cart.items.all().delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product_id=line['product_id'], quantity=line['quantity'],
+                     unit_price=line['price'])
+            for line in result['items'] if 'price' in line
+        ])
+        cart.save(update_fields=['updated_at'])
+    return result
+
+
+def merge_lines(cart, quantities, known_prices=None):
+    """
+    Merges client lines into the cart, keeping the larger quantity where
+    both have a product (the client usually holds a copy of the same cart,
+    so adding would double it). New products past ``MAX_LINES`` are dropped.
+    Returns the revalidated lines.
+    """
+    merged = cart_quantities(cart)
+    for pid, qty in quantities.items():
+        if pid in merged or len(merged) < MAX_LINES:
+            merged[pid] = max(merged.get(pid, 0), qty)
+    return replace_lines(cart, merged, known_prices)
+
+
+def prices_from_payload(items):
+    """``{product_id: Decimal}`` for client lines that carry the price they showed."""
+    prices = {}
+    for ci in items or []:
+        pid = ci.get('product_id') or ci.get('id') or ci.get('pk')
+        try:
+            prices[int(pid)] = Decimal(str(ci['price'])).quantize(Decimal('0.01'))
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            continue
+    return prices
+
+
+def clear_products(cart, product_ids):
+    if cart is not None:
+        cart.items.filter(product_id__in=list(product_ids)).delete()
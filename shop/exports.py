@@ -0,0 +1,170 @@
+"""
+Streaming report exports.
+
+Exports are written row by row into a ``StreamingHttpResponse`` while the
+queryset is read with ``.iterator()`` (a server-side cursor on PostgreSQL),
+so a worker only ever holds one chunk of rows and one buffer of output,
+however large the export. Rows are fetched with ``.values()``; no model
+instances are built.
+
+Two formats: ``csv`` (human-friendly formatting, for spreadsheets) and
+``jsonl`` (one JSON object per line with raw values, for scripts).
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+CHUNK_SIZE = 2000
+ROWS_PER_WRITE = 500
+
+
+class Echo:
+    """A file-like object whose ``write`` hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def php(value):
+    return f"PHP {value:,.2f}"
+
+
+def ymd(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d')
+
+
+def parse_date_range(params):
+    """
+    ``from`` / ``to`` (YYYY-MM-DD, inclusive, local time) from a QueryDict.
+    Returns ``(start, end)`` aware datetimes, either may be None; ``end`` is
+    exclusive. Raises ValueError on malformed dates.
+    """
+    def day(name):
+        raw = (params.get(name) or '').strip()
+        if not raw:
+            return None
+        try:
+            return datetime.strptime(raw, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f"Invalid '{name}' date: use YYYY-MM-DD.")
+
+    start, end = day('from'), day('to')
+    if start and end and start > end:
+        raise ValueError("'from' date is after 'to' date.")
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz) if start else None,
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz) if end else None,
+    )
+
+
+def filter_dates(queryset, field, start, end):
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lt': end})
+    return queryset
+
+
+def _lines(rows, columns, fmt):
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow([header for header, _, _ in columns])
+        for row in rows:
+            yield writer.writerow([
+                (to_text(row[key]) if to_text and row[key] is not None else row[key])
+                for _, key, to_text in columns
+            ])
+    else:
+        for row in rows:
+            yield json.dumps({key: row[key] for _, key, _ in columns}, cls=DjangoJSONEncoder) + '\n'
+
+
+def _buffered(lines):
+    # One write per row means one socket write per row; group them.
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= ROWS_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_export(queryset, columns, fmt, filename):
+    """
+    ``columns`` is ``[(csv_header, values_key, csv_formatter_or_None), ...]``
+    where each key is a field or annotation already selected in the
+    ``.values()`` queryset.
+    """
+    content_type, extension = FORMATS[fmt]
+    rows = queryset.iterator(chunk_size=CHUNK_SIZE)
+    response = StreamingHttpResponse(_buffered(_lines(rows, columns, fmt)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+
+# ── exports ──────────────────────────────────────────────────────────────
+
+SELLER_ITEM_COLUMNS = [
+    ('Order Number', 'order_number', None),
+    ('Buyer', 'buyer', None),
+    ('Product', 'product_name', None),
+    ('Qty', 'quantity', None),
+    ('Unit Price', 'unit_price', php),
+    ('Subtotal', 'subtotal', php),
+    ('Status', 'status', None),
+    ('Date', 'created_at', ymd),
+]
+
+
+def seller_items(seller, start=None, end=None):
+    from .models import OrderItem
+
+    items = filter_dates(OrderItem.objects.filter(seller=seller), 'order__created_at', start, end)
+    return items.order_by('order__created_at', 'pk').values(
+        'product_name', 'quantity', 'unit_price', 'status',
+        order_number=F('order__order_number'),
+        buyer=F('order__buyer__username'),
+        created_at=F('order__created_at'),
+        subtotal=ExpressionWrapper(F('quantity') * F('unit_price'),
+                                   output_field=DecimalField(max_digits=12, decimal_places=2)),
+    )
+
+
+ORDER_COLUMNS = [
+    ('Order Number', 'order_number', None),
+    ('Buyer', 'buyer_username', None),
+    ('Buyer Email', 'buyer_email', None),
+    ('Status', 'status', None),
+    ('Total', 'total_amount', php),
+    ('Payment Method', 'payment_method', None),
+    ('Payment Status', 'payment_status', None),
+    ('Shipping Address', 'shipping_address', None),
+    ('Date', 'created_at', ymd),
+]
+
+
+def all_orders(start=None, end=None, status=None):
+    from .models import Order
+
+    orders = filter_dates(Order.objects.all(), 'created_at', start, end)
+    if status:
+        orders = orders.filter(status=status)
+    return orders.order_by('created_at', 'pk').values(
+        'order_number', 'status', 'total_amount', 'shipping_address', 'created_at',
+        buyer_username=F('buyer__username'),
+        buyer_email=F('buyer__email'),
+        payment_method=F('payment__method'),
+        payment_status=F('payment__status'),
+    )
@@ -0,0 +1,135 @@
+"""
+Catalog filters and facet counts.
+
+Facet counts are computed over the catalog *before* the buyer's own filters
+are applied, so "N under PHP 500" stays meaningful while browsing. Price and
+stock facets come from one conditional aggregate; seller facets from one
+grouped query. Both ride the (is_active, price) and (is_active, seller)
+indexes on Product. Stock counts include units held in a running flash
+sale's shards (Product.stock is zero while the sale runs).
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import Coalesce
+
+from .flash_sales import sale_stock
+
+# (key, label, min inclusive, max exclusive)
+PRICE_BUCKETS = [
+    ('under_500',  'Under ₱500',      None,            Decimal('500')),
+    ('500_1000',   '₱500 – ₱1,000',   Decimal('500'),  Decimal('1000')),
+    ('1000_5000',  '₱1,000 – ₱5,000', Decimal('1000'), Decimal('5000')),
+    ('over_5000',  '₱5,000 & up',     Decimal('5000'), None),
+]
+
+SORT_OPTIONS = {
+    'newest':     ('Newest',             ('-created_at', '-id')),
+    'price_asc':  ('Price: low to high', ('price', 'id')),
+    'price_desc': ('Price: high to low', ('-price', '-id')),
+}
+RELEVANCE_ORDERING = ('-rank', '-id')
+
+SELLER_FACET_LIMIT = 20
+
+
+def _decimal(value):
+    try:
+        d = Decimal((value or '').strip())
+    except (InvalidOperation, AttributeError):
+        return None
+    return d if d >= 0 else None
+
+
+def parse_filters(params):
+    """Normalises catalog filters from a QueryDict; unknown values are dropped."""
+    seller = params.get('seller', '')
+    stock = params.get('stock', '')
+    sort = params.get('sort', '')
+    min_price = _decimal(params.get('min_price'))
+    max_price = _decimal(params.get('max_price'))
+
+    # A bucket key from the facet list is shorthand for its min/max range.
+    price = params.get('price', '')
+    for key, _, low, high in PRICE_BUCKETS:
+        if key == price:
+            min_price, max_price = low, high
+            break
+    else:
+        price = ''
+
+    return {
+        'price': price,
+        'min_price': min_price,
+        'max_price': max_price,
+        'seller': int(seller) if seller.isdigit() else None,
+        'stock': stock if stock in ('in', 'out') else '',
+        'sort': sort if sort in SORT_OPTIONS else '',
+    }
+
+
+def _with_total_stock(queryset):
+    """Aliases ``total_stock``: Product.stock plus any running sale's shards."""
+    return queryset.alias(total_stock=F('stock') + Coalesce(sale_stock(), 0))
+
+
+def apply_filters(queryset, filters):
+    if filters['min_price'] is not None:
+        queryset = queryset.filter(price__gte=filters['min_price'])
+    if filters['max_price'] is not None:
+        queryset = queryset.filter(price__lt=filters['max_price'])
+    if filters['seller']:
+        queryset = queryset.filter(seller_id=filters['seller'])
+    if filters['stock'] == 'in':
+        queryset = _with_total_stock(queryset).filter(total_stock__gt=0)
+    elif filters['stock'] == 'out':
+        queryset = _with_total_stock(queryset).filter(total_stock=0)
+    return queryset
+
+
+def ordering_for(filters, searching):
+    if filters['sort']:
+        return SORT_OPTIONS[filters['sort']][1]
+    return RELEVANCE_ORDERING if searching else SORT_OPTIONS['newest'][1]
+
+
+def _bucket_q(low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lt=high)
+    return q
+
+
+def facet_counts(queryset):
+    """
+    Returns ``{'price': [...], 'stock': {...}, 'sellers': [...]}`` for the
+    given (unfiltered) catalog queryset in two queries.
+    """
+    aggregates = {
+        f'price_{key}': Count('pk', filter=_bucket_q(low, high))
+        for key, _, low, high in PRICE_BUCKETS
+    }
+    aggregates['in_stock'] = Count('pk', filter=Q(total_stock__gt=0))
+    aggregates['out_of_stock'] = Count('pk', filter=Q(total_stock=0))
+    totals = _with_total_stock(queryset).order_by().aggregate(**aggregates)
+
+    sellers = (
+        queryset.order_by()
+        .values('seller_id', 'seller__username')
+        .annotate(count=Count('pk'))
+        .order_by('-count', 'seller__username')[:SELLER_FACET_LIMIT]
+    )
+
+    return {
+        'price': [
+            {'key': key, 'label': label, 'count': totals[f'price_{key}']}
+            for key, label, _, _ in PRICE_BUCKETS
+        ],
+        'stock': {'in': totals['in_stock'], 'out': totals['out_of_stock']},
+        'sellers': [
+            {'id': s['seller_id'], 'username': s['seller__username'], 'count': s['count']}
+            for s in sellers
+        ],
+    }
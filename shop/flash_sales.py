@@ -0,0 +1,237 @@
+"""
+Flash sales.
+
+When a sale starts, the product's stock is split across ``shard_count``
+``FlashSaleShard`` rows and Product.stock drops to zero. Checkouts take
+stock from a random shard with a conditional UPDATE
+(``stock = stock - n WHERE stock >= n``), so hundreds of concurrent buyers spread their
+row locks over N rows instead of queueing on one.
+
+In front of that, ``admit`` is an admission queue kept in the Django cache:
+buyers take a ticket and at most ``admissions_per_second`` of them are let
+through to checkout each second, roughly in ticket order. Everyone else gets
+an immediate "you're in line" (with position and retry delay) or "sold out"
+answer without touching the product rows. The cache must be shared between
+workers for the rate to be global (see CACHES in settings).
+"""
+import math
+import random
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+ADMITTED = 'admitted'
+QUEUED = 'queued'
+SOLD_OUT = 'sold_out'
+
+QUEUE_TTL = 6 * 3600
+# How long an admitted buyer keeps their slot without checking out.
+ADMITTED_TTL = 10 * 60
+
+
+def _key(sale, name):
+    return f'flash:{sale.pk}:{name}'
+
+
+def running_sales(product_ids):
+    """``{product_id: FlashSale}`` for products currently in a running sale."""
+    from .models import FlashSale
+
+    sales = FlashSale.objects.filter(product_id__in=list(product_ids), is_running=True).select_related('product')
+    return {sale.product_id: sale for sale in sales}
+
+
+def sale_stock():
+    """
+    Subquery for the stock held in a running sale's shards, for annotating
+    Product querysets (``.annotate(flash_stock=sale_stock())``). Product.stock
+    is zero while a sale runs, so pages showing availability need this.
+    """
+    from .models import FlashSaleShard
+
+    return Subquery(
+        FlashSaleShard.objects
+        .filter(sale__product=OuterRef('pk'), sale__is_running=True)
+        .values('sale__product')
+        .annotate(total=Sum('stock'))
+        .values('total')
+    )
+
+
+# ── lifecycle ────────────────────────────────────────────────────────────
+
+def start_sale(sale):
+    """Moves the product's available stock into the sale's shards."""
+    from .models import FlashSale, FlashSaleShard, Product
+
+    with transaction.atomic():
+        sale = FlashSale.objects.select_for_update().get(pk=sale.pk)
+        if sale.is_running:
+            return sale
+        product = Product.objects.select_for_update().get(pk=sale.product_id)
+
+        count = max(sale.shard_count, 1)
+        base, extra = divmod(product.stock, count)
+        # A restarted sale reuses its shards: holds from the previous run
+        # still point at them and must release back into the sale.
+        shards = {shard.index: shard for shard in FlashSaleShard.objects.select_for_update().filter(sale=sale)}
+        for shard in shards.values():
+            shard.stock = base + (1 if shard.index < extra else 0) if shard.index < count else 0
+        FlashSaleShard.objects.bulk_update(shards.values(), ['stock'])
+        FlashSaleShard.objects.bulk_create([
+            FlashSaleShard(sale=sale, index=i, stock=base + (1 if i < extra else 0))
+            for i in range(count) if i not in shards
+        ])
+        Product.objects.filter(pk=product.pk).update(stock=0)
+
+        sale.is_running = True
+        sale.save(update_fields=['is_running'])
+
+    for name in ('sold_out', 'tickets', 'head', 'opened_at'):
+        cache.delete(_key(sale, name))
+    return sale
+
+
+def end_sale(sale):
+    """Folds whatever is left in the shards back into Product.stock."""
+    from .models import FlashSale, FlashSaleShard, Product
+
+    with transaction.atomic():
+        sale = FlashSale.objects.select_for_update().get(pk=sale.pk)
+        if not sale.is_running:
+            return sale
+        shards = FlashSaleShard.objects.select_for_update().filter(sale=sale)
+        remaining = shards.aggregate(t=Sum('stock'))['t'] or 0
+        shards.update(stock=0)
+        Product.objects.filter(pk=sale.product_id).update(stock=F('stock') + remaining)
+
+        sale.is_running = False
+        sale.save(update_fields=['is_running'])
+
+    cache.delete(_key(sale, 'sold_out'))
+    return sale
+
+
+def run_schedule(now=None):
+    """Starts sales that are due and ends finished ones. Returns (started, ended)."""
+    from .models import FlashSale
+
+    now = now or timezone.now()
+    due = FlashSale.objects.filter(is_running=False, starts_at__lte=now, ends_at__gt=now)
+    finished = FlashSale.objects.filter(is_running=True, ends_at__lte=now)
+    started = [start_sale(s) for s in due]
+    ended = [end_sale(s) for s in finished]
+    return len(started), len(ended)
+
+
+# ── stock ────────────────────────────────────────────────────────────────
+
+def take_from_shards(sale, qty):
+    """
+    Takes ``qty`` from one shard with stock to spare, trying shards in random
+    order. When no single shard can cover it (late in a sale, when shards are
+    nearly drained), locks the remaining shards and takes it across them.
+
+    Returns the id of the shard to give the stock back to on release, or None
+    when the sale as a whole can't cover ``qty``. Shards of one sale are
+    interchangeable, so giving the whole quantity back to one of them keeps
+    the sale's total right.
+    """
+    from .models import FlashSaleShard
+
+    shard_ids = list(FlashSaleShard.objects.filter(sale=sale, stock__gte=qty).values_list('pk', flat=True))
+    random.shuffle(shard_ids)
+    for shard_id in shard_ids:
+        if FlashSaleShard.objects.filter(pk=shard_id, stock__gte=qty).update(stock=F('stock') - qty):
+            return shard_id
+
+    with transaction.atomic():
+        shards = list(
+            FlashSaleShard.objects.select_for_update()
+            .filter(sale=sale, stock__gt=0).order_by('pk')
+        )
+        remaining = sum(shard.stock for shard in shards)
+        if remaining < qty:
+            if not remaining:
+                cache.set(_key(sale, 'sold_out'), True, QUEUE_TTL)
+            return None
+
+        needed = qty
+        for shard in shards:
+            take = min(shard.stock, needed)
+            FlashSaleShard.objects.filter(pk=shard.pk).update(stock=F('stock') - take)
+            needed -= take
+            if not needed:
+                break
+    return shards[0].pk
+
+
+def give_back_to_shards(quantities):
+    """Returns ``{shard_id: qty}`` to their shards."""
+    from .models import FlashSaleShard
+
+    for shard_id, qty in quantities.items():
+        FlashSaleShard.objects.filter(pk=shard_id).update(stock=F('stock') + qty)
+    if quantities:
+        sale_ids = FlashSaleShard.objects.filter(pk__in=list(quantities)).values_list('sale_id', flat=True)
+        cache.delete_many([f'flash:{sale_id}:sold_out' for sale_id in set(sale_ids)])
+
+
+# ── admission queue ──────────────────────────────────────────────────────
+
+def _incr(key, ttl=QUEUE_TTL):
+    cache.add(key, 0, ttl)
+    try:
+        return cache.incr(key)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(key, 1, ttl)
+        return 1
+
+
+def admit(sale, user, now=None):
+    """
+    Returns ``(ADMITTED, None)``, ``(SOLD_OUT, None)`` or
+    ``(QUEUED, {'position': n, 'retry_after': seconds})``.
+
+    A buyer is admitted when their ticket is within one second's worth of
+    admissions of the head of the line *and* this second still has room.
+    The head also advances with time, so buyers who leave the line never
+    stall it. Once admitted, a buyer stays admitted until ``leave`` or for
+    ``ADMITTED_TTL``, so an abandoned checkout doesn't keep its slot.
+    """
+    if cache.get(_key(sale, 'sold_out')):
+        return SOLD_OUT, None
+
+    rate = max(sale.admissions_per_second, 1)
+    now = now or timezone.now()
+    admitted_key = _key(sale, f'admitted:{user.pk}')
+    if cache.get(admitted_key):
+        return ADMITTED, None
+
+    ticket_key = _key(sale, f'ticket:{user.pk}')
+    ticket = cache.get(ticket_key)
+    if ticket is None:
+        ticket = _incr(_key(sale, 'tickets'))
+        cache.set(ticket_key, ticket, QUEUE_TTL)
+
+    cache.add(_key(sale, 'opened_at'), now.timestamp(), QUEUE_TTL)
+    elapsed = max(now.timestamp() - cache.get(_key(sale, 'opened_at'), now.timestamp()), 0)
+    head = max(cache.get(_key(sale, 'head'), 0), int(rate * elapsed))
+
+    if ticket <= head + rate:
+        second = int(now.timestamp())
+        if _incr(_key(sale, f'slot:{second}'), ttl=10) <= rate:
+            cache.set(admitted_key, True, ADMITTED_TTL)
+            if ticket > cache.get(_key(sale, 'head'), 0):
+                cache.set(_key(sale, 'head'), ticket, QUEUE_TTL)
+            return ADMITTED, None
+
+    position = max(ticket - head, 1)
+    return QUEUED, {'position': position, 'retry_after': max(math.ceil(position / rate), 1)}
+
+
+def leave(sale, user):
+    """Called after a checkout completes; buying again means queueing again."""
+    cache.delete_many([_key(sale, f'admitted:{user.pk}'), _key(sale, f'ticket:{user.pk}')])
@@ -0,0 +1,51 @@
+"""Image helpers for uploads."""
+import io
+import logging
+
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (320, 320)
+
+
+def make_thumbnail(image_file, size=THUMBNAIL_SIZE):
+    """
+    A JPEG no larger than ``size`` of an uploaded or stored image, as a
+    ContentFile, or None if the file can't be read as an image.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        image_file.seek(0)
+        with Image.open(image_file) as image:
+            image.draft('RGB', size)  # lets JPEG decoding skip most of the pixels
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(size)
+            buf = io.BytesIO()
+            image.convert('RGB').save(buf, 'JPEG', quality=80, optimize=True)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as e:
+        logger.warning(f"Could not thumbnail {getattr(image_file, 'name', image_file)}: {e}")
+        return None
+    finally:
+        image_file.seek(0)
+    return ContentFile(buf.getvalue())
+
+
+def save_proof_thumbnail(payment):
+    """
+    Stores the review-queue thumbnail for ``payment``'s proof image.
+    Returns False if the proof is missing or unreadable.
+    """
+    from .models import Payment
+
+    try:
+        with payment.proof_image.open('rb') as image:
+            thumbnail = make_thumbnail(image)
+    except (FileNotFoundError, OSError):
+        thumbnail = None
+    if thumbnail is None:
+        return False
+    payment.proof_thumbnail.save(f"{payment.order.order_number}.jpg", thumbnail, save=False)
+    Payment.objects.filter(pk=payment.pk).update(proof_thumbnail=payment.proof_thumbnail.name)
+    return True
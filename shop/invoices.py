@@ -0,0 +1,143 @@
+"""
+Invoice PDFs.
+
+An order's invoice is rendered once and stored as an Invoice row; the
+invoice email and the buyer's downloads reuse the stored bytes. The
+ReportLab stylesheet, table style and the fixed header/footer flowables are
+built once per process instead of once per invoice.
+
+``render`` takes a plain dict (see ``invoice_data``) rather than an Order,
+so ``manage.py render_invoices`` can hand the work to a process pool
+(``render_pool``): the parent reads orders from the database, the workers
+only build PDFs.
+"""
+import hashlib
+import io
+from functools import lru_cache
+
+from django.db import IntegrityError, transaction
+
+
+def render_pool(workers):
+    """
+    A process pool for PDF rendering. Workers are spawned rather than
+    forked: the executor only starts them on the first ``map``, by which
+    time the parent has queried the database again, and a forked child
+    would share that connection's socket. Each worker sets Django up once.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    import django
+
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+    )
+
+
+@lru_cache(maxsize=None)
+def _layout():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, Spacer, TableStyle
+
+    styles = getSampleStyleSheet()
+    table_style = TableStyle([
+        ('BACKGROUND',     (0, 0),  (-1, 0),  colors.HexColor('#1C1C1E')),
+        ('TEXTCOLOR',      (0, 0),  (-1, 0),  colors.white),
+        ('FONTNAME',       (0, 0),  (-1, 0),  'Helvetica-Bold'),
+        ('FONTNAME',       (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('BACKGROUND',     (0, -1), (-1, -1), colors.HexColor('#F0EDE6')),
+        ('ROWBACKGROUNDS', (0, 1),  (-1, -2), [colors.white, colors.HexColor('#FAF8F4')]),
+        ('GRID',           (0, 0),  (-1, -1), 0.4, colors.HexColor('#CCCCCC')),
+        ('ALIGN',          (1, 0),  (-1, -1), 'CENTER'),
+        ('TOPPADDING',     (0, 0),  (-1, -1), 8),
+        ('BOTTOMPADDING',  (0, 0),  (-1, -1), 8),
+        ('LEFTPADDING',    (0, 0),  (-1, -1), 10),
+    ])
+    # Shared by every build in the process. Safe because they always lay out
+    # in the same frame width at the top/bottom of page one and never split.
+    header = [
+        Paragraph("BIZCONNECT", styles['Title']),
+        Paragraph("Premium Philippine Marketplace", styles['Normal']),
+        Spacer(1, 16),
+    ]
+    footer = [
+        Spacer(1, 20),
+        Paragraph("Salamat sa iyong pagbili! Thank you for shopping with BizConnect.", styles['Normal']),
+    ]
+    return styles, table_style, header, footer
+
+
+def invoice_data(order):
+    """Everything ``render`` needs from ``order``, as plain picklable values."""
+    buyer = order.buyer
+    return {
+        'order_number': order.order_number,
+        'date': order.created_at.strftime('%B %d, %Y'),
+        'buyer_name': buyer.get_full_name() or buyer.username,
+        'buyer_email': buyer.email,
+        'shipping_address': order.shipping_address,
+        'items': [
+            (item.product_name, item.quantity, f"PHP {item.unit_price:,.2f}", f"PHP {item.subtotal:,.2f}")
+            for item in order.items.all()
+        ],
+        'total': f"PHP {order.total_amount:,.2f}",
+    }
+
+
+def render(data):
+    """Builds the invoice PDF for ``invoice_data(order)`` and returns its bytes."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+    styles, table_style, header, footer = _layout()
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buf,
+        pagesize=letter,
+        topMargin=54, bottomMargin=54,
+        leftMargin=54, rightMargin=54
+    )
+
+    el = list(header)
+    el.append(Paragraph(f"<b>Invoice — Order {data['order_number']}</b>", styles['Heading2']))
+    el.append(Paragraph(f"Date: {data['date']}", styles['Normal']))
+    el.append(Paragraph(f"Buyer: {data['buyer_name']}", styles['Normal']))
+    el.append(Paragraph(f"Email: {data['buyer_email']}", styles['Normal']))
+    if data['shipping_address']:
+        el.append(Paragraph(f"Ship to: {data['shipping_address']}", styles['Normal']))
+    el.append(Spacer(1, 16))
+
+    rows = [['Product', 'Qty', 'Unit Price', 'Subtotal']]
+    rows += [[name, str(qty), unit_price, subtotal] for name, qty, unit_price, subtotal in data['items']]
+    rows.append(['', '', 'TOTAL', data['total']])
+    table = Table(rows, colWidths=[240, 60, 110, 110])
+    table.setStyle(table_style)
+    el.append(table)
+    el.extend(footer)
+
+    doc.build(el)
+    return buf.getvalue()
+
+
+def store(order_id, pdf):
+    """Saves a rendered PDF as the order's invoice unless one already exists."""
+    from .models import Invoice
+
+    try:
+        with transaction.atomic():
+            return Invoice.objects.create(order_id=order_id, pdf=pdf, sha256=hashlib.sha256(pdf).hexdigest())
+    except IntegrityError:
+        # Rendered concurrently elsewhere; keep the first one.
+        return Invoice.objects.get(order_id=order_id)
+
+
+def get_invoice(order):
+    """The order's stored invoice, rendering and storing it on first use."""
+    from .models import Invoice
+
+    invoice = Invoice.objects.filter(order=order).first()
+    if invoice is None:
+        invoice = store(order.pk, render(invoice_data(order)))
+    return invoice
@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+from shop.models import OrderItem, ProductDailySales, SellerDailySales
+from shop.reservations import RELEASE_STATUSES
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the daily sales rollups (SellerDailySales, ProductDailySales) "
+        "from order items. Run once after deploying the rollup tables, or to "
+        "repair them; normal traffic keeps them up to date incrementally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seller', help='Only rebuild this seller (username).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        items = OrderItem.objects.filter(seller__isnull=False).exclude(status__in=RELEASE_STATUSES)
+        sellers = SellerDailySales.objects.all()
+        products = ProductDailySales.objects.all()
+        if opts['seller']:
+            try:
+                seller = User.objects.get(username=opts['seller'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {opts['seller']!r}.")
+            items = items.filter(seller=seller)
+            sellers = sellers.filter(seller=seller)
+            products = products.filter(seller=seller)
+
+        items = items.annotate(day=TruncDate('order__created_at'))
+        revenue = Sum(F('quantity') * F('unit_price'))
+        batch = opts['batch_size']
+
+        with transaction.atomic():
+            sellers.delete()
+            products.delete()
+
+            seller_rows = (
+                items.values('seller_id', 'day')
+                .annotate(units=Sum('quantity'), revenue=revenue, orders=Count('order', distinct=True))
+                .order_by()
+            )
+            seller_count = self._insert(SellerDailySales, seller_rows, batch)
+
+            product_rows = (
+                items.filter(product__isnull=False)
+                .values('seller_id', 'product_id', 'day')
+                .annotate(units=Sum('quantity'), revenue=revenue, orders=Count('order', distinct=True))
+                .order_by()
+            )
+            product_count = self._insert(ProductDailySales, product_rows, batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {seller_count} seller-day and {product_count} product-day row(s)."
+        ))
+
+    def _insert(self, model, rows, batch_size):
+        pending, total = [], 0
+        for row in rows.iterator(chunk_size=batch_size):
+            fields = {key: row[key] for key in ('seller_id', 'product_id', 'day', 'units', 'revenue') if key in row}
+            pending.append(model(order_count=row['orders'], **fields))
+            if len(pending) >= batch_size:
+                total += len(model.objects.bulk_create(pending))
+                pending = []
+        if pending:
+            total += len(model.objects.bulk_create(pending))
+        return total
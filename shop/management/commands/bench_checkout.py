@@ -0,0 +1,59 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from shop.models import Product
+from shop.services import create_order_from_cart
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks create_order_from_cart across cart sizes and prints the "
+        "query count and time per checkout. Everything runs in a transaction "
+        "that is rolled back, so it is safe against a real database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,5,10,20,40,80',
+                            help='Comma-separated cart line counts.')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Checkouts per cart size (best time is reported).')
+
+    def handle(self, *args, **opts):
+        sizes = [int(s) for s in opts['sizes'].split(',') if s.strip()]
+        repeat = max(opts['repeat'], 1)
+
+        with transaction.atomic():
+            seller = User.objects.create(username='__bench_checkout_seller')
+            buyer = User.objects.create(username='__bench_checkout_buyer')
+            products = Product.objects.bulk_create([
+                Product(seller=seller, name=f'Bench product {i}', description='',
+                        price=100, stock=10 ** 6)
+                for i in range(max(sizes))
+            ])
+
+            self.stdout.write(f"{'lines':>6} {'queries':>8} {'best ms':>9}")
+            counts = []
+            for size in sizes:
+                cart = [{'product_id': p.pk, 'quantity': 1} for p in products[:size]]
+                best = None
+                for _ in range(repeat):
+                    with CaptureQueriesContext(connection) as ctx:
+                        started = time.perf_counter()
+                        order, errors = create_order_from_cart(buyer, cart, 'Bench address')
+                        elapsed = (time.perf_counter() - started) * 1000
+                    if errors:
+                        raise RuntimeError(f'Checkout failed: {errors}')
+                    best = elapsed if best is None else min(best, elapsed)
+                counts.append(len(ctx.captured_queries))
+                self.stdout.write(f'{size:>6} {counts[-1]:>8} {best:>9.2f}')
+
+            transaction.set_rollback(True)
+
+        if len(set(counts)) == 1:
+            self.stdout.write(self.style.SUCCESS(f'Query count is constant ({counts[0]}) across cart sizes.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'Query count varies with cart size: {counts}'))
@@ -0,0 +1,99 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from shop.flash_sales import end_sale, start_sale, take_from_shards
+from shop.models import FlashSale, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Contention benchmark: N threads buy one unit each of the same "
+        "product, first against the single Product.stock row, then against a "
+        "sharded flash sale. Prints throughput for both. Meant for "
+        "PostgreSQL; creates its own throwaway seller/product and deletes "
+        "them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=2000, help='Total purchase attempts.')
+        parser.add_argument('--threads', type=int, default=32, help='Concurrent connections.')
+        parser.add_argument('--shards', type=int, default=8, help='Shard count for the flash sale run.')
+        parser.add_argument('--hold-ms', type=float, default=2.0,
+                            help='Simulated work inside each purchase transaction (row lock held).')
+
+    def handle(self, *args, **opts):
+        buyers, threads = opts['buyers'], max(opts['threads'], 1)
+        hold = opts['hold_ms'] / 1000
+
+        seller = User.objects.create(username=f'__bench_flash_{int(time.time())}')
+        try:
+            product = Product.objects.create(
+                seller=seller, name='Bench flash product', description='', price=1, stock=buyers,
+            )
+
+            def buy_row():
+                with transaction.atomic():
+                    ok = Product.objects.filter(pk=product.pk, stock__gte=1).update(stock=F('stock') - 1)
+                    time.sleep(hold)
+                return ok
+
+            row = self._run(buy_row, buyers, threads)
+
+            now = timezone.now()
+            Product.objects.filter(pk=product.pk).update(stock=buyers)
+            sale = start_sale(FlashSale.objects.create(
+                product=product, starts_at=now, ends_at=now + timedelta(hours=1),
+                shard_count=opts['shards'],
+            ))
+
+            def buy_sharded():
+                with transaction.atomic():
+                    ok = take_from_shards(sale, 1) is not None
+                    time.sleep(hold)
+                return ok
+
+            sharded = self._run(buy_sharded, buyers, threads)
+            end_sale(sale)
+        finally:
+            seller.delete()
+
+        self.stdout.write(f"{'mode':<14} {'sold':>6} {'seconds':>8} {'buys/s':>8}")
+        for label, (sold, seconds) in (('single row', row), (f"{opts['shards']} shards", sharded)):
+            self.stdout.write(f'{label:<14} {sold:>6} {seconds:>8.2f} {sold / seconds:>8.1f}')
+        if row[1] and sharded[1]:
+            self.stdout.write(self.style.SUCCESS(
+                f'Sharded throughput: {(sharded[0] / sharded[1]) / (row[0] / row[1]):.1f}x single row.'
+            ))
+
+    def _run(self, buy, attempts, threads):
+        remaining = [attempts]
+        sold = [0]
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                    if buy():
+                        with lock:
+                            sold[0] += 1
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        return sold[0], time.perf_counter() - started
@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from ecommerce import outbound
+from shop.payment_handlers import stripe_api
+from shop.stripe_stub import StripeStub
+
+
+class Command(BaseCommand):
+    help = (
+        "Shows how the outbound-call layer behaves when Stripe is slow: "
+        "concurrent checkout-session calls against a local stub with "
+        "artificial latency, then against one slower than the read timeout."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent callers (worker threads).')
+        parser.add_argument('--latency-ms', type=float, default=1500, help='Stub latency for the slow round.')
+        parser.add_argument('--max-concurrent', type=int, default=4)
+        parser.add_argument('--read-timeout', type=float, default=1.0)
+
+    def handle(self, *args, **opts):
+        stub = StripeStub(port=0).start_in_thread()
+        limits = {'stripe': {
+            'read_timeout': opts['read_timeout'], 'max_concurrent': opts['max_concurrent'],
+            'queue_seconds': 0.2, 'failure_threshold': 3, 'reset_seconds': 30,
+        }}
+        try:
+            with override_settings(STRIPE_API_BASE=stub.url, STRIPE_SECRET_KEY='sk_test_bench', OUTBOUND_CALLS=limits):
+                stripe = stripe_api()
+                outbound.reset()
+
+                def create(_):
+                    started = time.perf_counter()
+                    try:
+                        outbound.call('stripe', stripe.checkout.Session.create, mode='payment')
+                        outcome = 'ok'
+                    except outbound.Unavailable as e:
+                        outcome = type(e).__name__
+                    except Exception as e:
+                        outcome = f"error ({type(e).__name__})"
+                    return outcome, time.perf_counter() - started
+
+                rounds = [
+                    ('slow Stripe', opts['latency_ms'] / 1000 * 0.5),
+                    ('Stripe slower than the timeout', opts['read_timeout'] + opts['latency_ms'] / 1000),
+                    ('after the breaker opened', 0),
+                ]
+                for label, latency in rounds:
+                    stub.latency = latency
+                    with ThreadPoolExecutor(opts['threads']) as pool:
+                        results = list(pool.map(create, range(opts['threads'])))
+                    self.stdout.write(f"\n{label} (stub latency {latency:.2f}s, {opts['threads']} callers):")
+                    for outcome in sorted({o for o, _ in results}):
+                        times = [t for o, t in results if o == outcome]
+                        self.stdout.write(
+                            f"  {outcome:<28} {len(times):>3} call(s), slowest {max(times):.2f}s"
+                        )
+
+                stats = outbound.stats()['stripe']
+                self.stdout.write(f"\nstripe: {stats}")
+                # Tear down the shared client so later calls don't reuse stub connections.
+                stripe.default_http_client = None
+        finally:
+            outbound.reset()
+            stub.stop()
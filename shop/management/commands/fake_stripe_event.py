@@ -0,0 +1,54 @@
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.models import Order
+from shop.stripe_events import encode, fake_event, sign
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends Stripe-style checkout events, signed with STRIPE_WEBHOOK_SECRET, "
+        "to the webhook endpoint. For local testing without Stripe."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('order_ids', nargs='+', type=int)
+        parser.add_argument('--type', default='checkout.session.completed',
+                            help='Event type (default: checkout.session.completed).')
+        parser.add_argument('--payment-status', default='paid', choices=['paid', 'unpaid', 'no_payment_required'])
+        parser.add_argument('--repeat', type=int, default=1,
+                            help='Deliver each event this many times, as Stripe retries do.')
+        parser.add_argument('--url', default=f"{settings.SITE_URL}/shop/stripe/webhook/")
+
+    def handle(self, *args, **opts):
+        secret = settings.STRIPE_WEBHOOK_SECRET
+        if not secret:
+            raise CommandError("Set STRIPE_WEBHOOK_SECRET (any value) for both this command and the server.")
+
+        orders = Order.objects.select_related('payment').filter(pk__in=opts['order_ids'])
+        started = time.perf_counter()
+        sent = 0
+        for order in orders:
+            payload = encode(fake_event(order, opts['type'], opts['payment_status']))
+            for _ in range(opts['repeat']):
+                request = urllib.request.Request(opts['url'], data=payload.encode(), method='POST', headers={
+                    'Content-Type': 'application/json',
+                    'Stripe-Signature': sign(payload, secret),
+                })
+                try:
+                    with urllib.request.urlopen(request, timeout=10) as response:
+                        status = response.status
+                except urllib.error.HTTPError as e:
+                    status = e.code
+                except urllib.error.URLError as e:
+                    raise CommandError(f"Could not reach {opts['url']}: {e.reason}")
+                sent += 1
+                self.stdout.write(f"  order {order.order_number}: {opts['type']} -> HTTP {status}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {sent} event(s) in {time.perf_counter() - started:.2f}s."
+        ))
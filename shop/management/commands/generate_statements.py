@@ -0,0 +1,52 @@
+import os
+import time
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.invoices import render_pool
+from shop.statements import generate, previous_month
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates monthly seller statements (PDF + CSV). Statements whose "
+        "contents haven't changed since the last run are skipped. Run early "
+        "each month from cron for the previous month."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='YYYY-MM (default: last month).')
+        parser.add_argument('--seller', help='Only this seller (username).')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Rendering processes (default: one per CPU; 1 renders in-process).')
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **opts):
+        if opts['month']:
+            try:
+                month = datetime.strptime(opts['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("--month must look like 2026-05.")
+        else:
+            month = previous_month()
+
+        seller_ids = None
+        if opts['seller']:
+            seller_ids = list(User.objects.filter(username=opts['seller']).values_list('pk', flat=True))
+            if not seller_ids:
+                raise CommandError(f"No user named {opts['seller']!r}.")
+
+        pool = render_pool(opts['workers']) if opts['workers'] > 1 else None
+
+        started = time.perf_counter()
+        try:
+            rendered, unchanged = generate(month, pool, seller_ids, opts['batch_size'])
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f"{month:%B %Y}: rendered {rendered} statement(s), {unchanged} unchanged, "
+            f"in {time.perf_counter() - started:.1f}s ({opts['workers']} worker(s))."
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from shop.images import save_proof_thumbnail
+from shop.models import Payment
+
+
+class Command(BaseCommand):
+    help = "Creates review-queue thumbnails for payment proofs uploaded before thumbnails existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Include confirmed and failed payments.')
+
+    def handle(self, *args, **opts):
+        payments = (
+            Payment.objects.exclude(proof_image='').exclude(proof_image__isnull=True)
+            .filter(Q(proof_thumbnail='') | Q(proof_thumbnail__isnull=True))
+            .select_related('order')
+        )
+        if not opts['all']:
+            payments = payments.filter(status='submitted')
+
+        made = skipped = 0
+        for payment in payments.iterator(chunk_size=200):
+            if save_proof_thumbnail(payment):
+                made += 1
+            else:
+                skipped += 1
+        self.stdout.write(self.style.SUCCESS(f"Created {made} thumbnail(s); {skipped} proof(s) unreadable."))
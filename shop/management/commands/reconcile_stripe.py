@@ -0,0 +1,34 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from shop.reconciliation import PAGE_SIZE, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Confirms pending Stripe payments (and fails expired ones) from the "
+        "Checkout Sessions list. Resumes an interrupted run; otherwise scans "
+        "from where the last run finished. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='YYYY-MM-DD: start a fresh pass from this date.')
+        parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+
+    def handle(self, *args, **opts):
+        since = None
+        if opts['since']:
+            try:
+                day = datetime.strptime(opts['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("--since must look like 2026-05-01.")
+            since = timezone.make_aware(datetime.combine(day, time.min))
+
+        stats = reconcile(since=since, page_size=opts['page_size'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {stats['sessions']} session(s) in {stats['pages']} page(s): "
+            f"{stats['confirmed']} confirmed, {stats['flagged']} flagged for review, "
+            f"{stats['failed']} marked failed."
+        ))
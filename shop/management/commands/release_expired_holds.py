@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from shop.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancels orders left unpaid past STOCK_HOLD_MINUTES and puts their "
+        "reserved stock back on sale. Run every few minutes from cron."
+    )
+
+    def handle(self, *args, **opts):
+        cancelled = release_expired()
+        self.stdout.write(self.style.SUCCESS(f"Cancelled {cancelled} unpaid order(s)."))
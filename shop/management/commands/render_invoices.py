@@ -0,0 +1,68 @@
+import hashlib
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.invoices import invoice_data, render, render_pool
+from shop.models import Invoice, Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders and stores invoices for orders that don't have one yet, on a "
+        "process pool. Workers only build PDFs; this process does all reads "
+        "and writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Rendering processes (default: one per CPU; 1 renders in-process).')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--limit', type=int, help='Stop after this many orders.')
+
+    def handle(self, *args, **opts):
+        workers, batch, limit = opts['workers'], opts['batch_size'], opts['limit']
+        missing = (
+            Order.objects.filter(invoice__isnull=True)
+            .select_related('buyer')
+            .prefetch_related('items')
+            .order_by('pk')
+        )
+
+        pool = render_pool(workers) if workers > 1 else None
+
+        done = 0
+        last_pk = 0
+        started = time.perf_counter()
+        try:
+            while limit is None or done < limit:
+                size = batch if limit is None else min(batch, limit - done)
+                orders = list(missing.filter(pk__gt=last_pk)[:size])
+                if not orders:
+                    break
+                last_pk = orders[-1].pk
+
+                data = [invoice_data(order) for order in orders]
+                if pool:
+                    pdfs = pool.map(render, data, chunksize=max(1, len(data) // (workers * 4)))
+                else:
+                    pdfs = map(render, data)
+                Invoice.objects.bulk_create(
+                    [
+                        Invoice(order_id=order.pk, pdf=pdf, sha256=hashlib.sha256(pdf).hexdigest())
+                        for order, pdf in zip(orders, pdfs)
+                    ],
+                    ignore_conflicts=True,
+                )
+                done += len(orders)
+                self.stdout.write(f"  {done} rendered...")
+        finally:
+            if pool:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        rate = done / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {done} invoice(s) in {elapsed:.1f}s ({rate:.0f}/s, {workers} worker(s))."
+        ))
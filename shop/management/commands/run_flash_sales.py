@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from shop.flash_sales import run_schedule
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts flash sales whose window has opened (partitioning product "
+        "stock into shards) and ends finished ones. Run every minute from cron."
+    )
+
+    def handle(self, *args, **opts):
+        started, ended = run_schedule()
+        self.stdout.write(self.style.SUCCESS(f"Started {started}, ended {ended} flash sale(s)."))
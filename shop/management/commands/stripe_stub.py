@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from shop.models import Payment
+from shop.stripe_stub import StripeStub
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a local stub of the Stripe Checkout Sessions list API, seeded "
+        "with a paid session for every pending Stripe payment. Use with "
+        "STRIPE_API_BASE=http://127.0.0.1:12111 and manage.py reconcile_stripe."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=12111)
+        parser.add_argument('--latency-ms', type=float, default=0, help='Delay added to every response.')
+        parser.add_argument('--unpaid-every', type=int, default=0,
+                            help='Make every Nth seeded session expired and unpaid.')
+
+    def handle(self, *args, **opts):
+        stub = StripeStub(opts['host'], opts['port'], latency=opts['latency_ms'] / 1000)
+        pending = Payment.objects.filter(method='stripe', status='pending').exclude(stripe_session_id='')
+        for n, (session_id, order_id, amount, created) in enumerate(
+            pending.values_list('stripe_session_id', 'order_id', 'amount', 'created_at'), start=1,
+        ):
+            unpaid = opts['unpaid_every'] and n % opts['unpaid_every'] == 0
+            stub.add_session(
+                order_id=order_id, session_id=session_id, created=created.timestamp(), amount=int(amount * 100),
+                payment_status='unpaid' if unpaid else 'paid', status='expired' if unpaid else 'complete',
+            )
+        self.stdout.write(f"Stripe stub on {stub.url} with {len(stub.sessions)} session(s). Ctrl+C to stop.")
+        try:
+            stub.serve()
+        except KeyboardInterrupt:
+            self.stdout.write(f"Served {stub.requests} request(s).")
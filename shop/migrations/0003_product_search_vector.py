@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:23
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# GIN indexes are PostgreSQL-only, so they're created here rather than in
+# Product.Meta to keep SQLite test databases migratable.
+POSTGRES_FORWARD = [
+    "CREATE INDEX IF NOT EXISTS shop_product_search_vector_gin "
+    "ON shop_product USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS shop_product_name_trgm_gin "
+    "ON shop_product USING gin (name gin_trgm_ops)",
+    "UPDATE shop_product SET search_vector = "
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS shop_product_name_trgm_gin",
+    "DROP INDEX IF EXISTS shop_product_search_vector_gin",
+]
+
+
+def _run_postgres(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0002_alter_orderstatuslog_options_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(_run_postgres(POSTGRES_FORWARD), _run_postgres(POSTGRES_BACKWARD)),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0006_stockreservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlashSale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('admissions_per_second', models.PositiveIntegerField(default=50)),
+                ('max_per_order', models.PositiveIntegerField(default=2)),
+                ('shard_count', models.PositiveSmallIntegerField(default=8)),
+                ('is_running', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flash_sales', to='shop.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FlashSaleShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('stock', models.PositiveIntegerField(default=0)),
+                ('sale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='shop.flashsale')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='stockreservation',
+            name='shard',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservations', to='shop.flashsaleshard'),
+        ),
+        migrations.AddIndex(
+            model_name='flashsale',
+            index=models.Index(fields=['product', 'is_running'], name='shop_flashsale_running_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='flashsaleshard',
+            unique_together={('sale', 'index')},
+        ),
+    ]
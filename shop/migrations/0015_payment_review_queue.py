@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:52
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_submitted_at(apps, schema_editor):
+    # Best available guess for proofs submitted before the field existed.
+    Payment = apps.get_model('shop', 'Payment')
+    Payment.objects.filter(submitted_at__isnull=True).exclude(proof_image='').exclude(
+        proof_image__isnull=True,
+    ).update(submitted_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0014_stripe_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='proof_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='payment_proofs/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_submitted_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'submitted_at', 'id'], name='shop_payment_review_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def delete_guest_carts(apps, schema_editor):
+    # Guest carts were never reachable from the UI; nothing to migrate.
+    Cart = apps.get_model('shop', 'Cart')
+    Cart.objects.filter(user__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0015_payment_review_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_guest_carts, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cart',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cart', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
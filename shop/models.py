@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 import uuid
 
 
@@ -13,10 +14,52 @@ class Product(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by shop.signals on PostgreSQL; see shop/search.py.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Catalog keyset pagination: WHERE is_active ORDER BY created_at DESC, id DESC
+            models.Index(fields=['is_active', '-created_at', '-id'], name='shop_product_catalog_idx'),
+            # Price range filters/sorts and per-seller facets (shop/facets.py)
+            models.Index(fields=['is_active', 'price', 'id'], name='shop_product_price_idx'),
+            models.Index(fields=['is_active', 'seller', '-created_at'], name='shop_product_seller_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def available_stock(self):
+        """Stock plus whatever a running flash sale holds (``flash_stock`` annotation)."""
+        return self.stock + (getattr(self, 'flash_stock', None) or 0)
+
+
+class Cart(models.Model):
+    """Server-side cart; one per user (shopping requires an account)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Cart #{self.pk} ({self.user.username})"
+
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='cart_items')
+    quantity = models.PositiveIntegerField(default=1)
+    # Price when the buyer last saw it; revalidation reports changes against it.
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('cart', 'product')
+        ordering = ['added_at', 'id']
+
+    def __str__(self):
+        return f"{self.quantity}x product #{self.product_id}"
+
 
 ORDER_STATUS_CHOICES = [
     ('pending',   'Pending'),
@@ -56,6 +99,12 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Admin order listing (dashboard/listing.py) and exports
+            models.Index(fields=['-created_at', '-id'], name='shop_order_created_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.order_number:
             self.order_number = 'BC-' + str(uuid.uuid4()).upper()[:8]
@@ -131,13 +180,203 @@ class Payment(models.Model):
     status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     proof_image = models.ImageField(upload_to='payment_proofs/', blank=True, null=True)
+    # Small JPEG of proof_image for the sellers' review queue (shop/images.py).
+    proof_thumbnail = models.ImageField(upload_to='payment_proofs/thumbs/', blank=True, null=True)
     reference_number = models.CharField(max_length=100, blank=True)
     sender_name = models.CharField(max_length=100, blank=True)
     stripe_session_id = models.CharField(max_length=200, blank=True)
     stripe_payment_intent = models.CharField(max_length=200, blank=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
     paid_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # The review queue: submitted proofs, oldest first.
+            models.Index(fields=['status', 'submitted_at', 'id'], name='shop_payment_review_idx'),
+        ]
+
+    def __str__(self):
+        return f"Payment for {self.order.order_number} — {self.method} — {self.status}"
+
+
+RESERVATION_STATUS_CHOICES = [
+    ('held',      'Held'),
+    ('committed', 'Committed'),
+    ('released',  'Released'),
+]
+
+
+class FlashSale(models.Model):
+    """
+    A high-demand sale on one product. While ``is_running``, the product's
+    stock lives in ``FlashSaleShard`` rows instead of Product.stock, and
+    checkouts are admitted at ``admissions_per_second``. See shop/flash_sales.py.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='flash_sales')
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    admissions_per_second = models.PositiveIntegerField(default=50)
+    max_per_order = models.PositiveIntegerField(default=2)
+    shard_count = models.PositiveSmallIntegerField(default=8)
+    is_running = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'is_running'], name='shop_flashsale_running_idx'),
+        ]
+
+    def __str__(self):
+        return f"Flash sale #{self.pk} on {self.product}"
+
+
+class FlashSaleShard(models.Model):
+    sale = models.ForeignKey(FlashSale, on_delete=models.CASCADE, related_name='shards')
+    index = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('sale', 'index')
+
+    def __str__(self):
+        return f"{self.sale} shard {self.index}: {self.stock}"
+
+
+class StockReservation(models.Model):
+    """
+    Stock taken out of Product.stock for one order item at checkout.
+    Held until the item is delivered (committed) or cancelled / left unpaid
+    past ``expires_at`` (released back to Product.stock). See shop/reservations.py.
+    """
+    order_item = models.OneToOneField(OrderItem, on_delete=models.CASCADE, related_name='reservation')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    # Set when the stock came from a flash-sale shard rather than Product.stock.
+    shard = models.ForeignKey(FlashSaleShard, on_delete=models.SET_NULL, null=True, blank=True, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=RESERVATION_STATUS_CHOICES, default='held')
+    # Cleared once the order is paid or payment is arranged (COD / proof submitted).
+    expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='shop_reservation_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity}x product #{self.product_id} ({self.status})"
+
+
+class SellerDailySales(models.Model):
+    """
+    One row per seller per day: units, revenue and distinct orders for items
+    that weren't cancelled or refunded. Maintained incrementally by
+    shop/rollups.py; rebuild with ``manage.py backfill_sales_rollup``.
+    """
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_sales')
+    day = models.DateField()
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('seller', 'day')
+
+    def __str__(self):
+        return f"{self.seller} {self.day}: {self.units} units"
+
+
+class ProductDailySales(models.Model):
+    """Same as SellerDailySales, broken down by product."""
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_product_sales')
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name='daily_sales')
+    day = models.DateField()
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('seller', 'product', 'day')
+
+    def __str__(self):
+        return f"{self.product} {self.day}: {self.units} units"
+
+
+class Invoice(models.Model):
+    """
+    The invoice PDF for an order, rendered once (shop/invoices.py) and
+    reused for the invoice email and every later download.
+    """
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='invoice')
+    pdf = models.BinaryField()
+    sha256 = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Invoice for order #{self.order_id}"
+
+
+class SellerStatement(models.Model):
+    """
+    A seller's monthly statement (PDF and CSV), built by shop/statements.py.
+    ``digest`` hashes the statement's contents; regenerating a month skips
+    sellers whose digest hasn't changed.
+    """
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='statements')
+    month = models.DateField(help_text="First day of the statement month.")
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    gross = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    reversed = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    digest = models.CharField(max_length=64)
+    pdf = models.BinaryField()
+    csv = models.BinaryField()
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('seller', 'month')
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"{self.seller} {self.month:%Y-%m}"
+
+
+class StripeEvent(models.Model):
+    """
+    A Stripe webhook event, stored once per Stripe event id (Stripe retries
+    deliveries) and applied by the ``shop.apply_stripe_event`` job.
+    """
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-received_at']
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id}"
+
+
+class StripeCheckpoint(models.Model):
+    """
+    Progress of a Stripe reconciliation pass (shop/reconciliation.py): the
+    ``created`` window being scanned, the last session id handled within it
+    (so an interrupted run resumes), and how far the last finished pass got.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    window_start = models.DateTimeField(null=True, blank=True)
+    window_end = models.DateTimeField(null=True, blank=True)
+    cursor = models.CharField(max_length=255, blank=True)
+    completed_until = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"Payment for {self.order.order_number} — {self.method} — {self.status}"
\ No newline at end of file
+        return self.name
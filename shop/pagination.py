@@ -0,0 +1,138 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are fetched with ``WHERE (a, b) < (last_a, last_b) ORDER BY a, b LIMIT n``
+instead of OFFSET, so page N costs the same as page 1 as long as the ordering
+is backed by an index. The cursor is the signed list of ordering values of the
+last row on the page.
+"""
+import datetime
+import decimal
+from functools import reduce
+from operator import or_
+
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = 'shop.pagination.cursor'
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 96
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def clamp_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def _to_json(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()  # keeps microseconds, unlike DjangoJSONEncoder
+    if isinstance(value, (datetime.date, decimal.Decimal)):
+        return str(value)
+    return value
+
+
+def encode_cursor(ordering, values):
+    payload = {'o': list(ordering), 'v': [_to_json(v) for v in values]}
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, ordering):
+    try:
+        payload = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidCursor('Invalid cursor.')
+    # A cursor from another sort order would compare the wrong columns.
+    if not isinstance(payload, dict) or payload.get('o') != list(ordering):
+        raise InvalidCursor('Cursor does not match this listing.')
+    return payload['v']
+
+
+def _after(ordering, values):
+    """
+    Row-value comparison spelled out as OR-ed prefixes, which every backend
+    can plan against a composite index:
+      a < x OR (a = x AND b < y) ...
+    """
+    clauses = []
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        op = 'lt' if field.startswith('-') else 'gt'
+        eq = {f.lstrip('-'): v for f, v in zip(ordering[:i], values[:i])}
+        clauses.append(Q(**eq, **{f'{name}__{op}': values[i]}))
+    return reduce(or_, clauses)
+
+
+def _fetch(queryset, ordering, values, limit):
+    qs = queryset.order_by(*ordering)
+    if values is not None:
+        qs = qs.filter(_after(ordering, values))
+    return list(qs[:limit])
+
+
+def _page(rows, ordering, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(ordering, [getattr(last, f.lstrip('-')) for f in ordering])
+    return KeysetPage(rows, next_cursor)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns a ``KeysetPage`` of ``queryset`` ordered by ``ordering`` (field
+    names, ``-`` for descending). The last field must be unique, normally
+    ``id``. Raises ``InvalidCursor`` for tampered or foreign cursors.
+    """
+    ordering = tuple(ordering)
+    values = decode_cursor(cursor, ordering) if cursor else None
+    return _page(_fetch(queryset, ordering, values, page_size + 1), ordering, page_size)
+
+
+def keyset_paginate_union(querysets, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Like ``keyset_paginate`` over the union of ``querysets``, for listings
+    whose filter is an OR of conditions that each have their own index
+    (``WHERE a = x OR b = x`` can use neither). Each queryset is paged on its
+    own, LIMITed to a page, and the results are merged in Python; rows that
+    appear in more than one are kept once.
+    """
+    ordering = tuple(ordering)
+    values = decode_cursor(cursor, ordering) if cursor else None
+    rows = {}
+    for queryset in querysets:
+        for row in _fetch(queryset, ordering, values, page_size + 1):
+            rows[row.pk] = row
+    rows = list(rows.values())
+    # Stable sorts from the last key to the first give the combined order.
+    for field in reversed(ordering):
+        rows.sort(key=lambda row: getattr(row, field.lstrip('-')), reverse=field.startswith('-'))
+    return _page(rows[:page_size + 1], ordering, page_size)
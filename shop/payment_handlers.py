@@ -1,17 +1,42 @@
 import logging
 from django.conf import settings
 
+from ecommerce import outbound
+
 logger = logging.getLogger(__name__)
 
 
+def stripe_api():
+    """
+    The configured ``stripe`` module. Its HTTP client shares one pooled
+    session with the timeouts from OUTBOUND_CALLS['stripe']; call it through
+    ``outbound.call('stripe', ...)``.
+    """
+    import stripe
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    if settings.STRIPE_API_BASE:
+        stripe.api_base = settings.STRIPE_API_BASE
+    if not isinstance(stripe.default_http_client, stripe.RequestsClient):
+        stripe.default_http_client = stripe.RequestsClient(
+            timeout=outbound.timeout('stripe'), session=outbound.session('stripe'),
+        )
+        # The circuit breaker decides when to try again, not the client.
+        stripe.max_network_retries = 0
+    return stripe
+
+
+def stripe_client_errors(stripe):
+    """Stripe errors caused by the request, not by Stripe being unwell."""
+    return (stripe.InvalidRequestError, stripe.CardError)
+
+
 def create_stripe_session(order, success_url=None, cancel_url=None):
     """
     Creates a Stripe Checkout Session.
     Returns (session_url, session_id, error)
     """
     try:
-        import stripe
-        stripe.api_key = settings.STRIPE_SECRET_KEY
+        stripe = stripe_api()
 
         site_url = getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000')
 
@@ -34,7 +59,9 @@ def create_stripe_session(order, success_url=None, cancel_url=None):
                 'quantity': item.quantity,
             })
 
-        session = stripe.checkout.Session.create(
+        session = outbound.call(
+            'stripe', stripe.checkout.Session.create,
+            ignore=stripe_client_errors(stripe),
             payment_method_types=['card'],
             line_items=line_items,
             mode='payment',
@@ -47,20 +74,10 @@ def create_stripe_session(order, success_url=None, cancel_url=None):
         )
         return session.url, session.id, None
 
+    except outbound.Unavailable as e:
+        logger.warning(f"Stripe session not created: {e}")
+        return None, None, "card payments are temporarily unavailable, please try again shortly"
     except Exception as e:
         logger.error(f"Stripe session error: {e}")
         return None, None, str(e)
 
-
-def verify_stripe_session(session_id):
-    """
-    Returns 'paid', 'unpaid', or 'error'
-    """
-    try:
-        import stripe
-        stripe.api_key = settings.STRIPE_SECRET_KEY
-        session = stripe.checkout.Session.retrieve(session_id)
-        return session.payment_status
-    except Exception as e:
-        logger.error(f"Stripe verify error: {e}")
-        return 'error'
\ No newline at end of file
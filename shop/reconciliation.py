@@ -0,0 +1,171 @@
+"""
+Stripe payment reconciliation.
+
+The webhook (shop/stripe_events.py) normally confirms Stripe payments, but
+a missed or misconfigured webhook leaves payments ``pending``. ``reconcile``
+pages through Checkout Sessions created in a time window with
+``Session.list`` (PAGE_SIZE per request) and settles every page in one
+transaction:
+
+* paid sessions confirm their pending Payment (matched by session id, or by
+  the order id in the session metadata for an earlier session of the same
+  order) and move pending orders to ``confirmed``, all with set-based
+  UPDATEs, one bulk insert of OrderStatusLog rows and one of notifications;
+* expired, unpaid sessions mark their pending Payment ``failed``.
+
+After each page the checkpoint records the last session id, so an
+interrupted run resumes where it stopped. A finished pass records its end;
+the next pass starts OVERLAP before it to catch sessions paid late.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, CharField, Q, Value, When
+from django.utils import timezone
+
+from ecommerce import outbound
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 100
+DEFAULT_LOOKBACK = timedelta(days=7)
+OVERLAP = timedelta(hours=1)
+CHECKPOINT = 'stripe-sessions'
+
+
+def _timestamp(value):
+    return int(value.timestamp())
+
+
+def settle(sessions, now=None):
+    """
+    Applies one page of Checkout Sessions (plain dicts). Returns
+    ``(confirmed, flagged, failed)`` counts.
+    """
+    from notifications.utils import create_notifications
+    from .models import Order, OrderStatusLog, Payment
+    from .reservations import secure_orders
+
+    now = now or timezone.now()
+    paid = {s['id']: s for s in sessions if s['payment_status'] == 'paid'}
+    paid_orders = {}
+    for s in paid.values():
+        order_id = (s.get('metadata') or {}).get('order_id') or ''
+        if order_id.isdigit():
+            paid_orders.setdefault(int(order_id), s)
+    expired = [s['id'] for s in sessions if s.get('status') == 'expired' and s['payment_status'] != 'paid']
+
+    with transaction.atomic():
+        matches = {}
+        pending = (
+            Payment.objects.select_for_update()
+            .filter(Q(stripe_session_id__in=list(paid)) | Q(order_id__in=list(paid_orders)), status='pending')
+            .values_list('pk', 'order_id', 'stripe_session_id')
+        )
+        for pk, order_id, session_id in pending:
+            matches[pk] = (order_id, paid.get(session_id) or paid_orders[order_id])
+
+        confirmed = flagged = 0
+        if matches:
+            Payment.objects.filter(pk__in=list(matches)).update(
+                method='stripe',
+                status='confirmed',
+                paid_at=now,
+                updated_at=now,
+                stripe_session_id=Case(
+                    *[When(pk=pk, then=Value(s['id'])) for pk, (_, s) in matches.items()],
+                    output_field=CharField(),
+                ),
+                stripe_payment_intent=Case(
+                    *[When(pk=pk, then=Value(s.get('payment_intent') or '')) for pk, (_, s) in matches.items()],
+                    output_field=CharField(),
+                ),
+            )
+
+            orders = list(
+                Order.objects.select_for_update()
+                .filter(pk__in=[order_id for order_id, _ in matches.values()])
+                .values_list('pk', 'status', 'buyer_id', 'order_number')
+            )
+            to_confirm = [order for order in orders if order[1] == 'pending']
+            Order.objects.filter(pk__in=[pk for pk, *_ in to_confirm]).update(status='confirmed')
+            secure_orders([pk for pk, *_ in to_confirm])
+
+            OrderStatusLog.objects.bulk_create([
+                OrderStatusLog(
+                    order_id=pk, changed_by=None, old_status=status,
+                    new_status='confirmed' if status == 'pending' else status,
+                    note=(
+                        'Payment confirmed by Stripe reconciliation.' if status == 'pending' else
+                        'Stripe payment found by reconciliation while the order was not pending; '
+                        'check whether a refund is needed.'
+                    ),
+                )
+                for pk, status, _, _ in orders
+            ])
+            create_notifications([
+                {
+                    'recipient_id': buyer_id,
+                    'notif_type': 'order',
+                    'message': f"Stripe payment confirmed for order {number}!",
+                    'link': f"/shop/order/{pk}/",
+                }
+                for pk, _, buyer_id, number in to_confirm
+            ])
+            confirmed, flagged = len(to_confirm), len(orders) - len(to_confirm)
+
+        failed = Payment.objects.filter(stripe_session_id__in=expired, status='pending').update(
+            status='failed', updated_at=now,
+        ) if expired else 0
+    return confirmed, flagged, failed
+
+
+def reconcile(since=None, now=None, page_size=PAGE_SIZE, log=None):
+    """
+    Runs (or resumes) a reconciliation pass. ``since`` overrides where a new
+    pass starts. Returns a dict of counts.
+    """
+    from .models import StripeCheckpoint
+    from .payment_handlers import stripe_api
+
+    stripe = stripe_api()
+    now = now or timezone.now()
+    checkpoint, _ = StripeCheckpoint.objects.get_or_create(name=CHECKPOINT)
+    if checkpoint.cursor and since is None:
+        if log:
+            log(f"Resuming after {checkpoint.cursor}.")
+    else:
+        if since is None:
+            since = checkpoint.completed_until - OVERLAP if checkpoint.completed_until else now - DEFAULT_LOOKBACK
+        checkpoint.window_start, checkpoint.window_end, checkpoint.cursor = since, now, ''
+        checkpoint.save()
+
+    stats = {'pages': 0, 'sessions': 0, 'confirmed': 0, 'flagged': 0, 'failed': 0}
+    params = {
+        'limit': page_size,
+        'created': {'gte': _timestamp(checkpoint.window_start), 'lte': _timestamp(checkpoint.window_end)},
+    }
+    while True:
+        if checkpoint.cursor:
+            params['starting_after'] = checkpoint.cursor
+        page = outbound.call('stripe', stripe.checkout.Session.list, **params)
+        sessions = [session.to_dict() for session in page.data]
+        confirmed, flagged, failed = settle(sessions, now)
+        stats['pages'] += 1
+        stats['sessions'] += len(sessions)
+        stats['confirmed'] += confirmed
+        stats['flagged'] += flagged
+        stats['failed'] += failed
+        if log:
+            log(f"  page {stats['pages']}: {len(sessions)} session(s), {confirmed} confirmed, {failed} failed")
+        if not sessions or not page.has_more:
+            break
+        checkpoint.cursor = sessions[-1]['id']
+        checkpoint.save(update_fields=['cursor', 'updated_at'])
+
+    checkpoint.completed_until = checkpoint.window_end
+    checkpoint.cursor = ''
+    checkpoint.save(update_fields=['completed_until', 'cursor', 'updated_at'])
+    return stats
+
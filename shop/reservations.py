@@ -0,0 +1,249 @@
+"""
+Stock reservations.
+
+``Product.stock`` is the stock still available to buy. Checkout locks the
+ordered products' rows, checks them, and takes the ordered quantities out
+in a single UPDATE (``stock = stock - n``), so concurrent buyers queue on
+the row locks and can never oversell. Each order item gets a
+``StockReservation`` that is then:
+
+* committed when the item is delivered (stock already gone, nothing to do),
+* released when the item/order is cancelled, or when the order is left
+  unpaid past ``settings.STOCK_HOLD_MINUTES`` (``release_expired``).
+
+Products in a running flash sale take and return stock through
+shop/flash_sales.py instead of Product.stock.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RELEASE_STATUSES = ('cancelled', 'refunded')
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(minutes=getattr(settings, 'STOCK_HOLD_MINUTES', 30))
+
+
+def _stock_case(quantities, sign):
+    return Case(
+        *[When(pk=pid, then=F('stock') + sign * qty) for pid, qty in quantities.items()],
+        default=F('stock'),
+        output_field=IntegerField(),
+    )
+
+
+def take_stock(quantities, sales=None):
+    """
+    Takes ``{product_id: qty}`` out of available stock. Products in a running
+    flash sale (``sales``: ``{product_id: FlashSale}``) are taken from one of
+    the sale's shards instead; everything else in one UPDATE.
+
+    All-or-nothing. Returns ``(short, shards)``: the ids of products that
+    didn't have enough (empty on success) and ``{product_id: shard_id}``
+    for lines served from a flash-sale shard.
+    """
+    from .flash_sales import take_from_shards
+    from .models import Product
+
+    sales = sales or {}
+    regular = {pid: qty for pid, qty in quantities.items() if pid not in sales}
+    shards = {}
+    short = []
+
+    with transaction.atomic():
+        if regular:
+            # Lock the rows (in pk order, so concurrent checkouts can't
+            # deadlock) and decide from what the lock returned; the UPDATE
+            # then can't find less stock than we checked.
+            available = dict(
+                Product.objects.select_for_update().filter(pk__in=list(regular))
+                .order_by('pk').values_list('pk', 'stock')
+            )
+            short = [pid for pid, qty in regular.items() if available.get(pid, 0) < qty]
+            if not short:
+                Product.objects.filter(pk__in=list(regular)).update(stock=_stock_case(regular, -1))
+
+        if not short:
+            for pid, sale in sales.items():
+                if pid not in quantities:
+                    continue
+                shard_id = take_from_shards(sale, quantities[pid])
+                if shard_id is None:
+                    short.append(pid)
+                    break
+                shards[pid] = shard_id
+
+        if short:
+            transaction.set_rollback(True)
+            return short, {}
+    return [], shards
+
+
+def give_back_stock(quantities):
+    """Returns ``{product_id: qty}`` to available stock in one UPDATE."""
+    from .models import Product
+
+    if quantities:
+        Product.objects.filter(pk__in=list(quantities)).update(stock=_stock_case(quantities, 1))
+
+
+def create_holds(items, shards=None, expires_at=None):
+    """
+    Bulk-creates held reservations for freshly created order items.
+    ``shards`` is the ``{product_id: shard_id}`` map from ``take_stock``.
+    """
+    from .models import StockReservation
+
+    shards = shards or {}
+    expires_at = expires_at or hold_expiry()
+    StockReservation.objects.bulk_create([
+        StockReservation(
+            order_item=item,
+            product_id=item.product_id,
+            shard_id=shards.get(item.product_id),
+            quantity=item.quantity,
+            status='held',
+            expires_at=expires_at,
+        )
+        for item in items
+    ])
+
+
+def secure_order(order):
+    """Payment arranged or received: the order's holds no longer expire."""
+    secure_orders([order.pk])
+
+
+def secure_orders(order_ids):
+    """``secure_order`` for many orders in one statement."""
+    from .models import StockReservation
+
+    StockReservation.objects.filter(order_item__order_id__in=order_ids, status='held').update(expires_at=None)
+
+
+def commit_items(item_ids):
+    """
+    Items delivered. Their reserved stock is already gone, so the holds are
+    just marked committed. Orders placed before reservations existed have no
+    hold; their stock is deducted here with an atomic, floor-at-zero
+    decrement per product.
+    """
+    from .models import OrderItem, Product, StockReservation
+
+    item_ids = list(item_ids)
+    StockReservation.objects.filter(order_item_id__in=item_ids, status='held').update(
+        status='committed', expires_at=None, updated_at=timezone.now(),
+    )
+
+    legacy = defaultdict(int)
+    rows = (
+        OrderItem.objects.filter(pk__in=item_ids, reservation__isnull=True, product__isnull=False)
+        .values_list('product_id', 'quantity')
+    )
+    for product_id, qty in rows:
+        legacy[product_id] += qty
+    for product_id, qty in legacy.items():
+        Product.objects.filter(pk=product_id).update(
+            stock=Greatest(F('stock') - qty, 0, output_field=IntegerField()),
+        )
+
+
+def release_items(item_ids):
+    """
+    Releases held stock for the given order items. Safe to call twice: only
+    rows still ``held`` are touched, and those are claimed with
+    ``select_for_update`` so two releases can't both give stock back.
+    """
+    from .flash_sales import give_back_to_shards
+    from .models import StockReservation
+
+    with transaction.atomic():
+        holds = list(
+            StockReservation.objects.select_for_update(of=('self',))
+            .filter(order_item_id__in=list(item_ids), status='held')
+            .values_list('pk', 'product_id', 'quantity', 'shard_id', 'shard__sale__is_running')
+        )
+        if not holds:
+            return 0
+
+        # Stock from a flash sale that has since ended goes to the product.
+        to_products = defaultdict(int)
+        to_shards = defaultdict(int)
+        for _, product_id, qty, shard_id, sale_running in holds:
+            if shard_id and sale_running:
+                to_shards[shard_id] += qty
+            else:
+                to_products[product_id] += qty
+
+        StockReservation.objects.filter(pk__in=[h[0] for h in holds]).update(
+            status='released', expires_at=None, updated_at=timezone.now(),
+        )
+        give_back_stock(to_products)
+        give_back_to_shards(to_shards)
+    return len(holds)
+
+
+def release_expired(now=None, batch_size=500):
+    """
+    Cancels unpaid orders whose holds have expired and gives their stock
+    back. Returns the number of orders cancelled.
+    """
+    from .models import Order, OrderItem, OrderStatusLog, StockReservation
+    from .rollups import record_status_change
+
+    now = now or timezone.now()
+    cancelled = 0
+    while True:
+        order_ids = list(
+            StockReservation.objects
+            .filter(status='held', expires_at__lt=now)
+            .values_list('order_item__order_id', flat=True)
+            .distinct()[:batch_size]
+        )
+        if not order_ids:
+            return cancelled
+
+        with transaction.atomic():
+            orders = list(
+                Order.objects.select_for_update()
+                .filter(pk__in=order_ids, status='pending')
+                .only('pk', 'status')
+            )
+            pending_ids = [o.pk for o in orders]
+
+            # Orders that moved on (e.g. confirmed by staff) keep their stock.
+            StockReservation.objects.filter(
+                order_item__order_id__in=set(order_ids) - set(pending_ids), status='held',
+            ).update(expires_at=None)
+
+            items = list(
+                OrderItem.objects.filter(order_id__in=pending_ids)
+                .exclude(status='cancelled')
+                .values_list('pk', 'status')
+            )
+            release_items([pk for pk, _ in items])
+
+            OrderItem.objects.filter(order_id__in=pending_ids).update(status='cancelled')
+            record_status_change(items, 'cancelled')
+            Order.objects.filter(pk__in=pending_ids).update(status='cancelled', updated_at=now)
+            OrderStatusLog.objects.bulk_create([
+                OrderStatusLog(
+                    order_id=pk,
+                    changed_by=None,
+                    old_status='pending',
+                    new_status='cancelled',
+                    note='Order cancelled: payment not received in time, reserved stock released.',
+                )
+                for pk in pending_ids
+            ])
+        cancelled += len(pending_ids)
+        logger.info(f"Released expired stock holds for {len(order_ids)} orders.")
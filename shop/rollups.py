@@ -0,0 +1,186 @@
+"""
+Daily sales rollups.
+
+SellerDailySales / ProductDailySales keep running totals of units, revenue
+and orders per day, so seller reports and dashboards read a few dozen rows
+instead of every OrderItem the seller has ever sold. The tables are updated
+in the same transaction as the change that moves the numbers:
+
+* ``record_order`` when an order is placed;
+* ``record_status_change`` when items move into or out of a cancelled /
+  refunded status.
+
+Each update is a single ``INSERT ... ON CONFLICT DO UPDATE`` per table that
+adds the deltas to the existing row (PostgreSQL and SQLite both support it).
+Days are local dates (settings.TIME_ZONE) of the order's ``created_at``.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .reservations import RELEASE_STATUSES
+
+
+def counts_as_sale(status):
+    return status not in RELEASE_STATUSES
+
+
+def _upsert(model, keys, deltas):
+    """``deltas`` maps key tuples to ``[units, revenue, order_count]``."""
+    if not deltas:
+        return
+    fields = [model._meta.get_field(name) for name in keys + ['units', 'revenue', 'order_count', 'updated_at']]
+    now = timezone.now()
+    params = []
+    for key, (units, revenue, orders) in deltas.items():
+        for field, value in zip(fields, key + (units, revenue, orders, now)):
+            params.append(field.get_db_prep_save(value, connection))
+
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = ', '.join(qn(f.column) for f in fields)
+    row = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    sql = (
+        f"INSERT INTO {table} ({columns}) VALUES {', '.join([row] * len(deltas))} "
+        f"ON CONFLICT ({', '.join(qn(f.column) for f in fields[:len(keys)])}) DO UPDATE SET "
+        f"units = {table}.units + EXCLUDED.units, "
+        f"revenue = {table}.revenue + EXCLUDED.revenue, "
+        f"order_count = {table}.order_count + EXCLUDED.order_count, "
+        f"updated_at = EXCLUDED.updated_at"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _apply(lines, sign, seller_orders):
+    """
+    ``lines`` are dicts with order_id, created_at, seller_id, product_id,
+    quantity and unit_price. ``seller_orders`` is the set of (order_id,
+    seller_id) pairs whose seller-level order count should move.
+    """
+    per_seller, per_product = {}, {}
+    counted = set()
+    for line in lines:
+        if line['seller_id'] is None:
+            continue
+        day = timezone.localdate(line['created_at'])
+        units = sign * line['quantity']
+        revenue = sign * line['quantity'] * line['unit_price']
+
+        row = per_seller.setdefault((line['seller_id'], day), [0, Decimal('0'), 0])
+        row[0] += units
+        row[1] += revenue
+        pair = (line['order_id'], line['seller_id'])
+        if pair in seller_orders and pair not in counted:
+            counted.add(pair)
+            row[2] += sign
+
+        if line['product_id'] is not None:
+            # An order has one line per product, so every line is one order.
+            row = per_product.setdefault((line['seller_id'], line['product_id'], day), [0, Decimal('0'), 0])
+            row[0] += units
+            row[1] += revenue
+            row[2] += sign
+
+    from .models import ProductDailySales, SellerDailySales
+    _upsert(SellerDailySales, ['seller', 'day'], per_seller)
+    _upsert(ProductDailySales, ['seller', 'product', 'day'], per_product)
+
+
+def record_order(order, items):
+    """Adds a newly placed order's items to the rollups."""
+    lines = [
+        {'order_id': order.pk, 'created_at': order.created_at, 'seller_id': item.seller_id,
+         'product_id': item.product_id, 'quantity': item.quantity, 'unit_price': item.unit_price}
+        for item in items
+    ]
+    _apply(lines, 1, {(order.pk, line['seller_id']) for line in lines})
+
+
+def record_status_change(changes, new_status):
+    """
+    ``changes`` is ``[(item_id, old_status), ...]`` for items that just moved
+    to ``new_status``. Items leaving a counted status are subtracted, items
+    coming back (e.g. a cancellation undone) are added again. A seller's
+    order count only moves when the order has no other counted items of
+    theirs. Call inside the transaction that changed the statuses.
+    """
+    from .models import OrderItem
+
+    now_counted = counts_as_sale(new_status)
+    item_ids = [pk for pk, old in changes if counts_as_sale(old) != now_counted]
+    if not item_ids:
+        return
+
+    lines = list(
+        OrderItem.objects.filter(pk__in=item_ids)
+        .values('order_id', 'seller_id', 'product_id', 'quantity', 'unit_price', created_at=F('order__created_at'))
+    )
+    pairs = {(line['order_id'], line['seller_id']) for line in lines}
+    still_counted = set(
+        OrderItem.objects
+        .filter(order_id__in=[o for o, _ in pairs], seller_id__in=[s for _, s in pairs])
+        .exclude(pk__in=item_ids)
+        .exclude(status__in=RELEASE_STATUSES)
+        .values_list('order_id', 'seller_id')
+        .distinct()
+    )
+    _apply(lines, 1 if now_counted else -1, pairs - still_counted)
+
+
+# ── reading ──────────────────────────────────────────────────────────────
+
+def seller_totals(seller, since=None):
+    """``{'units', 'revenue', 'orders'}`` for the seller, optionally from ``since`` (a date)."""
+    from .models import SellerDailySales
+
+    rows = SellerDailySales.objects.filter(seller=seller)
+    if since is not None:
+        rows = rows.filter(day__gte=since)
+    totals = rows.aggregate(units=Sum('units'), revenue=Sum('revenue'), orders=Sum('order_count'))
+    return {
+        'units': totals['units'] or 0,
+        'revenue': totals['revenue'] or Decimal('0'),
+        'orders': totals['orders'] or 0,
+    }
+
+
+def daily_series(seller, days=30, today=None):
+    """The last ``days`` days as ``[{'day', 'units', 'revenue', 'orders'}]``, zero-filled."""
+    from .models import SellerDailySales
+
+    today = today or timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = {
+        r['day']: r for r in
+        SellerDailySales.objects.filter(seller=seller, day__gte=start, day__lte=today)
+        .values('day', 'units', 'revenue', 'order_count')
+    }
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day, {})
+        series.append({
+            'day': day,
+            'units': row.get('units', 0),
+            'revenue': row.get('revenue', Decimal('0')),
+            'orders': row.get('order_count', 0),
+        })
+    return series
+
+
+def top_products(seller, since=None, limit=10):
+    from .models import ProductDailySales
+
+    rows = ProductDailySales.objects.filter(seller=seller)
+    if since is not None:
+        rows = rows.filter(day__gte=since)
+    return list(
+        rows.values('product_id', 'product__name')
+        .annotate(units=Sum('units'), revenue=Sum('revenue'), orders=Sum('order_count'))
+        .filter(units__gt=0)
+        .order_by('-revenue')[:limit]
+    )
@@ -0,0 +1,152 @@
+"""
+Product search.
+
+On PostgreSQL every product carries a ``search_vector`` (name weighted A,
+description weighted B) kept up to date by ``shop.signals`` and backed by a
+GIN index, plus a trigram GIN index on ``name`` for typo-tolerant matches.
+
+Other databases (SQLite test runs) use a pure-Python ranker with the same
+behaviour: every query word must match, words match by prefix, and close
+misspellings still count.
+"""
+import re
+from difflib import SequenceMatcher
+
+from django.db import connection
+from django.db.models import Case, DecimalField, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = 'simple'
+MAX_QUERY_TERMS = 8
+
+# Minimum trigram word similarity for a misspelled name to still match
+# (pg_trgm.word_similarity_threshold, used by the indexed %> operator).
+TRIGRAM_THRESHOLD = 0.3
+
+# Fallback ranker weights.
+NAME_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+FUZZY_RATIO = 0.75
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return [t.lower() for t in _TOKEN_RE.findall(text or '')]
+
+
+def search_vector_expression():
+    from django.contrib.postgres.search import SearchVector
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG) +
+        SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def refresh_search_vector(queryset):
+    """
+    Recomputes ``search_vector`` for the given products in one UPDATE.
+    No-op outside PostgreSQL.
+    """
+    if connection.vendor != 'postgresql':
+        return 0
+    return queryset.update(search_vector=search_vector_expression())
+
+
+def search_products(queryset, query):
+    """
+    Filters ``queryset`` down to products matching ``query`` and annotates
+    each with a ``rank`` (higher is better). Callers order by ``-rank``.
+    """
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        return _search_postgres(queryset, terms)
+    return _search_python(queryset, terms)
+
+
+def _search_postgres(queryset, terms):
+    from django.contrib.postgres.search import (
+        SearchQuery, SearchRank, TrigramWordSimilarity,
+    )
+
+    # Prefix match on every term: "wire hea" -> wire:* & hea:*
+    ts_query = SearchQuery(
+        ' & '.join(f'{t}:*' for t in terms),
+        search_type='raw',
+        config=SEARCH_CONFIG,
+    )
+    text = ' '.join(terms)
+
+    # Filter with the %> operator rather than on the similarity value: both
+    # sides of the OR can then use their GIN index, where comparing the
+    # computed similarity means a sequential scan. The similarity only
+    # feeds the rank.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+            [str(TRIGRAM_THRESHOLD)],
+        )
+    # The rank is a keyset pagination column (RELEVANCE_ORDERING). As a
+    # float4 it comes back to Python rounded, so a cursor's "rank = x"
+    # tie-break wouldn't match the row it came from; a fixed-scale numeric
+    # round-trips exactly.
+    rank = SearchRank(F('search_vector'), ts_query) + TrigramWordSimilarity(text, 'name')
+    return (
+        queryset
+        .filter(Q(search_vector=ts_query) | Q(name__trigram_word_similar=text))
+        .annotate(rank=Cast(rank, DecimalField(max_digits=12, decimal_places=6)))
+    )
+
+
+def _term_score(term, words):
+    best = 0.0
+    for w in words:
+        if w == term:
+            return 1.0
+        if w.startswith(term):
+            best = max(best, 0.8)
+        elif abs(len(w) - len(term)) <= 2:
+            ratio = SequenceMatcher(None, term, w).ratio()
+            if ratio >= FUZZY_RATIO:
+                best = max(best, ratio * 0.6)
+    return best
+
+
+def rank_text(terms, name, description):
+    """
+    Scores one product for the fallback ranker. Returns 0 when any term has
+    no match in either field.
+    """
+    name_words = tokenize(name)
+    desc_words = tokenize(description)
+    total = 0.0
+    for term in terms:
+        score = max(
+            _term_score(term, name_words) * NAME_WEIGHT,
+            _term_score(term, desc_words) * DESCRIPTION_WEIGHT,
+        )
+        if not score:
+            return 0.0
+        total += score
+    return total / len(terms)
+
+
+def _search_python(queryset, terms):
+    scores = {}
+    rows = queryset.values_list('pk', 'name', 'description').iterator(chunk_size=2000)
+    for pk, name, description in rows:
+        score = rank_text(terms, name, description)
+        if score:
+            scores[pk] = score
+
+    if not scores:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+    return queryset.filter(pk__in=list(scores)).annotate(rank=Case(
+        *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+        default=Value(0.0),
+        output_field=FloatField(),
+    ))
@@ -1,20 +1,48 @@
-import io
 import logging
 from decimal import Decimal
 
 from django.utils import timezone
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 
+from notifications.email_outbox import queue_email
+
 logger = logging.getLogger(__name__)
 
 
+def parse_cart_lines(cart_items):
+    """
+    Normalises raw cart lines into ``{product_id: quantity}``, merging
+    repeated products. Returns (quantities, errors).
+    """
+    quantities = {}
+    errors = []
+    for ci in cart_items:
+        # Accept different keys: product_id / id / pk
+        pid = ci.get('product_id') or ci.get('id') or ci.get('pk')
+        try:
+            pid = int(pid)
+            qty = max(int(ci.get('quantity', 1) or 1), 1)
+        except (TypeError, ValueError):
+            errors.append(f"Product #{pid} not found.")
+            continue
+        quantities[pid] = quantities.get(pid, 0) + qty
+    return quantities, errors
+
+
 def create_order_from_cart(user, cart_items, shipping_address, notes=''):
     """
-    Creates order. Does NOT deduct stock at this point.
-    Stock is deducted only when seller marks item as delivered.
+    Creates order and reserves its stock (see shop/reservations.py).
+    The hold expires if the order is left unpaid.
+
+    Runs a fixed number of queries whatever the cart size: one fetch of
+    every product, one locked read and one UPDATE reserving all lines, one insert
+    for the order and bulk inserts for the items, holds and log. All line
+    errors are reported together.
     """
+    from .flash_sales import running_sales
     from .models import Order, OrderItem, Product, OrderStatusLog
+    from .reservations import create_holds, take_stock
+    from .rollups import record_order
     from django.db import transaction
 
     if not cart_items:
@@ -24,40 +52,39 @@ def create_order_from_cart(user, cart_items, shipping_address, notes=''):
     if not shipping_address:
         return None, ['Shipping address required.']
 
-    errors = []
-    valid_items = []
-    total = Decimal('0')
-
-    for ci in cart_items:
-        # Accept different keys: product_id / id / pk
-        pid = ci.get('product_id') or ci.get('id') or ci.get('pk')
-        try:
-            product = Product.objects.get(pk=pid, is_active=True)
-        except Exception:
-            errors.append(f"Product #{pid} not found.")
-            continue
-
-        qty = max(int(ci.get('quantity', 1) or 1), 1)
-
-        # Still validate stock (so buyer can’t order beyond available),
-        # but do NOT deduct here.
-        if product.stock < qty:
-            if product.stock == 0:
-                errors.append(f"'{product.name}' is out of stock.")
-            else:
-                errors.append(f"'{product.name}' only has {product.stock} left.")
-            continue
-
-        valid_items.append((product, qty))
-        total += (product.price * qty)
+    quantities, errors = parse_cart_lines(cart_items)
+    if not quantities and not errors:
+        return None, ['No valid products in cart.']
 
+    products = Product.objects.filter(is_active=True).in_bulk(list(quantities))
+    errors += [f"Product #{pid} not found." for pid in quantities if pid not in products]
+    sales = running_sales(products)
+    errors += [
+        f"'{sale.product.name}' is limited to {sale.max_per_order} per order."
+        for pid, sale in sales.items() if quantities[pid] > sale.max_per_order
+    ]
     if errors:
         return None, errors
 
-    if not valid_items:
-        return None, ['No valid products in cart.']
-
     with transaction.atomic():
+        # Locked check and decrement of every line at once. The product rows stay
+        # locked until this transaction commits, so keep the rest of it short.
+        short, shards = take_stock(quantities, sales)
+        if short:
+            fresh = Product.objects.in_bulk(short)
+            for pid in short:
+                product = fresh[pid]
+                if pid in sales:
+                    errors.append(f"'{product.name}' is sold out.")
+                elif product.stock == 0:
+                    errors.append(f"'{product.name}' is out of stock.")
+                else:
+                    errors.append(f"'{product.name}' only has {product.stock} left.")
+            return None, errors
+
+        valid_items = [(products[pid], qty) for pid, qty in quantities.items()]
+        total = sum((product.price * qty for product, qty in valid_items), Decimal('0'))
+
         order = Order.objects.create(
             buyer=user,
             shipping_address=shipping_address,
@@ -66,35 +93,111 @@ def create_order_from_cart(user, cart_items, shipping_address, notes=''):
             status='pending',
         )
 
-        for product, qty in valid_items:
-            OrderItem.objects.create(
+        items = OrderItem.objects.bulk_create([
+            OrderItem(
                 order=order,
                 product=product,
-                seller=product.seller,
+                seller_id=product.seller_id,
                 quantity=qty,
                 unit_price=product.price,
                 product_name=product.name,
                 status='pending',
             )
+            for product, qty in valid_items
+        ])
+        create_holds(items, shards)
+        record_order(order, items)
 
-        # ✅ Correct log fields
-        OrderStatusLog.objects.create(
-            order=order,
-            changed_by=user,
-            old_status=None,
-            new_status='pending',
-            note='Order placed by buyer.',
-        )
+        OrderStatusLog.objects.bulk_create([
+            OrderStatusLog(
+                order=order,
+                changed_by=user,
+                old_status=None,
+                new_status='pending',
+                note='Order placed by buyer.',
+            ),
+        ])
 
     # ✅ IMPORTANT: return values so checkout_submit works correctly
     return order, []
 
 
+# Parent order status follows its most advanced item.
+STATUS_RANK = {
+    'pending': 0,
+    'confirmed': 1,
+    'packed': 2,
+    'shipped': 3,
+    'delivered': 4,
+    'cancelled': 5,
+    'refunded': 6,
+}
+
+
+def recompute_order_statuses(order_ids, changed_by):
+    """
+    Moves each order to its most advanced item status. One aggregate query
+    reads every order's current and target status; changes are applied with
+    one UPDATE per target status and logged with one bulk insert.
+    Returns ``[(order_id, old_status, new_status), ...]`` for changed orders.
+    """
+    from django.db.models import Case, IntegerField, Max, Value, When
+    from .models import Order, OrderStatusLog
+
+    rank = Max(Case(
+        *[When(items__status=status, then=Value(r)) for status, r in STATUS_RANK.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    ))
+    rows = (
+        Order.objects.filter(pk__in=list(order_ids), items__isnull=False)
+        .values('pk', 'status')
+        .annotate(top=rank)
+    )
+    by_rank = {r: status for status, r in STATUS_RANK.items()}
+
+    changes = [(row['pk'], row['status'], by_rank[row['top']]) for row in rows
+               if row['status'] != by_rank[row['top']]]
+    if not changes:
+        return []
+
+    now = timezone.now()
+    targets = {}
+    for pk, _, new in changes:
+        targets.setdefault(new, []).append(pk)
+    for new, pks in targets.items():
+        Order.objects.filter(pk__in=pks).update(status=new, updated_at=now)
+        if new == 'shipped':
+            Order.objects.filter(pk__in=pks, shipped_at=None).update(shipped_at=now)
+        elif new == 'delivered':
+            Order.objects.filter(pk__in=pks, delivered_at=None).update(delivered_at=now)
+
+    OrderStatusLog.objects.bulk_create([
+        OrderStatusLog(
+            order_id=pk,
+            changed_by=changed_by,
+            old_status=old,
+            new_status=new,
+            note=f'Order status updated based on items (now {new}).',
+        )
+        for pk, old, new in changes
+    ])
+    return changes
+
+
 def update_order_item_status(order_item, new_status, changed_by):
     """
-    Updates item status. When DELIVERED, deducts stock from product.
+    Updates item status. When DELIVERED, the item's stock hold is committed;
+    when CANCELLED or REFUNDED, held stock goes back on sale and the item
+    drops out of the sales rollups. Cancelled/refunded items can't move back
+    to an active status.
     """
     from .models import OrderStatusLog
+    from .reservations import RELEASE_STATUSES, commit_items, release_items
+    from .rollups import record_status_change
+
+    from django.db import transaction
+    from .models import OrderItem
 
     valid = [s[0] for s in order_item._meta.get_field('status').choices]
     if new_status not in valid:
@@ -103,100 +206,270 @@ def update_order_item_status(order_item, new_status, changed_by):
     if order_item.seller != changed_by:
         return False, 'You do not own this order item.'
 
-    old_status = order_item.status
-    order_item.status = new_status
+    with transaction.atomic():
+        old_status = OrderItem.objects.select_for_update().values_list('status', flat=True).get(pk=order_item.pk)
+        # Its stock went back on sale; reopening it would sell that twice.
+        if old_status in RELEASE_STATUSES and new_status not in RELEASE_STATUSES:
+            return False, f'A {old_status} item cannot be moved back to {new_status}.'
+        order_item.status = new_status
+
+        # These fields must exist in your OrderItem model, otherwise remove these lines
+        if new_status == 'shipped' and hasattr(order_item, 'shipped_at'):
+            order_item.shipped_at = timezone.now()
+
+        if new_status == 'delivered':
+            if hasattr(order_item, 'delivered_at'):
+                order_item.delivered_at = timezone.now()
+
+            commit_items([order_item.pk])
+
+        if new_status in RELEASE_STATUSES:
+            release_items([order_item.pk])
+
+        order_item.save()
+        record_status_change([(order_item.pk, old_status)], new_status)
+
+        # ✅ Log the item update on the order timeline
+        OrderStatusLog.objects.create(
+            order=order_item.order,
+            changed_by=changed_by,
+            old_status=old_status,
+            new_status=new_status,
+            note=f'Item "{order_item.product_name}" updated to {new_status}.',
+        )
+
+        # ✅ Update parent order to most advanced item status
+        recompute_order_statuses([order_item.order_id], changed_by)
+    order_item.order.refresh_from_db(fields=['status', 'shipped_at', 'delivered_at'])
+
+    return True, None
+
+
+def bulk_update_order_item_status(item_ids, new_status, changed_by):
+    """
+    Moves many of a seller's order items to ``new_status`` in one
+    transaction: one locked read, one UPDATE for the items, set-based stock
+    commits/releases and rollup updates, bulk-inserted logs, one aggregate
+    to recompute parent orders, and one bulk insert of buyer notifications
+    (one per order).
+
+    Items the seller doesn't own, already in ``new_status``, or cancelled/
+    refunded (when ``new_status`` is an active one) are skipped.
+    Returns ``(updated_count, changed_orders, error)`` where changed_orders
+    is ``{order_id: new_order_status}`` for the orders whose own status moved.
+    """
+    from django.db import transaction
+    from notifications.utils import create_notifications
+    from .models import Order, OrderItem, ORDER_STATUS_CHOICES
+    from .reservations import RELEASE_STATUSES
+
+    if new_status not in dict(ORDER_STATUS_CHOICES):
+        return 0, {}, 'Invalid status.'
+
+    with transaction.atomic():
+        items = OrderItem.objects.select_for_update().filter(pk__in=list(item_ids), seller=changed_by)
+        if new_status not in RELEASE_STATUSES:
+            items = items.exclude(status__in=RELEASE_STATUSES)
+        items = list(items.exclude(status=new_status).values_list('pk', 'order_id', 'status', 'product_name'))
+        if not items:
+            return 0, {}, None
+        _move_items(items, new_status, changed_by)
+
+        order_ids = {i[1] for i in items}
+        changes = recompute_order_statuses(order_ids, changed_by)
+
+        orders = list(Order.objects.filter(pk__in=order_ids).values_list('pk', 'order_number', 'buyer_id'))
+        create_notifications([
+            {
+                'recipient_id': buyer_id,
+                'notif_type': 'order',
+                'message': f"Order {number}: your items are now {new_status}.",
+                'link': f"/shop/order/{pk}/",
+            }
+            for pk, number, buyer_id in orders
+        ])
+
+    return len(items), {pk: new for pk, _, new in changes}, None
 
-    # These fields must exist in your OrderItem model, otherwise remove these lines
-    if new_status == 'shipped' and hasattr(order_item, 'shipped_at'):
-        order_item.shipped_at = timezone.now()
+
+def _move_items(items, new_status, changed_by):
+    """
+    Moves locked order items to ``new_status``: one UPDATE, set-based stock
+    commits/releases and rollup updates, and bulk-inserted logs. ``items``
+    is ``[(item_id, order_id, old_status, product_name), ...]``, read with
+    ``select_for_update`` in the caller's transaction.
+    """
+    from .models import OrderItem, OrderStatusLog
+    from .reservations import RELEASE_STATUSES, commit_items, release_items
+    from .rollups import record_status_change
+
+    pks = [i[0] for i in items]
+    now = timezone.now()
+    fields = {'status': new_status}
+    if new_status == 'shipped':
+        fields['shipped_at'] = now
+    elif new_status == 'delivered':
+        fields['delivered_at'] = now
+    OrderItem.objects.filter(pk__in=pks).update(**fields)
 
     if new_status == 'delivered':
-        if hasattr(order_item, 'delivered_at'):
-            order_item.delivered_at = timezone.now()
-
-        # ✅ Deduct stock on delivery only
-        if order_item.product:
-            product = order_item.product
-            product.stock = max(0, product.stock - order_item.quantity)
-            product.save(update_fields=['stock'])
-
-    order_item.save()
-
-    # ✅ Log the item update on the order timeline
-    OrderStatusLog.objects.create(
-        order=order_item.order,
-        changed_by=changed_by,
-        old_status=old_status,
-        new_status=new_status,
-        note=f'Item "{order_item.product_name}" updated to {new_status}.',
-    )
+        commit_items(pks)
+    elif new_status in RELEASE_STATUSES:
+        release_items(pks)
+    record_status_change([(pk, old) for pk, _, old, _ in items], new_status)
+
+    OrderStatusLog.objects.bulk_create([
+        OrderStatusLog(
+            order_id=order_id,
+            changed_by=changed_by,
+            old_status=old,
+            new_status=new_status,
+            note=f'Item "{name}" updated to {new_status}.',
+        )
+        for _, order_id, old, name in items
+    ])
 
-    # ✅ Update parent order to most advanced item status
-    STATUS_RANK = {
-        'pending': 0,
-        'confirmed': 1,
-        'packed': 2,
-        'shipped': 3,
-        'delivered': 4,
-        'cancelled': 5,
-        'refunded': 6,
-    }
 
-    order = order_item.order
-    all_statuses = list(order.items.values_list('status', flat=True))
+def update_order_status(order, new_status, changed_by):
+    """
+    Staff override: moves a whole order to ``new_status``, taking its items
+    along through the same steps as the seller's item updates (stock holds,
+    rollups, logs) in one transaction. Cancelled/refunded orders can't be
+    reopened, and cancelled/refunded items stay as they are when the order
+    moves to an active status. Returns (ok, error).
+    """
+    from django.db import transaction
+    from .models import Order, OrderItem, OrderStatusLog, ORDER_STATUS_CHOICES
+    from .reservations import RELEASE_STATUSES
 
-    if all_statuses:
-        most_advanced = max(all_statuses, key=lambda s: STATUS_RANK.get(s, 0))
-        if order.status != most_advanced:
-            old_order_status = order.status
-            order.status = most_advanced
+    if new_status not in dict(ORDER_STATUS_CHOICES):
+        return False, 'Invalid status.'
 
-            if most_advanced == 'shipped' and hasattr(order, 'shipped_at') and not getattr(order, 'shipped_at', None):
-                order.shipped_at = timezone.now()
+    with transaction.atomic():
+        locked = Order.objects.select_for_update().get(pk=order.pk)
+        old_status = locked.status
+        if old_status == new_status:
+            return True, None
+        # Its stock went back on sale; reopening it would sell that twice.
+        if old_status in RELEASE_STATUSES and new_status not in RELEASE_STATUSES:
+            return False, f'A {old_status} order cannot be moved back to {new_status}.'
+
+        items = OrderItem.objects.select_for_update().filter(order=locked)
+        if new_status not in RELEASE_STATUSES:
+            items = items.exclude(status__in=RELEASE_STATUSES)
+            if not items.exists():
+                return False, 'Every item in this order is cancelled or refunded.'
+        items = list(items.exclude(status=new_status).values_list('pk', 'order_id', 'status', 'product_name'))
+        if items:
+            _move_items(items, new_status, changed_by)
+
+        now = timezone.now()
+        fields = {'status': new_status, 'updated_at': now}
+        if new_status == 'shipped' and locked.shipped_at is None:
+            fields['shipped_at'] = now
+        elif new_status == 'delivered' and locked.delivered_at is None:
+            fields['delivered_at'] = now
+        Order.objects.filter(pk=locked.pk).update(**fields)
+        OrderStatusLog.objects.create(
+            order=locked, changed_by=changed_by, old_status=old_status, new_status=new_status,
+            note=f'Order status set to {new_status} by staff.',
+        )
+    order.refresh_from_db(fields=['status', 'shipped_at', 'delivered_at'])
+    return True, None
 
-            if most_advanced == 'delivered' and hasattr(order, 'delivered_at') and not getattr(order, 'delivered_at', None):
-                order.delivered_at = timezone.now()
 
-            order.save()
+def confirm_payment_proofs(payment_ids, seller):
+    """
+    Confirms many submitted payment proofs at once, for orders that contain
+    ``seller``'s items: one locked read, set-based UPDATEs for payments and
+    orders, one secure_orders() call, and bulk-inserted status logs and buyer
+    notifications. Pending orders move to ``confirmed``; orders already past
+    that keep their status and just get the log entry.
+
+    Payments that aren't ``submitted`` or not in the seller's orders are
+    skipped. Returns the confirmed orders' numbers.
+    """
+    from django.db import transaction
+    from notifications.utils import create_notifications
+    from .models import Order, OrderItem, OrderStatusLog, Payment
+    from .reservations import secure_orders
 
-            # ✅ Log order-level change too (optional but good)
-            OrderStatusLog.objects.create(
-                order=order,
-                changed_by=changed_by,
-                old_status=old_order_status,
-                new_status=most_advanced,
-                note=f'Order status updated based on items (now {most_advanced}).',
+    with transaction.atomic():
+        payments = list(
+            Payment.objects.select_for_update()
+            .filter(
+                pk__in=list(payment_ids), status='submitted',
+                order_id__in=OrderItem.objects.filter(seller=seller).values('order_id'),
             )
+            .values_list('pk', 'order_id')
+        )
+        if not payments:
+            return []
+        order_ids = [order_id for _, order_id in payments]
 
-    return True, None
+        now = timezone.now()
+        Payment.objects.filter(pk__in=[pk for pk, _ in payments]).update(
+            status='confirmed', paid_at=now, updated_at=now,
+        )
+        orders = list(
+            Order.objects.select_for_update().filter(pk__in=order_ids)
+            .values_list('pk', 'status', 'buyer_id', 'order_number')
+        )
+        Order.objects.filter(pk__in=order_ids, status='pending').update(status='confirmed')
+        secure_orders(order_ids)
+
+        OrderStatusLog.objects.bulk_create([
+            OrderStatusLog(
+                order_id=pk,
+                changed_by=seller,
+                old_status=status,
+                new_status='confirmed' if status == 'pending' else status,
+                note='Payment proof verified by seller.',
+            )
+            for pk, status, _, _ in orders
+        ])
+        create_notifications([
+            {
+                'recipient_id': buyer_id,
+                'notif_type': 'order',
+                'message': f"Your payment for order {number} has been confirmed!",
+                'link': f"/shop/order/{pk}/",
+            }
+            for pk, _, buyer_id, number in orders
+        ])
+    return [number for _, _, _, number in orders]
 
 
 def send_invoice_email(user, order):
-    try:
-        _send_invoice(user, order)
-    except Exception as e:
-        logger.warning(f"Invoice email failed for order {order.id}: {e}")
+    """Queues the PDF invoice email for ``order`` (sent by shop.tasks)."""
+    from jobs.queue import enqueue
+    enqueue('shop.send_invoice', order_id=order.pk)
 
 
 def send_order_update_email(order, new_status):
-    try:
-        user = order.buyer
-        if not user.email:
-            return
+    """Queues a status-change email to the buyer (sent by shop.tasks)."""
+    from jobs.queue import enqueue
+    enqueue('shop.send_order_update', order_id=order.pk, new_status=new_status)
 
-        status_display = dict(order._meta.get_field('status').choices).get(new_status, new_status)
-        subject = f"BizConnect — Order {order.order_number} is now {status_display}"
 
-        text_body = (
-            f"Hi {user.get_full_name() or user.username},\n\n"
-            f"Your order {order.order_number} has been updated.\n"
-            f"New Status: {status_display}\n\n"
-            f"Total: PHP {order.total_amount:,.2f}\n\n"
-            f"— BizConnect Team"
-        )
+def _send_order_update(order, new_status):
+    user = order.buyer
+    if not user.email:
+        return
+
+    status_display = dict(order._meta.get_field('status').choices).get(new_status, new_status)
+    subject = f"BizConnect — Order {order.order_number} is now {status_display}"
+
+    text_body = (
+        f"Hi {user.get_full_name() or user.username},\n\n"
+        f"Your order {order.order_number} has been updated.\n"
+        f"New Status: {status_display}\n\n"
+        f"Total: PHP {order.total_amount:,.2f}\n\n"
+        f"— BizConnect Team"
+    )
 
-        site_url = getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000')
-        html_body = f"""<!DOCTYPE html>
+    site_url = getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000')
+    html_body = f"""<!DOCTYPE html>
 <html><head><meta charset="UTF-8"/></head>
 <body style="margin:0;padding:0;background:#FAF8F4;font-family:sans-serif;">
   <div style="max-width:560px;margin:40px auto;background:#fff;border-radius:12px;
@@ -237,89 +510,29 @@ def send_order_update_email(order, new_status):
   </div>
 </body></html>"""
 
-        msg = EmailMultiAlternatives(subject, text_body, settings.DEFAULT_FROM_EMAIL, [user.email])
-        msg.attach_alternative(html_body, 'text/html')
-        msg.send()
-
-    except Exception as e:
-        logger.warning(f"Order update email failed: {e}")
+    # Several updates to one order within the window go out as one email.
+    queue_email(
+        user.email, subject, text_body, html_body,
+        coalesce_key=f'order-status:{order.pk}', window=settings.EMAIL_COALESCE_SECONDS,
+    )
 
 
 def _send_invoice(user, order):
-    from reportlab.lib.pagesizes import letter
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.lib import colors
-
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buf,
-        pagesize=letter,
-        topMargin=54, bottomMargin=54,
-        leftMargin=54, rightMargin=54
-    )
-    styles = getSampleStyleSheet()
-    el = []
-
-    el.append(Paragraph("BIZCONNECT", styles['Title']))
-    el.append(Paragraph("Premium Philippine Marketplace", styles['Normal']))
-    el.append(Spacer(1, 16))
-    el.append(Paragraph(f"<b>Invoice — Order {order.order_number}</b>", styles['Heading2']))
-    el.append(Paragraph(f"Date: {order.created_at.strftime('%B %d, %Y')}", styles['Normal']))
-    el.append(Paragraph(f"Buyer: {user.get_full_name() or user.username}", styles['Normal']))
-    el.append(Paragraph(f"Email: {user.email}", styles['Normal']))
-    if order.shipping_address:
-        el.append(Paragraph(f"Ship to: {order.shipping_address}", styles['Normal']))
-    el.append(Spacer(1, 16))
-
-    data = [['Product', 'Qty', 'Unit Price', 'Subtotal']]
-    for item in order.items.all():
-        data.append([
-            item.product_name,
-            str(item.quantity),
-            f"PHP {item.unit_price:,.2f}",
-            f"PHP {item.subtotal:,.2f}",
-        ])
-    data.append(['', '', 'TOTAL', f"PHP {order.total_amount:,.2f}"])
-
-    t = Table(data, colWidths=[240, 60, 110, 110])
-    t.setStyle(TableStyle([
-        ('BACKGROUND',     (0, 0),  (-1, 0),  colors.HexColor('#1C1C1E')),
-        ('TEXTCOLOR',      (0, 0),  (-1, 0),  colors.white),
-        ('FONTNAME',       (0, 0),  (-1, 0),  'Helvetica-Bold'),
-        ('FONTNAME',       (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('BACKGROUND',     (0, -1), (-1, -1), colors.HexColor('#F0EDE6')),
-        ('ROWBACKGROUNDS', (0, 1),  (-1, -2), [colors.white, colors.HexColor('#FAF8F4')]),
-        ('GRID',           (0, 0),  (-1, -1), 0.4, colors.HexColor('#CCCCCC')),
-        ('ALIGN',          (1, 0),  (-1, -1), 'CENTER'),
-        ('TOPPADDING',     (0, 0),  (-1, -1), 8),
-        ('BOTTOMPADDING',  (0, 0),  (-1, -1), 8),
-        ('LEFTPADDING',    (0, 0),  (-1, -1), 10),
-    ]))
-    el.append(t)
-    el.append(Spacer(1, 20))
-    el.append(Paragraph(
-        "Salamat sa iyong pagbili! Thank you for shopping with BizConnect.",
-        styles['Normal']
-    ))
+    from .invoices import get_invoice
 
-    doc.build(el)
-    pdf = buf.getvalue()
-    buf.close()
+    pdf = bytes(get_invoice(order).pdf)
 
     if not user.email:
         return
 
-    msg = EmailMultiAlternatives(
-        subject=f"BizConnect Invoice — Order {order.order_number}",
-        body=(
+    queue_email(
+        user.email,
+        f"BizConnect Invoice — Order {order.order_number}",
+        (
             f"Hi {user.get_full_name() or user.username},\n\n"
             f"Thank you for your order {order.order_number}.\n"
             f"Total: PHP {order.total_amount:,.2f}\n\n"
             f"— BizConnect Team"
         ),
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[user.email],
-    )
-    msg.attach(f"invoice_{order.order_number}.pdf", pdf, 'application/pdf')
-    msg.send()
\ No newline at end of file
+        attachment=(f"invoice_{order.order_number}.pdf", pdf, 'application/pdf'),
+    )
\ No newline at end of file
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Product
+from .search import refresh_search_vector
+
+SEARCH_FIELDS = {'name', 'description'}
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_vector(sender, instance, created, update_fields=None, **kwargs):
+    # Stock/flag-only saves don't touch the indexed text.
+    if update_fields and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    refresh_search_vector(Product.objects.filter(pk=instance.pk))
+
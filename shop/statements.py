@@ -0,0 +1,249 @@
+"""
+Monthly seller statements.
+
+For a month, ``statement_data`` runs one grouped query for every seller's
+totals and one ordered query for all of the month's order items, streamed
+and split per seller. Each seller's statement is a plain dict, hashed into a
+``digest``; ``generate`` skips sellers whose stored statement has the same
+digest and renders the rest (PDF + CSV) on a process pool, saving them in
+bulk. Regenerating a month after a late refund only re-renders the sellers
+it touched.
+
+Totals follow the sales rollups: cancelled and refunded items are not
+sales and are reported separately as ``reversed``; ``paid`` is the part of
+the sales whose order payment is confirmed.
+"""
+import csv
+import hashlib
+import io
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from itertools import groupby
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.utils import timezone
+
+from .reservations import RELEASE_STATUSES
+
+# Bump when the layout changes so the next run re-renders every statement.
+FORMAT_VERSION = 1
+BATCH_SIZE = 200
+
+LINE_HEADERS = ['Date', 'Order Number', 'Product', 'Qty', 'Unit Price', 'Subtotal', 'Item Status', 'Payment']
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def previous_month(today=None):
+    today = today or timezone.localdate()
+    first = month_start(today)
+    return date(first.year - 1, 12, 1) if first.month == 1 else date(first.year, first.month - 1, 1)
+
+
+def month_bounds(month):
+    """Aware ``[start, end)`` datetimes of ``month`` in local time."""
+    tz = timezone.get_current_timezone()
+    following = date(month.year + 1, 1, 1) if month.month == 12 else date(month.year, month.month + 1, 1)
+    return (
+        timezone.make_aware(datetime.combine(month, time.min), tz),
+        timezone.make_aware(datetime.combine(following, time.min), tz),
+    )
+
+
+def php(value):
+    return f"PHP {value or 0:,.2f}"
+
+
+def statement_data(month, seller_ids=None):
+    """Yields one statement dict per seller with order items in ``month``."""
+    from .models import OrderItem
+
+    start, end = month_bounds(month)
+    items = OrderItem.objects.filter(
+        seller__isnull=False, order__created_at__gte=start, order__created_at__lt=end,
+    )
+    if seller_ids is not None:
+        items = items.filter(seller_id__in=seller_ids)
+
+    sale = ~Q(status__in=RELEASE_STATUSES)
+    amount = ExpressionWrapper(F('quantity') * F('unit_price'),
+                               output_field=DecimalField(max_digits=14, decimal_places=2))
+    totals = {
+        row['seller_id']: row
+        for row in items.values(
+            'seller_id', 'seller__username', 'seller__first_name', 'seller__last_name',
+        ).annotate(
+            orders=Count('order', distinct=True, filter=sale),
+            units=Sum('quantity', filter=sale),
+            gross=Sum(amount, filter=sale),
+            paid=Sum(amount, filter=sale & Q(order__payment__status='confirmed')),
+            reversed=Sum(amount, filter=~sale),
+        ).order_by()
+    }
+
+    lines = (
+        items.order_by('seller_id', 'order__created_at', 'pk')
+        .values_list(
+            'seller_id', 'order__created_at', 'order__order_number', 'product_name',
+            'quantity', 'unit_price', 'status', 'order__payment__status',
+        )
+        .iterator(chunk_size=5000)
+    )
+    for seller_id, rows in groupby(lines, key=lambda row: row[0]):
+        total = totals[seller_id]
+        name = f"{total['seller__first_name']} {total['seller__last_name']}".strip()
+        data = {
+            'version': FORMAT_VERSION,
+            'seller_id': seller_id,
+            'seller_name': name or total['seller__username'],
+            'month': month.strftime('%B %Y'),
+            'orders': total['orders'],
+            'units': total['units'] or 0,
+            'gross': total['gross'] or Decimal('0'),
+            'paid': total['paid'] or Decimal('0'),
+            'reversed': total['reversed'] or Decimal('0'),
+            'lines': [
+                (timezone.localtime(created).strftime('%Y-%m-%d'), number, product, qty,
+                 price, qty * price, status, payment or 'unpaid')
+                for _, created, number, product, qty, price, status, payment in rows
+            ],
+        }
+        data['digest'] = hashlib.sha256(
+            json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+        ).hexdigest()
+        yield data
+
+
+@lru_cache(maxsize=None)
+def _layout():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+    grid = [
+        ('GRID',          (0, 0), (-1, -1), 0.4, colors.HexColor('#CCCCCC')),
+        ('FONTSIZE',      (0, 0), (-1, -1), 8),
+        ('TOPPADDING',    (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]
+    summary_style = TableStyle(grid + [
+        ('FONTNAME',   (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F0EDE6')),
+        ('FONTSIZE',   (0, 0), (-1, -1), 10),
+    ])
+    lines_style = TableStyle(grid + [
+        ('BACKGROUND',     (0, 0), (-1, 0),  colors.HexColor('#1C1C1E')),
+        ('TEXTCOLOR',      (0, 0), (-1, 0),  colors.white),
+        ('FONTNAME',       (0, 0), (-1, 0),  'Helvetica-Bold'),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#FAF8F4')]),
+        ('ALIGN',          (3, 0), (5, -1),  'RIGHT'),
+    ])
+    return styles, summary_style, lines_style
+
+
+def _summary_rows(data):
+    return [
+        ['Orders', str(data['orders'])],
+        ['Units sold', str(data['units'])],
+        ['Gross sales', php(data['gross'])],
+        ['Paid', php(data['paid'])],
+        ['Awaiting payment', php(data['gross'] - data['paid'])],
+        ['Cancelled / refunded', php(data['reversed'])],
+    ]
+
+
+def render(data):
+    """Returns ``(pdf_bytes, csv_bytes)`` for a ``statement_data`` dict."""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+    styles, summary_style, lines_style = _layout()
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=landscape(A4), topMargin=40, bottomMargin=40,
+                            leftMargin=40, rightMargin=40)
+    summary = Table(_summary_rows(data), colWidths=[160, 140])
+    summary.setStyle(summary_style)
+    rows = [LINE_HEADERS] + [
+        [day, number, product[:60], str(qty), php(price), php(subtotal), status, payment]
+        for day, number, product, qty, price, subtotal, status, payment in data['lines']
+    ]
+    lines = Table(rows, colWidths=[65, 100, 250, 35, 85, 85, 70, 70], repeatRows=1)
+    lines.setStyle(lines_style)
+    doc.build([
+        Paragraph("BIZCONNECT", styles['Title']),
+        Paragraph(f"<b>Seller Statement — {data['month']}</b>", styles['Heading2']),
+        Paragraph(f"Seller: {data['seller_name']}", styles['Normal']),
+        Spacer(1, 12),
+        summary,
+        Spacer(1, 16),
+        lines,
+    ])
+
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(['Seller Statement', data['month'], data['seller_name']])
+    for label, value in _summary_rows(data):
+        writer.writerow([label, value])
+    writer.writerow([])
+    writer.writerow(LINE_HEADERS)
+    for day, number, product, qty, price, subtotal, status, payment in data['lines']:
+        writer.writerow([day, number, product, qty, price, subtotal, status, payment])
+    return buf.getvalue(), text.getvalue().encode('utf-8')
+
+
+def _save(month, batch, rendered):
+    from .models import SellerStatement
+
+    now = timezone.now()
+    SellerStatement.objects.bulk_create(
+        [
+            SellerStatement(
+                seller_id=data['seller_id'], month=month, orders=data['orders'], units=data['units'],
+                gross=data['gross'], paid=data['paid'], reversed=data['reversed'],
+                digest=data['digest'], pdf=pdf, csv=csv_bytes, generated_at=now,
+            )
+            for data, (pdf, csv_bytes) in zip(batch, rendered)
+        ],
+        update_conflicts=True,
+        unique_fields=['seller', 'month'],
+        update_fields=['orders', 'units', 'gross', 'paid', 'reversed', 'digest', 'pdf', 'csv', 'generated_at'],
+    )
+
+
+def generate(month, pool=None, seller_ids=None, batch_size=BATCH_SIZE):
+    """
+    Builds ``month``'s statements, rendering on ``pool`` (a
+    ProcessPoolExecutor) when given. Returns ``(rendered, unchanged)``.
+    """
+    from .models import SellerStatement
+
+    month = month_start(month)
+    known = dict(SellerStatement.objects.filter(month=month).values_list('seller_id', 'digest'))
+    rendered = unchanged = 0
+    batch = []
+
+    def flush():
+        if pool:
+            results = list(pool.map(render, batch, chunksize=max(1, len(batch) // 32)))
+        else:
+            results = [render(data) for data in batch]
+        _save(month, batch, results)
+        batch.clear()
+
+    for data in statement_data(month, seller_ids):
+        if known.get(data['seller_id']) == data['digest']:
+            unchanged += 1
+            continue
+        batch.append(data)
+        rendered += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return rendered, unchanged
@@ -0,0 +1,175 @@
+"""
+Stripe webhook handling.
+
+Stripe POSTs events to /shop/stripe/webhook/. The view checks the
+signature, stores the event (``record``) and answers 200 straight away;
+the ``shop.apply_stripe_event`` job then applies it to the order
+(``apply``). Stripe delivers each event at least once, so both steps are
+idempotent: ``record`` keys on the Stripe event id, and ``apply`` only
+moves a payment forward.
+
+Checkout events handled:
+
+* ``checkout.session.completed`` with ``payment_status == 'paid'`` and
+  ``checkout.session.async_payment_succeeded`` confirm the payment and the
+  order;
+* ``checkout.session.async_payment_failed`` and ``checkout.session.expired``
+  mark an unconfirmed payment failed, but only when it is still on that
+  session.
+
+Everything else is stored and ignored. ``fake_event``/``sign`` build
+correctly signed events for local testing (``manage.py fake_stripe_event``).
+"""
+import hashlib
+import hmac
+import json
+import logging
+import time
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CONFIRMING = {'checkout.session.completed', 'checkout.session.async_payment_succeeded'}
+FAILING = {'checkout.session.async_payment_failed', 'checkout.session.expired'}
+
+
+def record(event):
+    """
+    Stores a verified event (a dict) and queues it for processing. Returns
+    False if the event was already recorded.
+    """
+    from jobs.queue import enqueue
+    from .models import StripeEvent
+
+    try:
+        with transaction.atomic():
+            StripeEvent.objects.create(event_id=event['id'], event_type=event['type'], payload=event)
+            enqueue('shop.apply_stripe_event', event_id=event['id'])
+    except IntegrityError:
+        return False
+    return True
+
+
+def _payment_for(session, by_order=True):
+    """
+    The payment a session belongs to. With ``by_order`` the session's
+    ``metadata.order_id`` is tried first, so a payment still gets confirmed
+    when the buyer paid through an older session of the same order. Failure
+    events pass ``by_order=False``: an older session expiring must not fail
+    the payment for the session the buyer is using now.
+    """
+    from .models import Payment
+
+    payments = Payment.objects.select_for_update().select_related('order', 'order__buyer')
+    order_id = (session.get('metadata') or {}).get('order_id') if by_order else None
+    payment = payments.filter(order_id=order_id).first() if order_id and order_id.isdigit() else None
+    if payment is None and session.get('id'):
+        payment = payments.filter(stripe_session_id=session['id']).first()
+    return payment
+
+
+def apply(stripe_event):
+    """Applies a stored StripeEvent to its payment and order, once."""
+    from .models import StripeEvent
+
+    with transaction.atomic():
+        locked = StripeEvent.objects.select_for_update().get(pk=stripe_event.pk)
+        if locked.processed_at is not None:
+            return
+        event_type = locked.event_type
+        session = locked.payload.get('data', {}).get('object', {})
+
+        if event_type in CONFIRMING and session.get('payment_status') == 'paid':
+            payment = _payment_for(session)
+            if payment is None:
+                logger.warning(f"Stripe event {locked.event_id}: no payment for session {session.get('id')}")
+            else:
+                _confirm(payment, session)
+        elif event_type in FAILING:
+            payment = _payment_for(session, by_order=False)
+            if payment is not None and payment.status not in ('confirmed', 'refunded'):
+                payment.status = 'failed'
+                payment.save(update_fields=['status', 'updated_at'])
+
+        locked.processed_at = timezone.now()
+        locked.save(update_fields=['processed_at'])
+
+
+def _confirm(payment, session):
+    from notifications.utils import create_notification
+    from .models import OrderStatusLog
+    from .reservations import secure_order
+
+    if payment.status == 'confirmed':
+        return
+    order = payment.order
+    payment.method = 'stripe'
+    payment.status = 'confirmed'
+    payment.stripe_session_id = session.get('id') or payment.stripe_session_id
+    payment.stripe_payment_intent = session.get('payment_intent') or payment.stripe_payment_intent
+    payment.paid_at = timezone.now()
+    payment.save(update_fields=[
+        'method', 'status', 'stripe_session_id', 'stripe_payment_intent', 'paid_at', 'updated_at',
+    ])
+
+    if order.status != 'pending':
+        # E.g. the holds lapsed and the order was cancelled before Stripe
+        # reported the payment; leave the order alone and flag it.
+        OrderStatusLog.objects.create(
+            order=order, changed_by=None, old_status=order.status, new_status=order.status,
+            note='Stripe payment received while the order was not pending; check whether a refund is needed.',
+        )
+        logger.warning(f"Stripe payment for order {order.order_number} arrived in status {order.status}")
+        return
+
+    order.status = 'confirmed'
+    order.save(update_fields=['status'])
+    secure_order(order)
+    OrderStatusLog.objects.create(
+        order=order, changed_by=None, old_status='pending', new_status='confirmed',
+        note='Payment confirmed via Stripe.',
+    )
+    create_notification(
+        recipient=order.buyer,
+        notif_type='order',
+        message=f"Stripe payment confirmed for order {order.order_number}!",
+        link=f"/shop/order/{order.id}/",
+    )
+
+
+# ── local testing ────────────────────────────────────────────────────────
+
+def fake_event(order, event_type='checkout.session.completed', payment_status='paid', session_id=None):
+    """An event shaped like Stripe's for ``order``'s checkout session."""
+    session_id = session_id or getattr(getattr(order, 'payment', None), 'stripe_session_id', '') \
+        or f"cs_test_{uuid.uuid4().hex}"
+    return {
+        'id': f"evt_test_{uuid.uuid4().hex}",
+        'object': 'event',
+        'type': event_type,
+        'created': int(time.time()),
+        'livemode': False,
+        'data': {'object': {
+            'id': session_id,
+            'object': 'checkout.session',
+            'amount_total': int(order.total_amount * 100),
+            'currency': 'php',
+            'payment_intent': f"pi_test_{uuid.uuid4().hex[:24]}",
+            'payment_status': payment_status,
+            'metadata': {'order_id': str(order.pk), 'order_number': order.order_number},
+        }},
+    }
+
+
+def sign(payload, secret, timestamp=None):
+    """The ``Stripe-Signature`` header Stripe would send with ``payload`` (str)."""
+    timestamp = timestamp or int(time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def encode(event):
+    return json.dumps(event, separators=(',', ':'))
@@ -0,0 +1,129 @@
+"""
+A local stand-in for the Checkout Sessions API: ``POST
+/v1/checkout/sessions`` creates an unpaid session, and ``GET
+/v1/checkout/sessions`` lists them with ``created[gte]``/``created[lte]``,
+``limit`` and ``starting_after`` paging, newest first, like Stripe. Point
+the app at it with STRIPE_API_BASE=http://127.0.0.1:12111.
+
+Sessions are plain dicts held in memory; ``add_session`` builds one shaped
+like Stripe's. ``latency`` delays every response to imitate the real API.
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class StripeStub:
+    def __init__(self, host='127.0.0.1', port=12111, latency=0.0):
+        self.host, self.port, self.latency = host, port, latency
+        self.sessions = []
+        self.requests = 0
+        self._server = None
+
+    def add_session(self, order_id=None, payment_status='paid', status='complete', created=None,
+                    session_id=None, amount=0):
+        session = {
+            'id': session_id or f"cs_test_{uuid.uuid4().hex}",
+            'object': 'checkout.session',
+            'created': int(created or time.time()),
+            'amount_total': amount,
+            'currency': 'php',
+            'payment_intent': f"pi_test_{uuid.uuid4().hex[:24]}" if payment_status == 'paid' else None,
+            'payment_status': payment_status,
+            'status': status,
+            'metadata': {'order_id': str(order_id)} if order_id else {},
+        }
+        self.sessions.append(session)
+        return session
+
+    def list_sessions(self, query):
+        def number(name, default):
+            values = query.get(name)
+            return int(values[0]) if values else default
+
+        gte, lte = number('created[gte]', 0), number('created[lte]', 2 ** 62)
+        limit = min(number('limit', 10), 100)
+        rows = sorted(
+            (s for s in self.sessions if gte <= s['created'] <= lte),
+            key=lambda s: (s['created'], s['id']), reverse=True,
+        )
+        after = (query.get('starting_after') or [None])[0]
+        if after:
+            ids = [s['id'] for s in rows]
+            rows = rows[ids.index(after) + 1:] if after in ids else []
+        return {
+            'object': 'list',
+            'url': '/v1/checkout/sessions',
+            'has_more': len(rows) > limit,
+            'data': rows[:limit],
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == '/v1/checkout/sessions':
+                    self._send(200, stub.list_sessions(parse_qs(url.query)))
+                else:
+                    self._not_found(url.path)
+
+            def do_POST(self):
+                url = urlsplit(self.path)
+                form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode())
+                if url.path == '/v1/checkout/sessions':
+                    session = stub.add_session(
+                        order_id=(form.get('metadata[order_id]') or [None])[0],
+                        payment_status='unpaid', status='open',
+                    )
+                    self._send(200, {**session, 'url': f"{stub.url}/pay/{session['id']}"})
+                else:
+                    self._not_found(url.path)
+
+            def _not_found(self, path):
+                self._send(404, {'error': {'type': 'invalid_request_error',
+                                           'message': f"Unrecognized request URL ({self.command}: {path})."}})
+
+            def _send(self, status, body):
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (timed out) first
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def serve(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.port = self._server.server_address[1]
+        self._server.serve_forever()
+
+    def start_in_thread(self):
+        """Runs the server on a daemon thread; returns once it's listening."""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,39 @@
+"""Background jobs for the shop (run by ``manage.py run_jobs``, see jobs/queue.py)."""
+from jobs.queue import job
+
+from .models import Order
+from .services import _send_invoice, _send_order_update
+
+
+@job('shop.send_invoice', max_attempts=5)
+def send_invoice(order_id):
+    order = Order.objects.select_related('buyer').filter(pk=order_id).first()
+    if order is not None:
+        _send_invoice(order.buyer, order)
+
+
+@job('shop.send_order_update', max_attempts=5)
+def send_order_update(order_id, new_status):
+    order = Order.objects.select_related('buyer').filter(pk=order_id).first()
+    if order is not None:
+        _send_order_update(order, new_status)
+
+
+@job('shop.make_proof_thumbnail', max_attempts=3)
+def make_proof_thumbnail(payment_id):
+    from .images import save_proof_thumbnail
+    from .models import Payment
+
+    payment = Payment.objects.select_related('order').filter(pk=payment_id).first()
+    if payment is not None and payment.proof_image:
+        save_proof_thumbnail(payment)
+
+
+@job('shop.apply_stripe_event', max_attempts=8)
+def apply_stripe_event(event_id):
+    from .models import StripeEvent
+    from .stripe_events import apply
+
+    stripe_event = StripeEvent.objects.filter(event_id=event_id).first()
+    if stripe_event is not None:
+        apply(stripe_event)
@@ -3,12 +3,15 @@ from . import views
 
 urlpatterns = [
     path('products/', views.product_list, name='product_list'),
+    path('products/page/', views.product_list_page, name='product_list_page'),
     path('products/<int:pk>/', views.product_detail, name='product_detail'),
     path('cart/', views.cart_page, name='cart'),
+    path('cart/sync/', views.cart_sync, name='cart_sync'),
     path('checkout/', views.checkout_page, name='checkout'),
     path('checkout/submit/', views.checkout_submit, name='checkout_submit'),
     path('orders/', views.my_orders, name='my_orders'),
     path('order/<int:order_id>/', views.order_detail, name='order_detail'),
+    path('order/<int:order_id>/invoice/', views.order_invoice, name='order_invoice'),
     # Payment
     path('order/<int:order_id>/payment/', views.payment_page, name='payment_page'),
     path('order/<int:order_id>/payment/cod/', views.payment_cod, name='payment_cod'),
@@ -16,15 +19,20 @@ urlpatterns = [
     path('order/<int:order_id>/payment/stripe/', views.payment_stripe_redirect, name='payment_stripe'),
     path('order/<int:order_id>/payment/stripe/success/', views.payment_stripe_success, name='payment_stripe_success'),
     path('order/<int:order_id>/payment/stripe/cancel/', views.payment_stripe_cancel, name='payment_stripe_cancel'),
+    path('stripe/webhook/', views.stripe_webhook, name='stripe_webhook'),
     path('order/<int:order_id>/payment/confirm-proof/', views.confirm_payment_proof, name='confirm_payment_proof'),
     # Seller
     path('seller/dashboard/', views.seller_dashboard, name='seller_dashboard'),
     path('seller/orders/', views.seller_orders, name='seller_orders'),
     path('seller/orders/item/<int:item_id>/status/', views.update_item_status, name='update_item_status'),
+    path('seller/payments/', views.seller_payment_reviews, name='seller_payment_reviews'),
+    path('seller/orders/bulk-status/', views.bulk_update_item_status, name='bulk_update_item_status'),
     path('seller/products/new/', views.product_create, name='product_create'),
     path('seller/products/<int:pk>/edit/', views.product_edit, name='product_edit'),
     path('seller/products/<int:pk>/delete/', views.product_delete, name='product_delete'),
     path('seller/reports/', views.seller_reports, name='seller_reports'),
+    path('seller/statements/', views.seller_statements, name='seller_statements'),
+    path('seller/statements/<int:pk>/<str:fmt>/', views.seller_statement_download, name='seller_statement_download'),
     path("auth/firebase/", views.firebase_auth, name="firebase_auth"),
     # path('order/<int:order_id>/payment/confirm-proof/', views.confirm_payment_proof, name='confirm_payment_proof'),
     # path('seller/products/new/', views.product_create, name='product_create'),
@@ -1,19 +1,38 @@
 import json
 import logging
-import csv
 from decimal import Decimal
 
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
 from accounts.decorators import seller_required, login_required_custom
-from notifications.utils import create_notification
-from .models import Order, OrderItem, OrderStatusLog, Product, Payment
+from jobs.queue import enqueue
+from notifications.utils import create_notification, create_notifications
+from .models import Invoice, Order, OrderItem, OrderStatusLog, Product, Payment, SellerStatement
+from .carts import (
+    MAX_LINES as MAX_CART_LINES, cart_quantities, clear_products, get_cart, merge_lines, prices_from_payload,
+    replace_lines, revalidate,
+)
+from .exports import FORMATS as EXPORT_FORMATS, SELLER_ITEM_COLUMNS, parse_date_range, seller_items, stream_export
+from .invoices import get_invoice
+from .facets import SORT_OPTIONS, apply_filters, facet_counts, ordering_for, parse_filters
+from .pagination import InvalidCursor, clamp_page_size, keyset_paginate
+from .reservations import secure_order
+from .rollups import daily_series, seller_totals, top_products
+from .search import search_products
+from .flash_sales import QUEUED, SOLD_OUT, admit, leave, running_sales, sale_stock
 from .services import (
-    create_order_from_cart, update_order_item_status,
-    send_invoice_email, send_order_update_email
+    create_order_from_cart, update_order_item_status, bulk_update_order_item_status, parse_cart_lines,
+    confirm_payment_proofs, send_invoice_email, send_order_update_email
 )
 from django.contrib.auth import login
 from django.contrib.auth import get_user_model
@@ -21,20 +40,73 @@ from django.urls import reverse
 
 logger = logging.getLogger(__name__)
 
+STATEMENT_TYPES = {'pdf': 'application/pdf', 'csv': 'text/csv'}
+REVIEW_PAGE_SIZE = 30
+
 
 # ── SHOP ──────────────────────────────────────────────────────────────────
 
-def product_list(request):
+def _catalog_page(request):
+    """
+    One keyset page of the active catalog for the current query string,
+    plus the parsed filters and the facet counts for the unfiltered result.
+    Raises InvalidCursor for a bad ``cursor``.
+    """
     query = request.GET.get('q', '').strip()
+    filters = parse_filters(request.GET)
     products = Product.objects.filter(is_active=True).select_related('seller')
     if query:
-        products = products.filter(name__icontains=query) | products.filter(description__icontains=query)
-    products = products.order_by('-created_at')
-    return render(request, 'shop/product_list.html', {'products': products, 'query': query})
+        products = search_products(products, query)
+
+    page = keyset_paginate(
+        apply_filters(products, filters).annotate(flash_stock=sale_stock()),
+        ordering_for(filters, searching=bool(query)),
+        cursor=request.GET.get('cursor') or None,
+        page_size=clamp_page_size(request.GET.get('limit')),
+    )
+    return query, filters, products, page
+
+
+def product_list(request):
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    try:
+        query, filters, products, page = _catalog_page(request)
+    except InvalidCursor:
+        # Start over from the first page of the same search and filters.
+        return redirect(f"{reverse('product_list')}?{params.urlencode()}" if params else 'product_list')
+    return render(request, 'shop/product_list.html', {
+        'products': page,
+        'next_cursor': page.next_cursor,
+        'query': query,
+        'filters': filters,
+        'facets': facet_counts(products),
+        'sort_options': [(k, label) for k, (label, _) in SORT_OPTIONS.items()],
+        'base_params': params.urlencode(),
+    })
+
+
+def product_list_page(request):
+    """JSON "next page" endpoint used by the catalog's infinite scroll."""
+    try:
+        _, _, _, page = _catalog_page(request)
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    html = render_to_string('partials/product_cards.html', {'products': page}, request=request)
+    return JsonResponse({
+        'success': True,
+        'items': [
+            {'id': p.id, 'name': p.name, 'price': str(p.price), 'stock': p.available_stock, 'seller': p.seller.username}
+            for p in page
+        ],
+        'html': html,
+        'next_cursor': page.next_cursor,
+    })
 
 
 def product_detail(request, pk):
-    product = get_object_or_404(Product, pk=pk, is_active=True)
+    product = get_object_or_404(Product.objects.annotate(flash_stock=sale_stock()), pk=pk, is_active=True)
     return render(request, 'shop/product_detail.html', {'product': product})
 
 
@@ -43,6 +115,37 @@ def cart_page(request):
     return render(request, 'shop/cart.html')
 
 
+def cart_sync(request):
+    """
+    GET: the server cart, revalidated. POST ``{"items": [...]}``: merge the
+    client's lines into the server cart, or replace it with them when
+    ``"replace": true`` (an explicit edit on the cart page), then return the
+    lines revalidated with current prices and availability (one catalog
+    query).
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Login required'}, status=401)
+
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+        except Exception:
+            return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+        items = data.get('items', [])
+        if not isinstance(items, list) or len(items) > MAX_CART_LINES:
+            return JsonResponse(
+                {'success': False, 'error': f'Send a list of at most {MAX_CART_LINES} cart lines.'}, status=400,
+            )
+        items = [ci for ci in items if isinstance(ci, dict)]
+        quantities, _ = parse_cart_lines(items)
+        sync = replace_lines if data.get('replace') else merge_lines
+        result = sync(get_cart(request, create=True), quantities, prices_from_payload(items))
+    else:
+        result = revalidate(cart_quantities(get_cart(request)))
+
+    return JsonResponse({'success': True, **result})
+
+
 @login_required_custom
 def checkout_page(request):
     return render(request, 'shop/checkout.html')
@@ -65,10 +168,31 @@ def checkout_submit(request):
     if not shipping:
         return JsonResponse({'success': False, 'error': 'Shipping address required.'}, status=400)
 
+    # Flash-sale products go through the admission queue before any stock
+    # row is touched, so a crowd gets a fast answer instead of lock waits.
+    quantities, _ = parse_cart_lines(cart_items)
+    sales = running_sales(quantities)
+    for sale in sales.values():
+        state, info = admit(sale, request.user)
+        if state == SOLD_OUT:
+            return JsonResponse({
+                'success': False, 'sold_out': True,
+                'error': f"'{sale.product.name}' is sold out.",
+            }, status=409)
+        if state == QUEUED:
+            return JsonResponse({
+                'success': False, 'queued': True, **info,
+                'error': f"You're in line for '{sale.product.name}' (#{info['position']}).",
+            }, status=429)
+
     order, errors = create_order_from_cart(request.user, cart_items, shipping, notes)
     if not order:
         return JsonResponse({'success': False, 'error': ' '.join(errors or ['Order failed'])}, status=400)
 
+    for sale in sales.values():
+        leave(sale, request.user)
+    clear_products(get_cart(request), quantities)
+
     # buyer notification
     create_notification(
         recipient=request.user,
@@ -78,18 +202,18 @@ def checkout_submit(request):
     )
 
     # seller notification (one per seller)
-    notified = set()
-    for item in order.items.all():
-        if item.seller and item.seller_id not in notified:
-            notified.add(item.seller_id)
-            create_notification(
-                recipient=item.seller,
-                notif_type='order',
-                message=f"New order {order.order_number} from {request.user.username}.",
-                link="/shop/seller/orders/",
-            )
+    seller_ids = set(order.items.exclude(seller=None).values_list('seller_id', flat=True))
+    create_notifications([
+        {
+            'recipient_id': seller_id,
+            'notif_type': 'order',
+            'message': f"New order {order.order_number} from {request.user.username}.",
+            'link': "/shop/seller/orders/",
+        }
+        for seller_id in seller_ids
+    ])
 
-    # invoice email (safe)
+    # invoice email: queued, rendered and sent by the job worker
     send_invoice_email(request.user, order)
 
     return JsonResponse({'success': True, 'order_id': order.id, 'order_number': order.order_number})
@@ -118,6 +242,29 @@ def order_detail(request, order_id):
     return render(request, 'shop/order_detail.html', {'order': order, 'logs': logs})
 
 
+@login_required_custom
+def order_invoice(request, order_id):
+    """The order's invoice PDF, rendered on first request and served from storage after that."""
+    order = get_object_or_404(Order.objects.select_related('buyer'), pk=order_id)
+
+    seller_ids = list(order.items.values_list('seller_id', flat=True))
+    if request.user != order.buyer and request.user.id not in seller_ids and not request.user.is_staff:
+        messages.error(request, "Access denied.")
+        return redirect('product_list')
+
+    invoice = Invoice.objects.filter(order=order).defer('pdf').first() or get_invoice(order)
+    etag = f'"{invoice.sha256}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(bytes(invoice.pdf), content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="invoice_{order.order_number}.pdf"'
+    # An order's invoice never changes once stored.
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=86400)
+    return response
+
+
 # ── PAYMENT ───────────────────────────────────────────────────────────────
 
 @login_required_custom
@@ -139,6 +286,7 @@ def payment_cod(request, order_id):
     old = order.status
     order.status = 'confirmed'
     order.save(update_fields=['status'])
+    secure_order(order)
 
     OrderStatusLog.objects.create(
         order=order,
@@ -179,7 +327,12 @@ def payment_manual_submit(request, order_id):
         }
     )
     payment.proof_image = proof
+    payment.proof_thumbnail = None  # made by the shop.make_proof_thumbnail job
+    payment.submitted_at = timezone.now()
     payment.save()
+    enqueue('shop.make_proof_thumbnail', payment_id=payment.pk)
+    # Seller review can take a while; don't let the hold lapse meanwhile.
+    secure_order(order)
 
     messages.success(request, "Payment proof submitted! Waiting for seller to confirm.")
     return redirect('order_detail', order_id=order.id)
@@ -217,54 +370,46 @@ def payment_stripe_redirect(request, order_id):
 
 @login_required_custom
 def payment_stripe_success(request, order_id):
-    from .payment_handlers import verify_stripe_session
-    from django.utils import timezone as tz
+    # Stripe confirms the payment through the webhook (stripe_webhook); this
+    # page only reports what has been recorded so far.
+    order = get_object_or_404(Order.objects.select_related('payment'), pk=order_id, buyer=request.user)
+    payment = getattr(order, 'payment', None)
 
-    order = get_object_or_404(Order, pk=order_id, buyer=request.user)
-    session_id = request.GET.get('session_id', '').strip()
-
-    if not session_id:
-        messages.error(request, "Invalid payment session.")
-        return redirect('order_detail', order_id=order.id)
-
-    status = verify_stripe_session(session_id)
-
-    if status == 'paid':
-        Payment.objects.update_or_create(
-            order=order,
-            defaults={
-                'method': 'stripe',
-                'status': 'confirmed',
-                'amount': order.total_amount,
-                'stripe_session_id': session_id,
-                'paid_at': tz.now(),
-            }
-        )
+    if payment and payment.status == 'confirmed':
+        messages.success(request, f"Payment confirmed! Order {order.order_number} is being processed.")
+    elif payment and payment.status == 'failed':
+        messages.error(request, "Stripe could not complete the payment. Please try again.")
+    else:
+        messages.info(request, "Thanks! Stripe is confirming your payment; refresh this page in a moment to see it.")
+    return redirect('order_detail', order_id=order.id)
 
-        old = order.status
-        order.status = 'confirmed'
-        order.save(update_fields=['status'])
 
-        OrderStatusLog.objects.create(
-            order=order,
-            changed_by=None,
-            old_status=old,
-            new_status='confirmed',
-            note='Payment confirmed via Stripe.',
-        )
+@csrf_exempt
+@require_POST
+def stripe_webhook(request):
+    """Receives Stripe events; they're applied by the shop.apply_stripe_event job."""
+    import stripe
+    from django.conf import settings as s
+    from .stripe_events import record
 
-        create_notification(
-            recipient=request.user,
-            notif_type='order',
-            message=f"Stripe payment confirmed for order {order.order_number}!",
-            link=f"/shop/order/{order.id}/",
-        )
+    if not s.STRIPE_WEBHOOK_SECRET:
+        # Never accept unsigned events; Stripe retries once this is configured.
+        logger.error("Stripe webhook received but STRIPE_WEBHOOK_SECRET is not set.")
+        return HttpResponse(status=503)
 
-        messages.success(request, f"Payment confirmed! Order {order.order_number} is being processed.")
-    else:
-        messages.warning(request, "Payment not yet confirmed.")
+    payload = request.body.decode('utf-8')
+    try:
+        stripe.WebhookSignature.verify_header(
+            payload, request.headers.get('Stripe-Signature', ''), s.STRIPE_WEBHOOK_SECRET,
+            tolerance=stripe.Webhook.DEFAULT_TOLERANCE,
+        )
+        event = json.loads(payload)
+    except (stripe.SignatureVerificationError, ValueError) as e:
+        logger.warning(f"Rejected Stripe webhook: {e}")
+        return HttpResponse(status=400)
 
-    return redirect('order_detail', order_id=order.id)
+    record(event)
+    return HttpResponse(status=200)
 
 
 @login_required_custom
@@ -277,65 +422,66 @@ def payment_stripe_cancel(request, order_id):
 @seller_required
 @require_POST
 def confirm_payment_proof(request, order_id):
-    from django.utils import timezone as tz
-
-    order = get_object_or_404(Order, pk=order_id)
-
-    # Seller can only confirm if they have items in this order
-    if not order.items.filter(seller=request.user).exists():
-        messages.error(request, "You don't have items in this order.")
-        return redirect('seller_orders')
-
-    try:
-        payment = order.payment
-    except Payment.DoesNotExist:
+    order = get_object_or_404(Order.objects.select_related('payment'), pk=order_id)
+    payment = getattr(order, 'payment', None)
+    if payment is None:
         messages.error(request, "No payment record found for this order.")
         return redirect('seller_orders')
 
-    try:
-        payment.status = 'confirmed'
-        # only set paid_at if your model has it
-        if hasattr(payment, 'paid_at'):
-            payment.paid_at = tz.now()
-        payment.save()
-
-        old = order.status
-        order.status = 'confirmed'
-        order.save(update_fields=['status'])
-
-        OrderStatusLog.objects.create(
-            order=order,
-            changed_by=request.user,
-            old_status=old,
-            new_status='confirmed',
-            note='Payment proof verified by seller.',
-        )
-
-        create_notification(
-            recipient=order.buyer,
-            notif_type='order',
-            message=f"Your payment for order {order.order_number} has been confirmed!",
-            link=f"/shop/order/{order.id}/",
-        )
-
+    if confirm_payment_proofs([payment.pk], request.user):
         messages.success(request, f"Payment for order {order.order_number} confirmed.")
-    except Exception as e:
-        messages.error(request, f"Error: {e}")
-
+    else:
+        messages.error(request, "This payment can't be confirmed: it isn't awaiting review or you have no items in the order.")
     return redirect('seller_orders')
 
+
+@seller_required
+def seller_payment_reviews(request):
+    """Submitted payment proofs for the seller's orders, oldest first, confirmable in bulk."""
+    if request.method == 'POST':
+        payment_ids = [int(i) for i in request.POST.getlist('payment_ids') if i.isdigit()]
+        confirmed = confirm_payment_proofs(payment_ids, request.user)
+        if confirmed:
+            messages.success(request, f"Confirmed {len(confirmed)} payment(s): {', '.join(confirmed)}.")
+        else:
+            messages.warning(request, "No payments were confirmed.")
+        return redirect('seller_payment_reviews')
+
+    queue = (
+        Payment.objects.filter(
+            status='submitted',
+            order_id__in=OrderItem.objects.filter(seller=request.user).values('order_id'),
+        )
+        .select_related('order', 'order__buyer')
+    )
+    try:
+        page = keyset_paginate(queue, ('submitted_at', 'id'), request.GET.get('cursor'), REVIEW_PAGE_SIZE)
+    except InvalidCursor:
+        page = keyset_paginate(queue, ('submitted_at', 'id'), None, REVIEW_PAGE_SIZE)
+    return render(request, 'shop/seller_payment_reviews.html', {
+        'page': page,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'base_params': '',
+    })
+
 # ── SELLER ────────────────────────────────────────────────────────────────
 
 @seller_required
 def seller_dashboard(request):
     products = Product.objects.filter(seller=request.user).order_by('-created_at')
-    return render(request, 'shop/seller_dashboard.html', {'products': products})
+    series = daily_series(request.user, days=30)
+    return render(request, 'shop/seller_dashboard.html', {
+        'products': products,
+        'totals': seller_totals(request.user, since=series[0]['day']),
+        'series': series,
+    })
 
 
 @seller_required
 def seller_orders(request):
     order_items = OrderItem.objects.filter(seller=request.user).select_related(
-        'order', 'order__buyer', 'product'
+        'order', 'order__buyer', 'order__payment', 'product'
     ).order_by('-order__created_at')
     return render(request, 'shop/seller_orders.html', {'order_items': order_items})
 
@@ -363,33 +509,73 @@ def update_item_status(request, item_id):
 
 
 @seller_required
-def seller_reports(request):
-    items = OrderItem.objects.filter(seller=request.user).select_related('order', 'order__buyer')
-    total_orders = items.values('order').distinct().count()
-    total_items = sum(i.quantity for i in items)
-    total_revenue = sum(i.subtotal for i in items)
-
-    if request.GET.get('download') == 'csv':
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="sales_report.csv"'
-        writer = csv.writer(response)
-        writer.writerow(['Order Number', 'Buyer', 'Product', 'Qty', 'Unit Price', 'Subtotal', 'Status', 'Date'])
-        for item in items:
-            writer.writerow([
-                item.order.order_number, item.order.buyer.username,
-                item.product_name, item.quantity,
-                f"PHP {item.unit_price:,.2f}", f"PHP {item.subtotal:,.2f}",
-                item.status, item.order.created_at.strftime('%Y-%m-%d'),
-            ])
-        return response
+@require_POST
+def bulk_update_item_status(request):
+    new_status = request.POST.get('status')
+    item_ids = [i for i in request.POST.getlist('item_ids') if i.isdigit()]
+    if not item_ids:
+        messages.error(request, "Select at least one order item.")
+        return redirect('seller_orders')
 
+    updated, orders, error = bulk_update_order_item_status(item_ids, new_status, request.user)
+    if error:
+        messages.error(request, error)
+        return redirect('seller_orders')
+
+    # Email only buyers whose order status actually moved.
+    for order in Order.objects.filter(pk__in=list(orders)).select_related('buyer'):
+        send_order_update_email(order, orders[order.pk])
+
+    messages.success(request, f"{updated} order item(s) updated to {new_status}.")
+    return redirect('seller_orders')
+
+
+@seller_required
+def seller_reports(request):
+    fmt = request.GET.get('download')
+    if fmt in EXPORT_FORMATS:
+        try:
+            start, end = parse_date_range(request.GET)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('seller_reports')
+        return stream_export(seller_items(request.user, start, end), SELLER_ITEM_COLUMNS, fmt, 'sales_report')
+
+    # KPIs and charts come from the daily rollups (shop/rollups.py); cancelled
+    # and refunded items are not counted as sales.
+    totals = seller_totals(request.user)
     return render(request, 'shop/seller_reports.html', {
-        'items': items,
-        'total_orders': total_orders,
-        'total_items': total_items,
-        'total_revenue': total_revenue,
+        'total_orders': totals['orders'],
+        'total_items': totals['units'],
+        'total_revenue': totals['revenue'],
+        'series': daily_series(request.user, days=90),
+        'top_products': top_products(request.user),
     })
 
+@seller_required
+def seller_statements(request):
+    statements = SellerStatement.objects.filter(seller=request.user).defer('pdf', 'csv')
+    return render(request, 'shop/seller_statements.html', {'statements': statements})
+
+
+@seller_required
+def seller_statement_download(request, pk, fmt):
+    if fmt not in STATEMENT_TYPES:
+        raise Http404
+    statement = get_object_or_404(
+        SellerStatement.objects.only('month', 'digest', fmt), pk=pk, seller=request.user,
+    )
+    etag = f'"{statement.digest}-{fmt}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(bytes(getattr(statement, fmt)), content_type=STATEMENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="statement_{statement.month:%Y-%m}.{fmt}"'
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @seller_required
 def product_create(request):
     if request.method == 'POST':
@@ -455,17 +641,26 @@ def product_edit(request, pk):
             messages.error(request, "Invalid price.")
             return render(request, 'shop/product_form.html', {'action': 'Edit', 'product': product})
 
+        # Checkouts take stock while the form is open, so a stock edit is
+        # applied as a change against the value the form was loaded with.
         try:
-            product.stock = int((request.POST.get('stock', '0') or '0').strip())
-            if product.stock < 0:
-                product.stock = 0
-        except Exception:
-            product.stock = 0
+            stock = max(int((request.POST.get('stock', '0') or '0').strip()), 0)
+        except ValueError:
+            stock = 0
+        try:
+            loaded = int(request.POST.get('stock_loaded', ''))
+        except ValueError:
+            loaded = product.stock
 
+        fields = ['name', 'description', 'price', 'updated_at']
         if request.FILES.get('image'):
             product.image = request.FILES['image']
+            fields.append('image')
 
-        product.save()
+        with transaction.atomic():
+            product.save(update_fields=fields)
+            if stock != loaded:
+                Product.objects.filter(pk=product.pk).update(stock=Greatest(F('stock') + (stock - loaded), 0))
         messages.success(request, "Product updated.")
         return redirect('seller_dashboard')
 